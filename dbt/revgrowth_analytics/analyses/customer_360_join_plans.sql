@@ -0,0 +1,67 @@
+-- EXPLAIN ANALYZE: chained FULL OUTER JOINs on coalesce(...) keys vs the customer-month spine.
+--
+--   dbt compile -s customer_360_join_plans
+--   psql -f target/compiled/revgrowth_analytics/analyses/customer_360_join_plans.sql
+--
+-- Run against a warehouse at production volume. In the first plan, expect Nested Loop or
+-- Merge Join nodes on the coalesce keys. In the second, expect Hash Right/Left Joins on
+-- (month, customer_id). Compare the "Execution Time" lines.
+
+-- 1) previous shape: revenue FULL JOIN eng FULL JOIN pay on coalesce(...) keys
+explain (analyze, buffers)
+with revenue as (
+  select date_trunc('month', event_ts)::date as month, customer_id, sum(amount_usd) as revenue_usd
+  from {{ ref('stg_billing_events') }}
+  where event_name = 'invoice_created'
+  group by 1,2
+),
+pay as (
+  select month, customer_id, sum(succeeded) as succeeded_invoices, sum(failed) as failed_invoices
+  from {{ ref('int_invoice_outcomes') }}
+  group by 1,2
+),
+eng as (
+  select date_trunc('month', event_ts)::date as month, customer_id, count(*) as events
+  from {{ ref('stg_product_events') }}
+  group by 1,2
+)
+select
+  coalesce(r.month, e.month, p.month) as month,
+  coalesce(r.customer_id, e.customer_id, p.customer_id) as customer_id,
+  r.revenue_usd, p.succeeded_invoices, p.failed_invoices, e.events
+from revenue r
+full outer join eng e
+  on r.month = e.month and r.customer_id = e.customer_id
+full outer join pay p
+  on coalesce(r.month, e.month) = p.month
+ and coalesce(r.customer_id, e.customer_id) = p.customer_id;
+
+-- 2) spine shape: equality LEFT JOINs onto int_customer_month_spine
+explain (analyze, buffers)
+with revenue as (
+  select date_trunc('month', event_ts)::date as month, customer_id, sum(amount_usd) as revenue_usd
+  from {{ ref('stg_billing_events') }}
+  where event_name = 'invoice_created'
+  group by 1,2
+),
+pay as (
+  select month, customer_id, sum(succeeded) as succeeded_invoices, sum(failed) as failed_invoices
+  from {{ ref('int_invoice_outcomes') }}
+  group by 1,2
+),
+eng as (
+  select date_trunc('month', event_ts)::date as month, customer_id, count(*) as events
+  from {{ ref('stg_product_events') }}
+  group by 1,2
+)
+select
+  s.month,
+  s.customer_id,
+  r.revenue_usd, p.succeeded_invoices, p.failed_invoices, e.events
+from {{ ref('int_customer_month_spine') }} s
+left join revenue r
+  on r.month = s.month and r.customer_id = s.customer_id
+left join eng e
+  on e.month = s.month and e.customer_id = s.customer_id
+left join pay p
+  on p.month = s.month and p.customer_id = s.customer_id;
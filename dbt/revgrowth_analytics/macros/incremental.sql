@@ -0,0 +1,84 @@
+{#
+  Incremental filters shared by the silver and gold models.
+  On a full build (first run or `dbt run --full-refresh`) they render to nothing.
+#}
+
+{#
+  Staging: only bronze rows ingested after the high-water mark already in {{ this }}.
+  The mark is ingestion time (bronze ingested_ts, default now()), not event_ts:
+  generators backfill history and product events run months ahead, so an
+  event_ts mark would sit in the future and silently drop later backfills,
+  resumed runs and live events. `this_column` names the mark's column in
+  {{ this }} when it differs.
+#}
+{% macro ingested_high_water(ts_column='ingested_ts', this_column=none) %}
+  {%- if is_incremental() %}
+  and {{ ts_column }} > {{ ingested_mark(this_column or ts_column) }}
+  {%- endif %}
+{% endmacro %}
+
+{# The latest ingestion time already in {{ this }}, less incremental_lookback_hours. #}
+{% macro ingested_mark(this_column='last_ingested_ts') %}
+  (
+    select coalesce(max({{ this_column }}), '-infinity'::timestamptz)
+      - interval '{{ var("incremental_lookback_hours") }} hours'
+    from {{ this }}
+  )
+{%- endmacro %}
+
+{#
+  Monthly models: the months to rebuild are the months of upstream rows ingested
+  past the model's last_ingested_ts mark (each model carries the max ingested_ts
+  of the rows behind each output row), each widened by gold_lookback_months
+  before it so an invoice whose outcome month moved is rebuilt in both months.
+  Not the latest month in {{ this }}: product events run months ahead, so that
+  would skip current and backfilled months.
+
+  Render the list once per model as a CTE named affected_months:
+
+    with affected_months as (
+      {{ affected_months([
+        {'relation': ref('stg_billing_events'), 'where': "event_name = 'invoice_created'"},
+        {'relation': ref('int_invoice_outcomes'), 'month': 'month', 'ingested': 'last_ingested_ts'},
+      ]) }}
+    ), ...
+
+  Each source is a relation plus optional 'month' (expression giving the row's
+  month, default the event_ts month), 'ingested' (default ingested_ts) and
+  'where' (the model's own filter, so rows it ignores do not trigger rebuilds).
+  Empty on a full build.
+#}
+{% macro affected_months(sources) %}
+  {%- if is_incremental() %}
+  select distinct (s.month - make_interval(months => k))::date as month
+  from (
+    {%- for src in sources %}
+    select distinct {{ src.get('month', "date_trunc('month', event_ts)::date") }} as month
+    from {{ src['relation'] }}
+    where {{ src.get('ingested', 'ingested_ts') }} > {{ ingested_mark() }}
+    {%- if src.get('where') %}
+      and ({{ src['where'] }})
+    {%- endif %}
+    {%- if not loop.last %}
+    union
+    {%- endif %}
+    {%- endfor %}
+  ) s
+  cross join generate_series(0, {{ var("gold_lookback_months") }}) as k
+  {%- else %}
+  select null::date as month
+  where false
+  {%- endif %}
+{% endmacro %}
+
+{#
+  Monthly models: only rows in the affected_months CTE (see above). Those months
+  are deleted and re-inserted (delete+insert on the month key). The range check
+  keeps event_ts index scans usable; the IN list picks the exact months.
+#}
+{% macro month_window(ts_column='event_ts') %}
+  {%- if is_incremental() %}
+  and {{ ts_column }} >= (select min(month) from affected_months)
+  and date_trunc('month', {{ ts_column }})::date in (select month from affected_months)
+  {%- endif %}
+{% endmacro %}
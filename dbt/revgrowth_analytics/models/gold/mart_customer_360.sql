@@ -1,31 +1,42 @@
-with revenue as (
-  select
-    date_trunc('month', event_ts)::date as month,
-    customer_id,
-    sum(amount_usd) as revenue_usd
-  from {{ ref('stg_billing_events') }}
-  where event_name = 'invoice_created'
-  group by 1,2
+with affected_months as (
+  {{ affected_months([
+    {'relation': ref('stg_billing_events'), 'where': "event_name = 'invoice_created'"},
+    {'relation': ref('int_invoice_outcomes'), 'month': 'month', 'ingested': 'last_ingested_ts'},
+    {'relation': ref('stg_product_events')},
+  ]) }}
 ),
 
-pay_term as (
+spine as (
+  select month, customer_id
+  from {{ ref('int_customer_month_spine') }}
+  where true
+  {{- month_window(ts_column='month') }}
+),
+
+revenue as (
   select
     date_trunc('month', event_ts)::date as month,
     customer_id,
-    count(*) filter (where event_name = 'payment_succeeded') as succeeded_invoices,
-    count(*) filter (where event_name = 'payment_failed') as failed_invoices
-  from {{ ref('stg_payment_events') }}
-  where event_name in ('payment_succeeded','payment_failed')
+    sum(amount_usd) as revenue_usd,
+    max(ingested_ts) as last_ingested_ts
+  from {{ ref('stg_billing_events') }}
+  where event_name = 'invoice_created'
+  {{- month_window() }}
   group by 1,2
 ),
 
-attempts as (
+pay as (
+  -- terminal outcomes and attempts per invoice, attributed to the outcome month
   select
-    date_trunc('month', event_ts)::date as month,
+    month,
     customer_id,
-    avg(attempt_number)::numeric(10,2) as avg_attempt_number
-  from {{ ref('stg_payment_events') }}
-  where event_name = 'payment_attempted'
+    sum(succeeded) as succeeded_invoices,
+    sum(failed) as failed_invoices,
+    (sum(attempt_number_sum)::numeric / nullif(sum(attempt_count), 0))::numeric(10,2) as avg_attempt_number,
+    max(last_ingested_ts) as last_ingested_ts
+  from {{ ref('int_invoice_outcomes') }}
+  where true
+  {{- month_window(ts_column='month') }}
   group by 1,2
 ),
 
@@ -35,14 +46,17 @@ eng as (
     customer_id,
     count(*) filter (where event_name='session_started') as sessions,
     count(*) filter (where event_name='feature_used') as feature_actions,
-    max(case when event_name='cancel_intent' then 1 else 0 end) as has_cancel_intent
+    max(case when event_name='cancel_intent' then 1 else 0 end) as has_cancel_intent,
+    max(ingested_ts) as last_ingested_ts
   from {{ ref('stg_product_events') }}
+  where true
+  {{- month_window() }}
   group by 1,2
 )
 
 select
-  coalesce(r.month, e.month, p.month, a.month) as month,
-  coalesce(r.customer_id, e.customer_id, p.customer_id, a.customer_id) as customer_id,
+  s.month,
+  s.customer_id,
 
   coalesce(r.revenue_usd, 0) as revenue_usd,
 
@@ -52,19 +66,19 @@ select
     (coalesce(p.failed_invoices,0)::numeric / nullif(coalesce(p.succeeded_invoices,0) + coalesce(p.failed_invoices,0),0)) * 100
   ,2) as payment_failure_rate_pct,
 
-  coalesce(a.avg_attempt_number, 1.0) as avg_attempt_number,
+  coalesce(p.avg_attempt_number, 1.0) as avg_attempt_number,
 
   coalesce(e.sessions, 0) as sessions,
   coalesce(e.feature_actions, 0) as feature_actions,
-  coalesce(e.has_cancel_intent, 0) as has_cancel_intent
+  coalesce(e.has_cancel_intent, 0) as has_cancel_intent,
+
+  greatest(r.last_ingested_ts, p.last_ingested_ts, e.last_ingested_ts) as last_ingested_ts
 
-from revenue r
-full outer join eng e
-  on r.month = e.month and r.customer_id = e.customer_id
-full outer join pay_term p
-  on coalesce(r.month, e.month) = p.month
- and coalesce(r.customer_id, e.customer_id) = p.customer_id
-full outer join attempts a
-  on coalesce(r.month, e.month, p.month) = a.month
- and coalesce(r.customer_id, e.customer_id, p.customer_id) = a.customer_id
+from spine s
+left join revenue r
+  on r.month = s.month and r.customer_id = s.customer_id
+left join eng e
+  on e.month = s.month and e.customer_id = s.customer_id
+left join pay p
+  on p.month = s.month and p.customer_id = s.customer_id
 order by 1,2
@@ -1,41 +1,37 @@
-with sessions as (
-  select
-    date_trunc('month', event_ts)::date as month,
-    customer_id,
-    count(*) as sessions
-  from {{ ref('stg_product_events') }}
-  where event_name = 'session_started'
-  group by 1,2
+with affected_months as (
+  {{ affected_months([
+    {'relation': ref('stg_product_events'), 'where': "event_name in ('session_started', 'feature_used', 'cancel_intent')"},
+  ]) }}
 ),
-features as (
-  select
-    date_trunc('month', event_ts)::date as month,
-    customer_id,
-    count(*) as feature_actions
-  from {{ ref('stg_product_events') }}
-  where event_name = 'feature_used'
-  group by 1,2
+
+spine as (
+  select month, customer_id
+  from {{ ref('int_customer_month_spine') }}
+  where has_product_activity
+  {{- month_window(ts_column='month') }}
 ),
-cancel_intent as (
+activity as (
   select
     date_trunc('month', event_ts)::date as month,
     customer_id,
-    max(1) as has_cancel_intent
+    count(*) filter (where event_name = 'session_started') as sessions,
+    count(*) filter (where event_name = 'feature_used') as feature_actions,
+    max(case when event_name = 'cancel_intent' then 1 else 0 end) as has_cancel_intent,
+    max(ingested_ts) as last_ingested_ts
   from {{ ref('stg_product_events') }}
-  where event_name = 'cancel_intent'
+  where event_name in ('session_started', 'feature_used', 'cancel_intent')
+  {{- month_window() }}
   group by 1,2
 )
 
 select
-  coalesce(s.month, f.month) as month,
-  coalesce(s.customer_id, f.customer_id) as customer_id,
-  coalesce(s.sessions, 0) as sessions,
-  coalesce(f.feature_actions, 0) as feature_actions,
-  coalesce(c.has_cancel_intent, 0) as has_cancel_intent
-from sessions s
-full outer join features f
-  on s.month = f.month and s.customer_id = f.customer_id
-left join cancel_intent c
-  on coalesce(s.month, f.month) = c.month
- and coalesce(s.customer_id, f.customer_id) = c.customer_id
+  s.month,
+  s.customer_id,
+  coalesce(a.sessions, 0) as sessions,
+  coalesce(a.feature_actions, 0) as feature_actions,
+  coalesce(a.has_cancel_intent, 0) as has_cancel_intent,
+  a.last_ingested_ts
+from spine s
+left join activity a
+  on a.month = s.month and a.customer_id = s.customer_id
 order by 1,2
@@ -1,14 +1,33 @@
-{{ config(materialized='table') }}
+{{ config(unique_key='month_start') }}
 
-with terminal_invoices as (
+with affected_months as (
+    {{ affected_months([
+      {'relation': ref('int_invoice_outcomes'), 'month': 'month', 'ingested': 'last_ingested_ts', 'where': 'is_terminal'},
+    ]) }}
+),
+
+invoices as (
+
+    select
+        month as month_start,
+        invoice_id,
+        failed,
+        failure_reason,
+        last_ingested_ts
+    from {{ ref('int_invoice_outcomes') }}
+    where is_terminal
+    {{- month_window(ts_column='month') }}
+
+),
+
+terminal_invoices as (
 
     -- Total terminal invoices per month (succeeded OR failed)
     select
-        date_trunc('month', event_ts)::date as month_start,
-        count(distinct invoice_id) as total_invoices
-    from {{ ref('stg_payment_events') }}
-    where event_name in ('payment_succeeded', 'payment_failed')
-      and invoice_id is not null
+        month_start,
+        count(*) as total_invoices,
+        max(last_ingested_ts) as last_ingested_ts
+    from invoices
     group by 1
 
 ),
@@ -17,12 +36,11 @@ failed_by_reason as (
 
     -- Failed invoices per month per reason
     select
-        date_trunc('month', event_ts)::date as month_start,
-        coalesce(nullif(trim(lower(raw_payload ->> 'failure_reason')), ''), 'unknown') as failure_reason,
-        count(distinct invoice_id) as failed_invoices
-    from {{ ref('stg_payment_events') }}
-    where event_name = 'payment_failed'
-      and invoice_id is not null
+        month_start,
+        failure_reason,
+        count(*) as failed_invoices
+    from invoices
+    where failed = 1
     group by 1, 2
 
 ),
@@ -34,7 +52,8 @@ final as (
         f.failure_reason,
         f.failed_invoices,
         t.total_invoices,
-        (f.failed_invoices::numeric / nullif(t.total_invoices, 0)) as failure_rate_pct
+        (f.failed_invoices::numeric / nullif(t.total_invoices, 0)) as failure_rate_pct,
+        t.last_ingested_ts
     from failed_by_reason f
     join terminal_invoices t
       on f.month_start = t.month_start
@@ -1,10 +1,26 @@
-with failed as (
+with affected_months as (
+  {{ affected_months([
+    {'relation': ref('int_invoice_outcomes'), 'month': 'month', 'ingested': 'last_ingested_ts', 'where': 'failed = 1'},
+    {'relation': ref('stg_product_events'), 'where': "event_name = 'cancel_intent'"},
+  ]) }}
+),
+
+spine as (
+  select month, customer_id
+  from {{ ref('int_customer_month_spine') }}
+  where (has_failed_payment or has_cancel_intent)
+  {{- month_window(ts_column='month') }}
+),
+
+failed as (
   select
     customer_id,
-    date_trunc('month', event_ts)::date as month,
-    count(*) as failed_invoices
-  from {{ ref('stg_payment_events') }}
-  where event_name = 'payment_failed'
+    month,
+    count(*) as failed_invoices,
+    max(last_ingested_ts) as last_ingested_ts
+  from {{ ref('int_invoice_outcomes') }}
+  where failed = 1
+  {{- month_window(ts_column='month') }}
   group by 1,2
 ),
 
@@ -12,22 +28,27 @@ cancel as (
   select
     customer_id,
     date_trunc('month', event_ts)::date as month,
-    count(*) as cancel_intents
+    count(*) as cancel_intents,
+    max(ingested_ts) as last_ingested_ts
   from {{ ref('stg_product_events') }}
   where event_name = 'cancel_intent'
+  {{- month_window() }}
   group by 1,2
 )
 
 select
-  coalesce(f.month, c.month) as month,
-  coalesce(f.customer_id, c.customer_id) as customer_id,
+  s.month,
+  s.customer_id,
   coalesce(f.failed_invoices, 0) as failed_invoices,
   coalesce(c.cancel_intents, 0) as cancel_intents,
   case
     when coalesce(f.failed_invoices, 0) > 0 and coalesce(c.cancel_intents, 0) > 0 then 1
     else 0
-  end as failure_and_cancel_same_month
-from failed f
-full outer join cancel c
-  on f.customer_id = c.customer_id and f.month = c.month
+  end as failure_and_cancel_same_month,
+  greatest(f.last_ingested_ts, c.last_ingested_ts) as last_ingested_ts
+from spine s
+left join failed f
+  on f.customer_id = s.customer_id and f.month = s.month
+left join cancel c
+  on c.customer_id = s.customer_id and c.month = s.month
 order by 1,2
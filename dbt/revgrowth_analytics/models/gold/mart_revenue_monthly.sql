@@ -1,11 +1,19 @@
-with invoices as (
+with affected_months as (
+  {{ affected_months([
+    {'relation': ref('stg_billing_events'), 'where': "event_name = 'invoice_created'"},
+  ]) }}
+),
+
+invoices as (
   select
     date_trunc('month', event_ts)::date as month,
     customer_id,
     plan_id,
-    amount_usd
+    amount_usd,
+    ingested_ts
   from {{ ref('stg_billing_events') }}
   where event_name = 'invoice_created'
+  {{- month_window() }}
 )
 
 select
@@ -13,7 +21,8 @@ select
   plan_id,
   count(distinct customer_id) as paying_customers,
   sum(amount_usd) as revenue_usd,
-  round(avg(amount_usd), 2) as arpu_usd
+  round(avg(amount_usd), 2) as arpu_usd,
+  max(ingested_ts) as last_ingested_ts
 from invoices
 group by 1,2
 order by 1,2
@@ -0,0 +1,85 @@
+{{ config(
+    unique_key='month',
+    indexes=[
+      {'columns': ['month', 'customer_id'], 'unique': True},
+    ]
+) }}
+
+-- One row per (month, customer_id) seen in any source, with a flag per source.
+-- Customer-month marts left-join their per-source aggregates onto this on plain
+-- equality keys instead of chaining FULL OUTER JOINs on coalesce(...) keys.
+
+with affected_months as (
+    {{ affected_months([
+      {'relation': ref('stg_billing_events'), 'where': "event_name = 'invoice_created'"},
+      {'relation': ref('int_invoice_outcomes'), 'month': 'month', 'ingested': 'last_ingested_ts'},
+      {'relation': ref('stg_product_events')},
+    ]) }}
+),
+
+keys as (
+
+    select
+        date_trunc('month', event_ts)::date as month,
+        customer_id,
+        true as has_invoice,
+        false as has_payment,
+        false as has_failed_payment,
+        false as has_product_event,
+        false as has_product_activity,
+        false as has_cancel_intent,
+        max(ingested_ts) as last_ingested_ts
+    from {{ ref('stg_billing_events') }}
+    where event_name = 'invoice_created'
+    {{- month_window() }}
+    group by 1,2
+
+    union all
+
+    select
+        month,
+        customer_id,
+        false,
+        true,
+        bool_or(failed = 1),
+        false,
+        false,
+        false,
+        max(last_ingested_ts)
+    from {{ ref('int_invoice_outcomes') }}
+    where true
+    {{- month_window(ts_column='month') }}
+    group by 1,2
+
+    union all
+
+    select
+        date_trunc('month', event_ts)::date as month,
+        customer_id,
+        false,
+        false,
+        false,
+        true,
+        bool_or(event_name in ('session_started', 'feature_used')),
+        bool_or(event_name = 'cancel_intent'),
+        max(ingested_ts)
+    from {{ ref('stg_product_events') }}
+    where true
+    {{- month_window() }}
+    group by 1,2
+
+)
+
+select
+    month,
+    customer_id,
+    bool_or(has_invoice) as has_invoice,
+    bool_or(has_payment) as has_payment,
+    bool_or(has_failed_payment) as has_failed_payment,
+    bool_or(has_product_event) as has_product_event,
+    bool_or(has_product_activity) as has_product_activity,
+    bool_or(has_cancel_intent) as has_cancel_intent,
+    max(last_ingested_ts) as last_ingested_ts
+from keys
+where customer_id is not null
+group by 1,2
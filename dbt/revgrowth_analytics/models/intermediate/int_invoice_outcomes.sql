@@ -0,0 +1,92 @@
+{{ config(
+    unique_key='invoice_id',
+    indexes=[
+      {'columns': ['invoice_id'], 'unique': True},
+      {'columns': ['month']},
+      {'columns': ['invoice_month', 'plan_id']},
+      {'columns': ['customer_id', 'month']},
+      {'columns': ['last_ingested_ts']},
+    ]
+) }}
+
+-- One row per invoice, built in a single pass over stg_payment_events.
+-- Incremental runs rebuild every invoice with a payment event loaded since the
+-- last run (ingested_ts past last_ingested_ts; event_ts says nothing about load order).
+
+with payments as (
+
+    select *
+    from {{ ref('stg_payment_events') }}
+    where invoice_id is not null
+    {%- if is_incremental() %}
+      and invoice_id in (
+        select invoice_id
+        from {{ ref('stg_payment_events') }}
+        where true
+        {{- ingested_high_water(this_column='last_ingested_ts') }}
+      )
+    {%- endif %}
+
+),
+
+per_invoice as (
+
+    select
+        invoice_id,
+        max(customer_id) as customer_id,
+        max(event_ts) as last_event_ts,
+        max(ingested_ts) as last_ingested_ts,
+        max(event_ts) filter (where event_name in ('payment_succeeded', 'payment_failed')) as terminal_ts,
+
+        max(case when event_name = 'payment_succeeded' then 1 else 0 end) as succeeded,
+        max(case when event_name = 'payment_failed' then 1 else 0 end) as failed,
+
+        max(coalesce(nullif(trim(lower(failure_reason)), ''), 'unknown'))
+            filter (where event_name = 'payment_failed') as failure_reason,
+
+        max(attempt_number) filter (where event_name = 'payment_attempted') as max_attempts,
+        count(*) filter (where event_name = 'payment_attempted') as attempt_count,
+        sum(attempt_number) filter (where event_name = 'payment_attempted') as attempt_number_sum
+    from payments
+    group by 1
+
+),
+
+invoice_created as (
+
+    -- Source of truth for plan attribution
+    select
+        invoice_id,
+        min(date_trunc('month', event_ts)::date) as invoice_month,
+        max(upper(plan_id)) as plan_id
+    from {{ ref('stg_billing_events') }}
+    where event_name = 'invoice_created'
+      and invoice_id in (select invoice_id from per_invoice)
+    group by 1
+
+)
+
+select
+    p.invoice_id,
+    p.customer_id,
+
+    -- month of the terminal outcome; invoices still retrying sit in the month of their latest attempt
+    date_trunc('month', coalesce(p.terminal_ts, p.last_event_ts))::date as month,
+    i.invoice_month,
+    i.plan_id,
+
+    (p.succeeded = 1 or p.failed = 1) as is_terminal,
+    p.succeeded,
+    p.failed,
+    p.failure_reason,
+
+    p.max_attempts,
+    p.attempt_count,
+    p.attempt_number_sum,
+
+    p.terminal_ts,
+    p.last_event_ts,
+    p.last_ingested_ts
+from per_invoice p
+left join invoice_created i
+  on p.invoice_id = i.invoice_id
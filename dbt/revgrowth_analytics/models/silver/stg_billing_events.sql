@@ -1,3 +1,5 @@
+{{ config(indexes=[{'columns': ['invoice_id']}, {'columns': ['ingested_ts']}]) }}
+
 with src as (
   select
     event_id,
@@ -11,8 +13,11 @@ with src as (
     invoice_id,
     plan_id,
     amount_usd,
-    raw_payload
+    raw_payload,
+    ingested_ts
   from {{ source('bronze', 'billing_events') }}
+  where true
+  {{- ingested_high_water() }}
 )
 
 select
@@ -27,6 +32,7 @@ select
   invoice_id,
   upper(plan_id) as plan_id,
   amount_usd::numeric(12,2) as amount_usd,
-  raw_payload
+  raw_payload,
+  ingested_ts
 from src
 where customer_id is not null
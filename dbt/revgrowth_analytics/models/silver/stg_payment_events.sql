@@ -1,3 +1,5 @@
+{{ config(indexes=[{'columns': ['invoice_id']}, {'columns': ['event_ts']}, {'columns': ['ingested_ts']}]) }}
+
 with src as (
   select
     event_id,
@@ -13,8 +15,11 @@ with src as (
     amount_usd,
     status,
     failure_reason,
-    raw_payload
+    raw_payload,
+    ingested_ts
   from {{ source('bronze', 'payment_events') }}
+  where true
+  {{- ingested_high_water() }}
 )
 
 select
@@ -31,6 +36,7 @@ select
   amount_usd::numeric(12,2) as amount_usd,
   lower(status) as status,
   nullif(failure_reason, '') as failure_reason,
-  raw_payload
+  raw_payload,
+  ingested_ts
 from src
 where invoice_id is not null
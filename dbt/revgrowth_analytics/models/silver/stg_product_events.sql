@@ -1,3 +1,5 @@
+{{ config(indexes=[{'columns': ['ingested_ts']}]) }}
+
 with src as (
   select
     event_id,
@@ -14,8 +16,11 @@ with src as (
     channel,
     device,
     country,
-    raw_payload
+    raw_payload,
+    ingested_ts
   from {{ source('bronze', 'product_events') }}
+  where true
+  {{- ingested_high_water() }}
 )
 
 select
@@ -33,6 +38,7 @@ select
   lower(channel) as channel,
   lower(device) as device,
   upper(country) as country,
-  raw_payload
+  raw_payload,
+  ingested_ts
 from src
 where customer_id is not null
@@ -0,0 +1,69 @@
+"""
+Compare bronze insert throughput for each event id scheme (natural vs uuid7 vs uuid4).
+
+For every table and scheme, loads ROUNDS batches of synthetic events on top of
+each other (so the event_id index keeps growing), and reports rows/sec plus
+how much the primary-key index grew. Benchmark rows are tagged
+environment = 'bench' and deleted afterwards.
+
+    python -m scripts.benchmarks.bench_event_ids
+"""
+import time
+from datetime import datetime, timedelta, timezone
+
+from scripts.ingest.db import get_conn
+from scripts.ingest.event_ids import EVENT_ID_SCHEMES, make_event_ids
+
+from .bench_load_methods import TABLES, cleanup
+
+EVENTS_PER_ROUND = 100_000
+ROUNDS = 5
+PAGE_SIZE = 5000
+METHOD = "copy"
+
+
+def pkey_index_bytes(table: str) -> int:
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                -- sums over every partition when bronze.<table> is partitioned
+                select coalesce(sum(pg_relation_size(i.indexrelid)), 0) as bytes
+                from pg_partition_tree(('bronze.' || %s)::regclass) t
+                join pg_index i on i.indrelid = t.relid
+                where i.indisprimary
+                """,
+                (table,),
+            )
+            return int(cur.fetchone()["bytes"])
+
+
+def main():
+    print(f"Benchmarking event id schemes: {ROUNDS} x {EVENTS_PER_ROUND:,} events per table/scheme via {METHOD}")
+    print(f"{'table':<16} {'scheme':<7} {'rows/sec':>12} {'pkey growth MB':>15}")
+
+    for table, (make_event, insert_fn) in TABLES.items():
+        for scheme in EVENT_ID_SCHEMES:
+            cleanup(table)
+            index_before = pkey_index_bytes(table)
+            start_ts = datetime.now(timezone.utc) - timedelta(days=30)
+            elapsed = 0.0
+            try:
+                for r in range(ROUNDS):
+                    offset = r * EVENTS_PER_ROUND
+                    events = [make_event(offset + i, start_ts + timedelta(seconds=offset + i)) for i in range(EVENTS_PER_ROUND)]
+                    keys = [f"bench|{table}|{offset + i}" for i in range(EVENTS_PER_ROUND)]
+                    for e, event_id in zip(events, make_event_ids([e["event_ts"] for e in events], scheme, keys)):
+                        e["event_id"] = event_id
+                    t0 = time.perf_counter()
+                    insert_fn(events, page_size=PAGE_SIZE, method=METHOD)
+                    elapsed += time.perf_counter() - t0
+                growth = pkey_index_bytes(table) - index_before
+            finally:
+                cleanup(table)
+            total = ROUNDS * EVENTS_PER_ROUND
+            print(f"{table:<16} {scheme:<7} {total / elapsed:>12,.0f} {growth / 1e6:>15,.1f}")
+
+
+if __name__ == "__main__":
+    main()
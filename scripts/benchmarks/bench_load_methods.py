@@ -0,0 +1,131 @@
+"""
+Compare bronze load throughput: execute_batch vs execute_values vs COPY.
+
+Loads N synthetic events per table with each method, reports rows/sec for the
+fresh load and for a re-load of the same rows (all conflicts), then deletes the
+benchmark rows again. The ingest metrics report at the end splits each
+method's time into client prep and server time. Benchmark rows are tagged environment = 'bench'.
+
+    python -m scripts.benchmarks.bench_load_methods
+"""
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from scripts.ingest import id_cache
+from scripts.ingest.db import get_conn
+from scripts.ingest.insert_billing_events_batch import insert_billing_events_batch
+from scripts.ingest.insert_payment_events_batch import insert_payment_events_batch
+from scripts.ingest.insert_product_events_batch import insert_product_events_batch
+from scripts.ingest.metrics import print_report as print_ingest_metrics
+
+N_EVENTS = 100_000
+PAGE_SIZE = 5000
+METHODS = ["execute_batch", "execute_values", "copy"]
+BENCH_ENV = "bench"
+
+
+def _billing_event(i: int, ts: datetime) -> dict:
+    return {
+        "event_id": str(uuid.uuid4()),
+        "event_ts": ts,
+        "event_name": "invoice_created",
+        "event_version": 1,
+        "source_system": "billing_system",
+        "environment": BENCH_ENV,
+        "customer_id": f"CUST-{i % 25000:06d}",
+        "user_id": None,
+        "subscription_id": f"SUB-{i:012d}",
+        "invoice_id": f"INV-{i:012d}",
+        "plan_id": "PRO",
+        "old_plan_id": None,
+        "new_plan_id": None,
+        "amount_usd": 99.0,
+        "raw_payload": {"invoice_id": f"INV-{i:012d}", "amount_usd": 99.0, "plan_id": "PRO"},
+    }
+
+
+def _payment_event(i: int, ts: datetime) -> dict:
+    return {
+        "event_id": str(uuid.uuid4()),
+        "event_ts": ts,
+        "event_name": "payment_attempted",
+        "event_version": 1,
+        "source_system": "payment_gateway",
+        "environment": BENCH_ENV,
+        "customer_id": f"CUST-{i % 25000:06d}",
+        "user_id": None,
+        "invoice_id": f"INV-{i:012d}",
+        "payment_id": f"PAY-{i:012d}",
+        "attempt_number": 1,
+        "amount_usd": 99.0,
+        "status": "succeeded",
+        "failure_reason": None,
+        "raw_payload": {"invoice_id": f"INV-{i:012d}", "attempt_number": 1, "attempt_status": "succeeded"},
+    }
+
+
+def _product_event(i: int, ts: datetime) -> dict:
+    return {
+        "event_id": str(uuid.uuid4()),
+        "event_ts": ts,
+        "event_name": "feature_used",
+        "event_version": 1,
+        "source_system": "product_app",
+        "environment": BENCH_ENV,
+        "customer_id": f"CUST-{i % 25000:06d}",
+        "user_id": f"CUST-{i % 25000:06d}-U001",
+        "session_id": f"SES-{i:010d}",
+        "feature_name": "reports",
+        "feature_action": "click",
+        "channel": "organic",
+        "device": "web",
+        "country": "US",
+        "raw_payload": {"engagement_score": 55},
+    }
+
+
+TABLES = {
+    "billing_events": (_billing_event, insert_billing_events_batch),
+    "payment_events": (_payment_event, insert_payment_events_batch),
+    "product_events": (_product_event, insert_product_events_batch),
+}
+
+
+def cleanup(table: str):
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute(f"DELETE FROM bronze.{table} WHERE environment = %s", (BENCH_ENV,))
+    # cached ids would make the next load skip rows that are no longer in bronze
+    id_cache.clear([table])
+
+
+def timed(fn, events, method: str) -> float:
+    t0 = time.perf_counter()
+    fn(events, page_size=PAGE_SIZE, method=method)
+    return time.perf_counter() - t0
+
+
+def main():
+    base_ts = datetime.now(timezone.utc) - timedelta(days=30)
+    print(f"Benchmarking bronze loads with {N_EVENTS:,} events per table/method")
+    print(f"{'table':<16} {'method':<14} {'fresh rows/sec':>16} {'rerun rows/sec':>16}")
+
+    for table, (make_event, insert_fn) in TABLES.items():
+        for method in METHODS:
+            events = [make_event(i, base_ts + timedelta(seconds=i)) for i in range(N_EVENTS)]
+            cleanup(table)
+            try:
+                fresh = timed(insert_fn, events, method)
+                # same rows again: every row hits ON CONFLICT (event_id, event_ts) DO NOTHING
+                rerun = timed(insert_fn, events, method)
+            finally:
+                cleanup(table)
+            print(f"{table:<16} {method:<14} {N_EVENTS / fresh:>16,.0f} {N_EVENTS / rerun:>16,.0f}")
+
+    print()
+    print_ingest_metrics()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Compare bronze load time and stored size for each raw_payload mode.
+
+For every table and payload mode, loads N synthetic events, then reports
+rows/sec plus the on-disk bytes of the loaded rows (pg_column_size, after
+TOAST compression), both for whole rows and for raw_payload alone.
+Benchmark rows are tagged environment = 'bench' and deleted afterwards.
+
+    python -m scripts.benchmarks.bench_payload_modes
+"""
+import time
+from datetime import datetime, timedelta, timezone
+
+from scripts.ingest.db import get_conn
+from scripts.ingest.payload import PAYLOAD_MODES
+
+from .bench_load_methods import BENCH_ENV, TABLES, cleanup
+
+N_EVENTS = 100_000
+PAGE_SIZE = 5000
+METHODS = ["execute_batch", "copy"]
+
+
+def stored_bytes(table: str):
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                f"""
+                select
+                  coalesce(sum(pg_column_size(t.*)), 0) as row_bytes,
+                  coalesce(sum(pg_column_size(t.raw_payload)), 0) as payload_bytes
+                from bronze.{table} t
+                where environment = %s
+                """,
+                (BENCH_ENV,),
+            )
+            row = cur.fetchone()
+            return int(row["row_bytes"]), int(row["payload_bytes"])
+
+
+def main():
+    base_ts = datetime.now(timezone.utc) - timedelta(days=30)
+    print(f"Benchmarking raw_payload modes with {N_EVENTS:,} events per table/method/mode")
+    print(f"{'table':<16} {'method':<14} {'mode':<12} {'rows/sec':>12} {'row MB':>9} {'payload MB':>11}")
+
+    for table, (make_event, insert_fn) in TABLES.items():
+        events = [make_event(i, base_ts + timedelta(seconds=i)) for i in range(N_EVENTS)]
+        for method in METHODS:
+            for mode in PAYLOAD_MODES:
+                cleanup(table)
+                try:
+                    t0 = time.perf_counter()
+                    insert_fn(events, page_size=PAGE_SIZE, method=method, payload_mode=mode)
+                    elapsed = time.perf_counter() - t0
+                    row_bytes, payload_bytes = stored_bytes(table)
+                finally:
+                    cleanup(table)
+                print(
+                    f"{table:<16} {method:<14} {mode:<12} {N_EVENTS / elapsed:>12,.0f} "
+                    f"{row_bytes / 1e6:>9,.1f} {payload_bytes / 1e6:>11,.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
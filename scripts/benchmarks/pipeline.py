@@ -0,0 +1,265 @@
+"""
+End-to-end scale benchmark: seed -> SDV base tables -> bronze loads -> dbt.
+
+Runs every stage as its own process at one or more scale presets (which override
+TARGET_CUSTOMERS / TARGET_USERS / MONTHS_HISTORY through RG_* env vars), and
+records wall time, peak RSS (os.wait4 rusage) and rows/sec per stage. Results are
+written as JSON and compared against a saved baseline when one exists.
+
+    python -m scripts.benchmarks.pipeline --presets 1k 25k --truncate
+    python -m scripts.benchmarks.pipeline --presets 25k --save-baseline
+
+Needs a local Postgres (see scripts/ingest/db.py) and dbt on PATH for the dbt stage.
+--truncate empties the bronze tables before each preset so loads start fresh.
+
+train_and_generate runs with the SDV model cache off (RG_USE_MODEL_CACHE=0), so
+every run includes training; --model-cache times warm, cache-hit runs instead.
+The setting is recorded in the results, and that stage is only compared against
+a baseline taken with the same setting.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+from scripts.ingest import id_cache
+from scripts.ingest.db import get_conn
+from scripts.sdv.base_tables import SCHEMAS, parquet_path, pq, read_base_table
+
+PRESETS = {
+    "1k": {"customers": 1_000, "users": 5_200, "months": 12},
+    "25k": {"customers": 25_000, "users": 130_000, "months": 12},
+    "250k": {"customers": 250_000, "users": 1_300_000, "months": 12},
+    "1m": {"customers": 1_000_000, "users": 5_200_000, "months": 12},
+}
+
+RESULTS_DIR = "scripts/benchmarks/results"
+BASELINE_DIR = "scripts/benchmarks/baselines"
+DBT_DIR = "dbt/revgrowth_analytics"
+BRONZE_TABLES = ("billing_events", "payment_events", "product_events")
+SDV_OUTPUTS = "scripts/sdv/outputs"
+DEFAULT_TOLERANCE = 0.15  # slower than baseline by more than this => regression
+
+
+def _bronze_count(table: str) -> int:
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute(f"select count(*) as n from bronze.{table}")
+            return int(cur.fetchone()["n"])
+
+
+def _base_rows(name: str) -> int:
+    path = parquet_path(name)
+    if pq is not None and os.path.exists(path):
+        return pq.ParquetFile(path).metadata.num_rows
+    return len(read_base_table(name, columns=[next(iter(SCHEMAS[name]))]))
+
+
+def _seed_rows() -> int:
+    with open(f"{SDV_OUTPUTS}/seed_invoices_payments.csv") as f:
+        return max(0, sum(1 for _ in f) - 1)
+
+
+def _sdv_rows() -> int:
+    return sum(_base_rows(n) for n in ("base_customers", "base_users", "base_subscriptions", "base_invoices_payments"))
+
+
+def _bronze_delta(table: str) -> Callable[[], Callable[[], int]]:
+    # count before the stage, report rows added after it
+    def start():
+        before = _bronze_count(table)
+        return lambda: _bronze_count(table) - before
+    return start
+
+
+def _fixed(count: Callable[[], int]) -> Callable[[], Callable[[], int]]:
+    return lambda: count
+
+
+# name -> (argv, cwd, rows counter factory)
+STAGES = {
+    "create_seed_data": ([sys.executable, "-m", "scripts.sdv.create_seed_data"], None, _fixed(_seed_rows)),
+    "train_and_generate": ([sys.executable, "-m", "scripts.sdv.train_and_generate"], None, _fixed(_sdv_rows)),
+    "generate_billing_events": (
+        [sys.executable, "-m", "scripts.generators.generate_billing_events"], None, _bronze_delta("billing_events"),
+    ),
+    "generate_payment_events": (
+        [sys.executable, "-m", "scripts.generators.generate_payment_events"], None, _bronze_delta("payment_events"),
+    ),
+    "generate_product_events": (
+        [sys.executable, "-m", "scripts.generators.generate_product_events"], None, _bronze_delta("product_events"),
+    ),
+    "dbt_run": (
+        ["dbt", "run", "--full-refresh"], DBT_DIR,
+        _fixed(lambda: sum(_bronze_count(t) for t in BRONZE_TABLES)),
+    ),
+}
+
+
+# stages whose timing depends on a warm SDV model cache
+MODEL_CACHE_STAGES = ("train_and_generate",)
+
+
+def preset_env(preset: str, model_cache: bool = False) -> Dict[str, str]:
+    p = PRESETS[preset]
+    env = dict(os.environ)
+    env["RG_TARGET_CUSTOMERS"] = str(p["customers"])
+    env["RG_TARGET_USERS"] = str(p["users"])
+    env["RG_MONTHS_HISTORY"] = str(p["months"])
+    env["RG_USE_MODEL_CACHE"] = "1" if model_cache else "0"
+    return env
+
+
+def truncate_bronze():
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute("truncate " + ", ".join(f"bronze.{t}" for t in BRONZE_TABLES))
+    id_cache.clear(BRONZE_TABLES)
+
+
+def run_stage(name: str, env: Dict[str, str], log_dir: str) -> Dict:
+    """
+    Run one stage to completion; wall time from perf_counter, peak RSS of the
+    stage process from os.wait4 (ru_maxrss is KiB on Linux, bytes on macOS).
+    """
+    argv, cwd, rows_factory = STAGES[name]
+    rows_after = rows_factory()
+
+    log_path = os.path.join(log_dir, f"{name}.log")
+    with open(log_path, "w") as log:
+        t0 = time.perf_counter()
+        proc = subprocess.Popen(argv, cwd=cwd, env=env, stdout=log, stderr=subprocess.STDOUT)
+        _, status, rusage = os.wait4(proc.pid, 0)
+        seconds = time.perf_counter() - t0
+    proc.returncode = os.waitstatus_to_exitcode(status)
+
+    rss_unit = 1 if platform.system() == "Darwin" else 1024
+    result = {
+        "stage": name,
+        "seconds": round(seconds, 3),
+        "peak_rss_mb": round(rusage.ru_maxrss * rss_unit / 1e6, 1),
+        "cpu_seconds": round(rusage.ru_utime + rusage.ru_stime, 3),
+        "exit_code": proc.returncode,
+        "rows": 0,
+        "rows_per_sec": 0.0,
+        "log": log_path,
+    }
+    if proc.returncode == 0:
+        result["rows"] = rows_after()
+        result["rows_per_sec"] = round(result["rows"] / seconds, 1) if seconds else 0.0
+    return result
+
+
+def run_preset(preset: str, stages: List[str], truncate: bool, log_dir: str, model_cache: bool = False) -> Dict:
+    env = preset_env(preset, model_cache)
+    os.makedirs(log_dir, exist_ok=True)
+    if truncate:
+        truncate_bronze()
+
+    results = []
+    for name in stages:
+        print(f"[{preset}] {name} ...", flush=True)
+        r = run_stage(name, env, log_dir)
+        results.append(r)
+        print(f"[{preset}] {name}: {r['seconds']:.1f}s, {r['peak_rss_mb']:,.0f} MB peak, {r['rows_per_sec']:,.0f} rows/sec")
+        if r["exit_code"] != 0:
+            print(f"⚠️ {name} exited with {r['exit_code']}; see {r['log']} (skipping later stages)")
+            break
+    return {"preset": preset, "scale": PRESETS[preset], "model_cache": model_cache, "stages": results}
+
+
+def compare(run: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """
+    Regressions vs baseline: a stage slower or hungrier than baseline * (1 + tolerance).
+    Model-cache stages are skipped when the baseline used another cache setting
+    (baselines from before it was recorded ran with the cache on).
+    """
+    base = {s["stage"]: s for s in baseline.get("stages", [])}
+    if baseline.get("model_cache", True) != run.get("model_cache", False):
+        for name in MODEL_CACHE_STAGES:
+            if base.pop(name, None) is not None:
+                print(f"{name}: baseline model_cache={baseline.get('model_cache', True)}, "
+                      f"this run {run.get('model_cache', False)}; not compared")
+    regressions = []
+    print(f"{'stage':<26} {'seconds':>10} {'baseline':>10} {'Δ%':>7} {'RSS MB':>9} {'baseline':>9}")
+    for s in run["stages"]:
+        b = base.get(s["stage"])
+        if b is None:
+            print(f"{s['stage']:<26} {s['seconds']:>10.1f} {'-':>10} {'-':>7} {s['peak_rss_mb']:>9,.0f} {'-':>9}")
+            continue
+        d = (s["seconds"] / b["seconds"] - 1) * 100 if b["seconds"] else 0.0
+        print(f"{s['stage']:<26} {s['seconds']:>10.1f} {b['seconds']:>10.1f} {d:>+7.1f} {s['peak_rss_mb']:>9,.0f} {b['peak_rss_mb']:>9,.0f}")
+        if s["seconds"] > b["seconds"] * (1 + tolerance):
+            regressions.append(f"{s['stage']}: {s['seconds']:.1f}s vs {b['seconds']:.1f}s baseline")
+        if s["peak_rss_mb"] > b["peak_rss_mb"] * (1 + tolerance):
+            regressions.append(f"{s['stage']}: {s['peak_rss_mb']:,.0f} MB vs {b['peak_rss_mb']:,.0f} MB baseline")
+    return regressions
+
+
+def baseline_path(preset: str) -> str:
+    return os.path.join(BASELINE_DIR, f"pipeline-{preset}.json")
+
+
+def load_baseline(preset: str, path: Optional[str] = None) -> Optional[Dict]:
+    path = path or baseline_path(preset)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the generation-to-mart pipeline at scale presets.")
+    parser.add_argument("--presets", nargs="+", default=["1k"], choices=list(PRESETS))
+    parser.add_argument("--stages", nargs="+", default=list(STAGES), choices=list(STAGES))
+    parser.add_argument("--truncate", action="store_true", help="truncate bronze tables before each preset")
+    parser.add_argument("--baseline", default=None, help="baseline JSON to compare against (default: per-preset file)")
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the preset's baseline")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--model-cache", action="store_true",
+                        help="let train_and_generate load cached SDV models (default: always train)")
+    args = parser.parse_args()
+
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    failed = False
+
+    for preset in args.presets:
+        run = run_preset(
+            preset, args.stages, args.truncate, os.path.join(RESULTS_DIR, f"logs-{stamp}-{preset}"), args.model_cache,
+        )
+        run["started_at"] = stamp
+        run["host"] = {"python": platform.python_version(), "machine": platform.machine(), "cpus": os.cpu_count()}
+
+        out = os.path.join(RESULTS_DIR, f"pipeline-{preset}-{stamp}.json")
+        with open(out, "w") as f:
+            json.dump(run, f, indent=2)
+        print(f"✅ Results written to {out}")
+
+        baseline = load_baseline(preset, args.baseline)
+        if baseline:
+            regressions = compare(run, baseline, args.tolerance)
+            for r in regressions:
+                print(f"⚠️ regression: {r}")
+            failed = failed or bool(regressions)
+        else:
+            print(f"No baseline for {preset} yet (save one with --save-baseline)")
+
+        if args.save_baseline:
+            os.makedirs(BASELINE_DIR, exist_ok=True)
+            with open(baseline_path(preset), "w") as f:
+                json.dump(run, f, indent=2)
+            print(f"Baseline saved to {baseline_path(preset)}")
+
+        failed = failed or any(s["exit_code"] != 0 for s in run["stages"])
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
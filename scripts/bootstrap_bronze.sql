@@ -1,9 +1,15 @@
 create schema if not exists bronze;
+
+-- The primary key (event_id, event_ts) is the inserters' conflict target
+-- (ON CONFLICT (event_id, event_ts)), the same key as the month-partitioned tables
+-- from scripts/ingest/bootstrap.py. Tables created with the older event_id-only
+-- key are converted by that script.
+
 -- ================
 -- Product events
 -- ================
 create table if not exists bronze.product_events (
-  event_id         text primary key,
+  event_id         text not null,
   event_ts         timestamptz not null,
   ingested_ts      timestamptz not null default now(),
   event_name       text not null,
@@ -22,14 +28,15 @@ create table if not exists bronze.product_events (
   device           text null,
   country          text null,
 
-  raw_payload      jsonb null
+  raw_payload      jsonb null,
+  primary key (event_id, event_ts)
 );
 
 -- ================
 -- Billing/subscription events
 -- ================
 create table if not exists bronze.billing_events (
-  event_id         text primary key,
+  event_id         text not null,
   event_ts         timestamptz not null,
   ingested_ts      timestamptz not null default now(),
   event_name       text not null,
@@ -49,14 +56,15 @@ create table if not exists bronze.billing_events (
 
   amount_usd       numeric(12,2) null,
 
-  raw_payload      jsonb null
+  raw_payload      jsonb null,
+  primary key (event_id, event_ts)
 );
 
 -- ================
 -- Payment events (gateway)
 -- ================
 create table if not exists bronze.payment_events (
-  event_id         text primary key,
+  event_id         text not null,
   event_ts         timestamptz not null,
   ingested_ts      timestamptz not null default now(),
   event_name       text not null,
@@ -75,7 +83,8 @@ create table if not exists bronze.payment_events (
   status           text null,
   failure_reason   text null,
 
-  raw_payload      jsonb null
+  raw_payload      jsonb null,
+  primary key (event_id, event_ts)
 );
 
 -- Helpful indexes for validation & incremental loads
@@ -83,3 +92,6 @@ create index if not exists idx_product_events_event_ts on bronze.product_events(
 create index if not exists idx_billing_events_event_ts on bronze.billing_events(event_ts);
 create index if not exists idx_payment_events_event_ts on bronze.payment_events(event_ts);
 create index if not exists idx_payment_events_invoice_id on bronze.payment_events(invoice_id);
+create index if not exists idx_product_events_ingested_ts on bronze.product_events using brin (ingested_ts);
+create index if not exists idx_billing_events_ingested_ts on bronze.billing_events using brin (ingested_ts);
+create index if not exists idx_payment_events_ingested_ts on bronze.payment_events using brin (ingested_ts);
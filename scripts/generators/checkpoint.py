@@ -0,0 +1,113 @@
+"""
+Checkpoints for chunked generator runs.
+
+A generator that reads a base table in fixed-size chunks commits each chunk's
+events, then records the number of source rows done in a small JSON file. With
+--resume it reads the base table from that offset, so an interrupted run loses
+at most the chunk that was in flight.
+
+Each chunk draws from its own RNG (chunk_rng), so chunk k produces the same
+events whether or not chunks 0..k-1 ran in this process. Events of a chunk that
+was partly committed before a crash keep their natural event ids when it is
+redone, so ON CONFLICT drops the rows that already landed.
+"""
+import json
+import os
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from scripts.sdv.base_tables import base_table_path
+
+CHECKPOINT_DIR = "scripts/generators/checkpoints"
+
+
+def chunk_rng(seed: Optional[int], chunk: int) -> np.random.Generator:
+    """
+    Independent RNG stream for one chunk; seed None draws fresh entropy (not resumable).
+    """
+    return np.random.default_rng([seed, chunk] if seed is not None else None)
+
+
+def source_fingerprint(name: str) -> Dict[str, Any]:
+    """
+    Identifies the base table file a run reads, so a checkpoint is not resumed
+    against regenerated base tables.
+    """
+    path = base_table_path(name)
+    st = os.stat(path)
+    return {"path": path, "bytes": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+class Checkpoint:
+    """
+    Progress of one generator: chunks and source rows committed, events sent.
+    params (source fingerprint, chunk size, seed, ...) must match to resume.
+    """
+
+    def __init__(self, name: str, params: Dict[str, Any]):
+        self.name = name
+        self.params = params
+        self.path = os.path.join(CHECKPOINT_DIR, f"{name}.json")
+        self.chunks = 0
+        self.offset = 0
+        self.events = 0
+        self.complete = False
+
+    def load(self) -> bool:
+        """
+        Restore saved progress. Returns False when there is nothing to resume;
+        raises ValueError if the saved run used different params.
+        """
+        if not os.path.exists(self.path):
+            return False
+        with open(self.path) as f:
+            state = json.load(f)
+        if state["params"] != json.loads(json.dumps(self.params)):
+            raise ValueError(
+                f"checkpoint {self.path} was written with different params "
+                f"({state['params']} vs {self.params}); rerun without --resume to start over"
+            )
+        self.chunks = state["chunks"]
+        self.offset = state["offset"]
+        self.events = state["events"]
+        self.complete = state["complete"]
+        return True
+
+    def reset(self) -> None:
+        self.chunks = self.offset = self.events = 0
+        self.complete = False
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def commit(self, rows: int, events: int) -> None:
+        """
+        Record one more chunk of `rows` source rows whose `events` are committed.
+        """
+        self.chunks += 1
+        self.offset += rows
+        self.events += events
+        self._save()
+
+    def finish(self) -> None:
+        self.complete = True
+        self._save()
+
+    def _save(self) -> None:
+        os.makedirs(CHECKPOINT_DIR, exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({
+                "name": self.name,
+                "params": self.params,
+                "chunks": self.chunks,
+                "offset": self.offset,
+                "events": self.events,
+                "complete": self.complete,
+                "updated_at": datetime.now(timezone.utc).isoformat(),
+            }, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        # atomic on POSIX: a crash leaves either the old or the new checkpoint
+        os.replace(tmp, self.path)
@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+
+# Helpers for building event rows column-wise from a DataFrame
+
+
+def random_hex_ids(prefix: str, n: int, width: int, rng: np.random.Generator) -> list:
+    """
+    n ids like PAY-<width hex chars>, drawn from rng (width must be even).
+    """
+    h = rng.integers(0, 256, size=n * width // 2, dtype=np.uint8).tobytes().hex()
+    return [f"{prefix}{h[i:i+width]}" for i in range(0, n * width, width)]
+
+
+def parse_utc_dates(dates: pd.Series) -> np.ndarray:
+    """
+    Whole date column -> datetime64[ns] (UTC). Accepts typed dates from Parquet
+    or YYYY-MM-DD strings from CSV.
+    """
+    if pd.api.types.is_datetime64_any_dtype(dates):
+        ts = pd.to_datetime(dates)
+        if ts.dt.tz is not None:
+            ts = ts.dt.tz_convert("UTC").dt.tz_localize(None)
+    else:
+        ts = pd.to_datetime(dates.astype(str), utc=True).dt.tz_localize(None)
+    return ts.to_numpy(dtype="datetime64[ns]")
+
+
+def date_strings(dates: pd.Series) -> list:
+    # YYYY-MM-DD strings for payloads, whatever the column dtype
+    if pd.api.types.is_datetime64_any_dtype(dates):
+        return dates.dt.strftime("%Y-%m-%d").tolist()
+    return dates.astype(str).tolist()
+
+
+def to_pydatetimes(ts: np.ndarray) -> list:
+    # datetime64[ns] (UTC) -> tz-aware datetime objects for the inserters
+    return list(pd.DatetimeIndex(ts, tz="UTC").to_pydatetime())
+
+
+def nullable(col) -> list:
+    # NaN/None -> None, numpy scalars -> Python scalars
+    col = pd.Series(col)
+    return col.astype(object).where(col.notna(), None).tolist()
+
+
+def column(df: pd.DataFrame, name: str, default=None) -> pd.Series:
+    # Optional columns (row.get(name, default) in the row-wise version)
+    if name in df.columns:
+        return df[name]
+    return pd.Series([default] * len(df), index=df.index, dtype=object)
+
+
+def records(columns: dict) -> list:
+    keys = list(columns)
+    return [dict(zip(keys, values)) for values in zip(*columns.values())]
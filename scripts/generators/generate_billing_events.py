@@ -1,13 +1,21 @@
-import uuid
-from datetime import datetime, timezone
+import time
 import pandas as pd
 
+from scripts.ingest.event_ids import make_event_ids, natural_keys
 from scripts.ingest.insert_billing_events_batch import insert_billing_events_batch
+from scripts.ingest.metrics import print_report as print_ingest_metrics
+from scripts.sdv.base_tables import read_base_table
 
-BASE_DIR = "scripts/sdv/outputs"
-CUSTOMERS_CSV = f"{BASE_DIR}/base_customers.csv"
-SUBS_CSV = f"{BASE_DIR}/base_subscriptions.csv"
-INVPAY_CSV = f"{BASE_DIR}/base_invoices_payments.csv"
+from .columnar import column, date_strings, nullable, parse_utc_dates, records, to_pydatetimes
+
+# Columns read from the base tables (see scripts/sdv/base_tables.py)
+CUSTOMER_COLUMNS = ["customer_id", "channel", "country"]
+SUB_COLUMNS = ["subscription_id", "customer_id", "plan_id", "start_date"]
+INVOICE_COLUMNS = [
+    "invoice_id", "subscription_id", "customer_id", "invoice_date", "amount_usd",
+    "plan_id", "channel", "country", "attempts", "final_status", "failure_reason",
+    "refund_flag", "chargeback_flag",
+]
 
 EVENT_VERSION = 1
 SOURCE_SYSTEM = "billing_system"
@@ -21,127 +29,146 @@ RUN_INVOICES = True
 SUB_BATCH_SIZE = 2000
 INV_BATCH_SIZE = 5000
 
-
-def make_event_id() -> str:
-    return str(uuid.uuid4())
+# "copy" (COPY FROM STDIN) or "execute_batch" (row-by-row INSERT)
+LOAD_METHOD = "copy"
 
 
 def generate_subscription_created_events(subs_df: pd.DataFrame, customers_df: pd.DataFrame):
     """
-    Emits one subscription_created per subscription.
+    Emits one subscription_created per subscription (built column-wise).
     """
-    cust_seg = customers_df.set_index("customer_id")[["plan_id", "channel", "country"]].to_dict(orient="index")
-
-    events = []
-    for _, s in subs_df.iterrows():
-        cid = s["customer_id"]
-        seg = cust_seg.get(cid, {})
-
-        event_ts = datetime.fromisoformat(str(s["start_date"])).replace(tzinfo=timezone.utc)
-
-        payload = {
-            "subscription_id": s["subscription_id"],
-            "customer_id": cid,
-            "plan_id": s["plan_id"],
-            "start_date": str(s["start_date"]),
-            "channel": seg.get("channel"),
-            "country": seg.get("country"),
-        }
-
-        events.append({
-            "event_id": make_event_id(),
-            "event_ts": event_ts,
-            "event_name": "subscription_created",
-            "event_version": EVENT_VERSION,
-            "source_system": SOURCE_SYSTEM,
-            "environment": ENVIRONMENT,
-
-            "customer_id": cid,
-            "user_id": None,
-
-            "subscription_id": s["subscription_id"],
-            "invoice_id": None,
-
-            "plan_id": s["plan_id"],
-            "old_plan_id": None,
-            "new_plan_id": None,
-
-            "amount_usd": None,
-            "raw_payload": payload,
-        })
-
-    return events
+    n = len(subs_df)
+    if n == 0:
+        return []
+
+    seg = (
+        customers_df.set_index("customer_id")[["channel", "country"]]
+        .reindex(subs_df["customer_id"])
+        .reset_index(drop=True)
+    )
+    subscription_id = subs_df["subscription_id"].tolist()
+    customer_id = subs_df["customer_id"].tolist()
+    plan_id = nullable(subs_df["plan_id"])
+    start_date = date_strings(subs_df["start_date"])
+    event_ts = parse_utc_dates(subs_df["start_date"])
+
+    payloads = records({
+        "subscription_id": subscription_id,
+        "customer_id": customer_id,
+        "plan_id": plan_id,
+        "start_date": start_date,
+        "channel": nullable(seg["channel"]),
+        "country": nullable(seg["country"]),
+    })
+
+    return records({
+        "event_id": make_event_ids(event_ts, keys=natural_keys(subscription_id, ["subscription_created"] * n)),
+        "event_ts": to_pydatetimes(event_ts),
+        "event_name": ["subscription_created"] * n,
+        "event_version": [EVENT_VERSION] * n,
+        "source_system": [SOURCE_SYSTEM] * n,
+        "environment": [ENVIRONMENT] * n,
+
+        "customer_id": customer_id,
+        "user_id": [None] * n,
+
+        "subscription_id": subscription_id,
+        "invoice_id": [None] * n,
+
+        "plan_id": plan_id,
+        "old_plan_id": [None] * n,
+        "new_plan_id": [None] * n,
+
+        "amount_usd": [None] * n,
+        "raw_payload": payloads,
+    })
 
 
 def generate_invoice_created_events(invpay_df: pd.DataFrame):
     """
-    Emits one invoice_created per invoice row.
+    Emits one invoice_created per invoice row (built column-wise).
     """
-    events = []
-    for _, r in invpay_df.iterrows():
-        event_ts = datetime.fromisoformat(str(r["invoice_date"])).replace(tzinfo=timezone.utc)
-
-        payload = {
-            "invoice_id": r["invoice_id"],
-            "subscription_id": r["subscription_id"],
-            "customer_id": r["customer_id"],
-            "invoice_date": str(r["invoice_date"]),
-            "amount_usd": float(r["amount_usd"]),
-            "plan_id": r.get("plan_id"),
-            "channel": r.get("channel"),
-            "country": r.get("country"),
-            "attempts": int(r.get("attempts", 1)),
-            "final_status": None if pd.isna(r.get("final_status")) else r.get("final_status"),
-            "failure_reason": None if pd.isna(r.get("failure_reason")) else r.get("failure_reason"),
-            "refund_flag": int(r.get("refund_flag", 0)),
-            "chargeback_flag": int(r.get("chargeback_flag", 0)),
-        }
-
-        events.append({
-            "event_id": make_event_id(),
-            "event_ts": event_ts,
-            "event_name": "invoice_created",
-            "event_version": EVENT_VERSION,
-            "source_system": SOURCE_SYSTEM,
-            "environment": ENVIRONMENT,
-
-            "customer_id": r["customer_id"],
-            "user_id": None,
-
-            "subscription_id": r["subscription_id"],
-            "invoice_id": r["invoice_id"],
-
-            "plan_id": r.get("plan_id"),
-            "old_plan_id": None,
-            "new_plan_id": None,
-
-            "amount_usd": float(r["amount_usd"]),
-            "raw_payload": payload,
-        })
-
-    return events
+    n = len(invpay_df)
+    if n == 0:
+        return []
+
+    invoice_id = invpay_df["invoice_id"].tolist()
+    subscription_id = invpay_df["subscription_id"].tolist()
+    customer_id = invpay_df["customer_id"].tolist()
+    amount_usd = invpay_df["amount_usd"].astype(float).tolist()
+    plan_id = nullable(column(invpay_df, "plan_id"))
+    event_ts = parse_utc_dates(invpay_df["invoice_date"])
+
+    payloads = records({
+        "invoice_id": invoice_id,
+        "subscription_id": subscription_id,
+        "customer_id": customer_id,
+        "invoice_date": date_strings(invpay_df["invoice_date"]),
+        "amount_usd": amount_usd,
+        "plan_id": plan_id,
+        "channel": nullable(column(invpay_df, "channel")),
+        "country": nullable(column(invpay_df, "country")),
+        "attempts": column(invpay_df, "attempts", 1).astype(int).tolist(),
+        "final_status": nullable(column(invpay_df, "final_status")),
+        "failure_reason": nullable(column(invpay_df, "failure_reason")),
+        "refund_flag": column(invpay_df, "refund_flag", 0).astype(int).tolist(),
+        "chargeback_flag": column(invpay_df, "chargeback_flag", 0).astype(int).tolist(),
+    })
+
+    return records({
+        "event_id": make_event_ids(event_ts, keys=natural_keys(invoice_id, ["invoice_created"] * n)),
+        "event_ts": to_pydatetimes(event_ts),
+        "event_name": ["invoice_created"] * n,
+        "event_version": [EVENT_VERSION] * n,
+        "source_system": [SOURCE_SYSTEM] * n,
+        "environment": [ENVIRONMENT] * n,
+
+        "customer_id": customer_id,
+        "user_id": [None] * n,
+
+        "subscription_id": subscription_id,
+        "invoice_id": invoice_id,
+
+        "plan_id": plan_id,
+        "old_plan_id": [None] * n,
+        "new_plan_id": [None] * n,
+
+        "amount_usd": amount_usd,
+        "raw_payload": payloads,
+    })
+
+
+def load_base_tables():
+    return (
+        read_base_table("base_customers", columns=CUSTOMER_COLUMNS),
+        read_base_table("base_subscriptions", columns=SUB_COLUMNS),
+        read_base_table("base_invoices_payments", columns=INVOICE_COLUMNS),
+    )
 
 
 def main():
     print("Loading base tables...")
-    customers = pd.read_csv(CUSTOMERS_CSV)
-    subs = pd.read_csv(SUBS_CSV)
-    invpay = pd.read_csv(INVPAY_CSV)
+    customers, subs, invpay = load_base_tables()
 
     if RUN_SUBSCRIPTIONS:
         print("Generating subscription_created events...")
         sub_events = generate_subscription_created_events(subs, customers)
         print(f"Inserting subscription_created (batch): {len(sub_events):,}")
-        insert_billing_events_batch(sub_events, page_size=SUB_BATCH_SIZE)
-        print("✅ subscription_created batch done")
+        t0 = time.perf_counter()
+        insert_billing_events_batch(sub_events, page_size=SUB_BATCH_SIZE, method=LOAD_METHOD)
+        elapsed = time.perf_counter() - t0
+        print(f"✅ subscription_created batch done in {elapsed:.1f}s ({len(sub_events) / max(elapsed, 1e-9):,.0f} rows/sec via {LOAD_METHOD})")
 
     if RUN_INVOICES:
         print("Generating invoice_created events...")
         inv_events = generate_invoice_created_events(invpay)
         print(f"Inserting invoice_created (batch): {len(inv_events):,}")
-        insert_billing_events_batch(inv_events, page_size=INV_BATCH_SIZE)
-        print("✅ invoice_created batch done")
+        t0 = time.perf_counter()
+        insert_billing_events_batch(inv_events, page_size=INV_BATCH_SIZE, method=LOAD_METHOD)
+        elapsed = time.perf_counter() - t0
+        print(f"✅ invoice_created batch done in {elapsed:.1f}s ({len(inv_events) / max(elapsed, 1e-9):,.0f} rows/sec via {LOAD_METHOD})")
 
+    print_ingest_metrics()
     print("✅ Billing generator finished. Verify counts in Postgres.")
 
 
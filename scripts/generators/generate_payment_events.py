@@ -1,140 +1,188 @@
-import uuid
-import random
-from datetime import datetime, timezone, timedelta
+import argparse
+import time
+import numpy as np
 import pandas as pd
 
+from scripts.ingest.event_ids import make_event_ids, natural_keys
 from scripts.ingest.insert_payment_events_batch import insert_payment_events_batch
+from scripts.ingest.metrics import print_report as print_ingest_metrics
+from scripts.sdv.base_tables import iter_base_table
 
-BASE_DIR = "scripts/sdv/outputs"
-INVPAY_CSV = f"{BASE_DIR}/base_invoices_payments.csv"
+from .checkpoint import Checkpoint, chunk_rng, source_fingerprint
+from .columnar import (
+    column, nullable, parse_utc_dates, random_hex_ids, records, to_pydatetimes,
+)
+
+# Columns read from base_invoices_payments (see scripts/sdv/base_tables.py)
+INVOICE_COLUMNS = ["invoice_id", "customer_id", "invoice_date", "amount_usd", "attempts", "final_status", "failure_reason"]
 
 EVENT_VERSION = 1
 SOURCE_SYSTEM = "payment_gateway"
 ENVIRONMENT = "prod"
 
 BATCH_SIZE = 5000
-
-def make_event_id() -> str:
-    return str(uuid.uuid4())
-
-def to_ts(date_str: str) -> datetime:
-    # invoice_date is YYYY-MM-DD; convert to UTC timestamp
-    return datetime.fromisoformat(str(date_str)).replace(tzinfo=timezone.utc)
+# Invoices read per chunk; events are generated and loaded chunk by chunk
+READ_CHUNK_SIZE = 25_000
+
+# "copy" (COPY FROM STDIN) or "execute_batch" (row-by-row INSERT)
+LOAD_METHOD = "copy"
+
+RETRY_REASONS = ["insufficient_funds", "card_declined", "network_error"]
+
+# Seed for attempt-level failure reasons; None draws fresh entropy each run
+RNG_SEED = 42
+
+HOURS_BETWEEN_ATTEMPTS = 2
+
+def build_payment_events(inv: pd.DataFrame, rng: np.random.Generator) -> list:
+    """
+    Expands invoices into payment_attempted events plus one terminal event
+    (payment_succeeded / payment_failed) per invoice, using array operations.
+
+    Attempt a of an invoice happens HOURS_BETWEEN_ATTEMPTS * a after the invoice
+    date; the terminal event shares the last attempt's timestamp. If the invoice
+    failed, every attempt failed with its reason; if it succeeded after retries,
+    earlier attempts failed with its reason or a random retry reason.
+    """
+    n = len(inv)
+    if n == 0:
+        return []
+
+    attempts = column(inv, "attempts", 1).astype(int).to_numpy()
+    final_status = column(inv, "final_status", "succeeded").astype(str).str.lower().to_numpy(dtype=object)
+    reason = np.array(nullable(inv["failure_reason"]), dtype=object)
+    invoice_id = inv["invoice_id"].to_numpy(dtype=object)
+    customer_id = inv["customer_id"].to_numpy(dtype=object)
+    amount = inv["amount_usd"].astype(float).to_numpy()
+    base_ts = parse_utc_dates(inv["invoice_date"])
+    payment_id = np.array(random_hex_ids("PAY-", n, 12, rng), dtype=object)
+    failed = final_status == "failed"
+
+    # Attempt rows: repeat each invoice `attempts` times, number them 1..attempts
+    idx = np.repeat(np.arange(n), np.maximum(attempts, 0))
+    starts = np.cumsum(attempts) - attempts
+    attempt_no = np.arange(len(idx)) - np.repeat(starts, np.maximum(attempts, 0)) + 1
+
+    retried = ~failed[idx] & (attempts[idx] > 1) & (attempt_no < attempts[idx])
+    attempt_status = np.where(failed[idx] | retried, "failed", "succeeded").astype(object)
+    attempt_reason = np.full(len(idx), None, dtype=object)
+    attempt_reason[failed[idx]] = reason[idx][failed[idx]]
+    fill = np.array(RETRY_REASONS, dtype=object)[rng.integers(0, len(RETRY_REASONS), size=len(idx))]
+    retried_reason = np.where(pd.isna(reason[idx]), fill, reason[idx])
+    attempt_reason[retried] = retried_reason[retried]
+
+    attempt_ts = base_ts[idx] + (HOURS_BETWEEN_ATTEMPTS * attempt_no).astype("timedelta64[h]")
+    terminal_ts = base_ts + (HOURS_BETWEEN_ATTEMPTS * attempts).astype("timedelta64[h]")
+
+    terminal_name = np.where(final_status == "succeeded", "payment_succeeded", "payment_failed").astype(object)
+    terminal_reason = np.where(failed, reason, None)
+
+    n_att = len(idx)
+    attempt_events = records({
+        "event_id": make_event_ids(
+            attempt_ts, keys=natural_keys(invoice_id[idx], ["payment_attempted"] * n_att, attempt_no),
+        ),
+        "event_ts": to_pydatetimes(attempt_ts),
+        "event_name": ["payment_attempted"] * n_att,
+        "event_version": [EVENT_VERSION] * n_att,
+        "source_system": [SOURCE_SYSTEM] * n_att,
+        "environment": [ENVIRONMENT] * n_att,
+
+        "customer_id": customer_id[idx].tolist(),
+        "user_id": [None] * n_att,
+
+        "invoice_id": invoice_id[idx].tolist(),
+        "payment_id": payment_id[idx].tolist(),
+        "attempt_number": attempt_no.tolist(),
+
+        "amount_usd": amount[idx].tolist(),
+        "status": attempt_status.tolist(),
+        "failure_reason": attempt_reason.tolist(),
+        "raw_payload": records({
+            "invoice_id": invoice_id[idx].tolist(),
+            "payment_id": payment_id[idx].tolist(),
+            "attempt_number": attempt_no.tolist(),
+            "amount_usd": amount[idx].tolist(),
+            "attempt_status": attempt_status.tolist(),
+            "failure_reason": attempt_reason.tolist(),
+        }),
+    })
+
+    terminal_events = records({
+        "event_id": make_event_ids(terminal_ts, keys=natural_keys(invoice_id, terminal_name, attempts)),
+        "event_ts": to_pydatetimes(terminal_ts),
+        "event_name": terminal_name.tolist(),
+        "event_version": [EVENT_VERSION] * n,
+        "source_system": [SOURCE_SYSTEM] * n,
+        "environment": [ENVIRONMENT] * n,
+
+        "customer_id": customer_id.tolist(),
+        "user_id": [None] * n,
+
+        "invoice_id": invoice_id.tolist(),
+        "payment_id": payment_id.tolist(),
+        "attempt_number": attempts.tolist(),
+
+        "amount_usd": amount.tolist(),
+        "status": final_status.tolist(),
+        "failure_reason": terminal_reason.tolist(),
+        "raw_payload": records({
+            "invoice_id": invoice_id.tolist(),
+            "payment_id": payment_id.tolist(),
+            "attempts": attempts.tolist(),
+            "final_status": final_status.tolist(),
+            "failure_reason": terminal_reason.tolist(),
+            "amount_usd": amount.tolist(),
+        }),
+    })
+
+    # Per invoice: its attempts in order, then its terminal event
+    order = np.argsort(np.concatenate([idx, np.arange(n)]), kind="stable")
+    events = attempt_events + terminal_events
+    return [events[i] for i in order]
+
+def iter_payment_events(inv: pd.DataFrame, rng: np.random.Generator = None):
+    """
+    Yields payment_attempted events plus one terminal event per invoice row.
+    """
+    yield from build_payment_events(inv, rng if rng is not None else np.random.default_rng())
+
+def iter_invoice_chunks(chunk_size: int = READ_CHUNK_SIZE, offset: int = 0):
+    return iter_base_table("base_invoices_payments", columns=INVOICE_COLUMNS, chunk_size=chunk_size, offset=offset)
 
 def main():
-    print("Loading base_invoices_payments...")
-    inv = pd.read_csv(INVPAY_CSV)
-
-    events = []
-    total_invoices = len(inv)
-
-    print(f"Generating payment events for invoices: {total_invoices:,}")
-
-    for i, r in inv.iterrows():
-        invoice_id = r["invoice_id"]
-        customer_id = r["customer_id"]
-        amount = float(r["amount_usd"])
-        attempts = int(r.get("attempts", 1))
-        final_status = str(r.get("final_status", "succeeded")).lower()
-        failure_reason = None if pd.isna(r.get("failure_reason")) else r.get("failure_reason")
-
-        # base event timestamp: invoice date; attempts spread across a few days
-        base_ts = to_ts(r["invoice_date"])
-
-        payment_id = f"PAY-{uuid.uuid4().hex[:12]}"
-
-        # Attempt events
-        for a in range(1, attempts + 1):
-            attempt_ts = base_ts + timedelta(hours=2 * a)  # simple spacing
-
-            # Attempt-level status:
-            # - if final succeeded: earlier attempts may fail if attempts > 1
-            # - if final failed: all attempts fail
-            if final_status == "failed":
-                attempt_status = "failed"
-                attempt_reason = failure_reason
-            else:
-                if attempts > 1 and a < attempts:
-                    attempt_status = "failed"
-                    attempt_reason = failure_reason or random.choice(
-                        ["insufficient_funds", "card_declined", "network_error"]
-                    )
-                else:
-                    attempt_status = "succeeded"
-                    attempt_reason = None
-
-            payload = {
-                "invoice_id": invoice_id,
-                "payment_id": payment_id,
-                "attempt_number": a,
-                "amount_usd": amount,
-                "attempt_status": attempt_status,
-                "failure_reason": attempt_reason,
-            }
-
-            events.append({
-                "event_id": make_event_id(),
-                "event_ts": attempt_ts,
-                "event_name": "payment_attempted",
-                "event_version": EVENT_VERSION,
-                "source_system": SOURCE_SYSTEM,
-                "environment": ENVIRONMENT,
-
-                "customer_id": customer_id,
-                "user_id": None,
-
-                "invoice_id": invoice_id,
-                "payment_id": payment_id,
-                "attempt_number": a,
-
-                "amount_usd": amount,
-                "status": attempt_status,
-                "failure_reason": attempt_reason,
-                "raw_payload": payload,
-            })
-
-        # Terminal event (succeeded or failed) at last attempt time
-        terminal_ts = base_ts + timedelta(hours=2 * attempts)
-        terminal_name = "payment_succeeded" if final_status == "succeeded" else "payment_failed"
-
-        terminal_payload = {
-            "invoice_id": invoice_id,
-            "payment_id": payment_id,
-            "attempts": attempts,
-            "final_status": final_status,
-            "failure_reason": failure_reason if final_status == "failed" else None,
-            "amount_usd": amount,
-        }
-
-        events.append({
-            "event_id": make_event_id(),
-            "event_ts": terminal_ts,
-            "event_name": terminal_name,
-            "event_version": EVENT_VERSION,
-            "source_system": SOURCE_SYSTEM,
-            "environment": ENVIRONMENT,
-
-            "customer_id": customer_id,
-            "user_id": None,
-
-            "invoice_id": invoice_id,
-            "payment_id": payment_id,
-            "attempt_number": attempts,
-
-            "amount_usd": amount,
-            "status": final_status,
-            "failure_reason": failure_reason if final_status == "failed" else None,
-            "raw_payload": terminal_payload,
-        })
-
-        # light progress every 25k invoices
-        if (i + 1) % 25000 == 0:
-            print(f"...processed {i+1:,}/{total_invoices:,} invoices")
-
-    print(f"Inserting payment events (batch): {len(events):,}")
-    insert_payment_events_batch(events, page_size=BATCH_SIZE)
-    print("✅ payment events batch done")
-
+    parser = argparse.ArgumentParser(description="Generate payment events from base_invoices_payments into bronze.")
+    parser.add_argument("--resume", action="store_true",
+                        help="continue after the last checkpointed invoice chunk of an interrupted run")
+    args = parser.parse_args()
+
+    ckpt = Checkpoint("payment_events", {
+        "source": source_fingerprint("base_invoices_payments"), "chunk_size": READ_CHUNK_SIZE, "seed": RNG_SEED,
+    })
+    if args.resume and ckpt.load():
+        if ckpt.complete:
+            print(f"✅ Checkpoint {ckpt.path} says this run already finished ({ckpt.events:,} events); nothing to do.")
+            return
+        print(f"Resuming after {ckpt.offset:,} invoices ({ckpt.chunks} chunks, {ckpt.events:,} events committed)")
+    else:
+        ckpt.reset()
+
+    print(f"Streaming base_invoices_payments in chunks of {READ_CHUNK_SIZE:,} invoices...")
+    t0 = time.perf_counter()
+    n_events = 0
+    for inv in iter_invoice_chunks(READ_CHUNK_SIZE, offset=ckpt.offset):
+        # one load per chunk: the checkpoint only moves once all of its events are committed
+        n = insert_payment_events_batch(
+            iter_payment_events(inv, chunk_rng(RNG_SEED, ckpt.chunks)), page_size=BATCH_SIZE, method=LOAD_METHOD,
+        )
+        ckpt.commit(len(inv), n)
+        n_events += n
+        print(f"...committed {ckpt.offset:,} invoices ({ckpt.events:,} events)")
+    ckpt.finish()
+    elapsed = time.perf_counter() - t0
+    print(f"✅ payment events batch done: {n_events:,} rows in {elapsed:.1f}s ({n_events / max(elapsed, 1e-9):,.0f} rows/sec via {LOAD_METHOD})")
+
+    print_ingest_metrics()
     print("✅ Finished. Verify counts in Postgres.")
 
 if __name__ == "__main__":
@@ -1,142 +1,199 @@
-import uuid
-import random
-from datetime import datetime, timezone, timedelta
+import argparse
+import time
+import numpy as np
 import pandas as pd
 
+from scripts.ingest.event_ids import make_event_ids, natural_keys
 from scripts.ingest.insert_product_events_batch import insert_product_events_batch
+from scripts.ingest.metrics import print_report as print_ingest_metrics
+from scripts.sdv.base_tables import iter_base_table, read_base_table
+
+from .checkpoint import Checkpoint, chunk_rng, source_fingerprint
+from .columnar import nullable, parse_utc_dates, random_hex_ids, records, to_pydatetimes
 
-BASE_DIR = "scripts/sdv/outputs"
-CUSTOMERS_CSV = f"{BASE_DIR}/base_customers.csv"
-USERS_CSV = f"{BASE_DIR}/base_users.csv"
 
 EVENT_VERSION = 1
 SOURCE_SYSTEM = "product_app"
 ENVIRONMENT = "prod"
 
 BATCH_SIZE = 5000
+# Users read per chunk; events are generated and loaded chunk by chunk
+READ_CHUNK_SIZE = 25_000
 
-FEATURES = ["dashboard", "reports", "exports", "integrations", "settings"]
+# "copy" (COPY FROM STDIN) or "execute_batch" (row-by-row INSERT)
+LOAD_METHOD = "copy"
 
-def make_event_id():
-    return str(uuid.uuid4())
+FEATURES = ["dashboard", "reports", "exports", "integrations", "settings"]
 
-def to_ts(date_str: str, offset_days: int = 0):
-    return datetime.fromisoformat(str(date_str)).replace(
-        tzinfo=timezone.utc
-    ) + timedelta(days=offset_days)
+# Seed for the engagement simulation; None draws fresh entropy each run
+RNG_SEED = 42
+
+CUSTOMER_COLUMNS = ["signup_date", "engagement_score", "churn_propensity", "channel", "device_preference", "country"]
+
+def _product_rows(uidx: np.ndarray, users: dict, cust: dict, columns: dict) -> list:
+    # columns holds the per-event fields (event_ts as datetime64, natural_key for the
+    # event id); the rest is taken from the user/customer at uidx
+    n = len(uidx)
+    return records({
+        "event_id": make_event_ids(columns["event_ts"], keys=columns["natural_key"]),
+        "event_ts": to_pydatetimes(columns["event_ts"]),
+        "event_name": columns["event_name"],
+        "event_version": [EVENT_VERSION] * n,
+        "source_system": [SOURCE_SYSTEM] * n,
+        "environment": [ENVIRONMENT] * n,
+
+        "customer_id": users["customer_id"][uidx].tolist(),
+        "user_id": users["user_id"][uidx].tolist(),
+        "session_id": columns["session_id"],
+
+        "feature_name": columns["feature_name"],
+        "feature_action": columns["feature_action"],
+
+        "channel": cust["channel"][uidx].tolist(),
+        "device": cust["device_preference"][uidx].tolist(),
+        "country": cust["country"][uidx].tolist(),
+
+        "raw_payload": columns["raw_payload"],
+    })
+
+def build_product_events(users: pd.DataFrame, customers: pd.DataFrame, rng: np.random.Generator) -> list:
+    """
+    Simulates sessions, feature usage and cancel intent for a chunk of users
+    with array draws, then emits the event rows in bulk.
+
+    Per user: max(2, N(engagement/6, 2)) sessions within 300 days of signup,
+    1..max(1, engagement/20) feature_used events per session within 45 minutes,
+    and a cancel_intent with probability churn_propensity when it exceeds 0.55.
+    """
+    n = len(users)
+    if n == 0:
+        return []
+
+    seg = customers.set_index("customer_id")[CUSTOMER_COLUMNS].reindex(users["customer_id"])
+    u = {
+        "customer_id": users["customer_id"].to_numpy(dtype=object),
+        "user_id": users["user_id"].to_numpy(dtype=object),
+    }
+    c = {col: seg[col].to_numpy(dtype=object) for col in ["channel", "device_preference", "country"]}
+    engagement = seg["engagement_score"].to_numpy(dtype=float)
+    churn_p = seg["churn_propensity"].to_numpy(dtype=float)
+    engagement_py = nullable(seg["engagement_score"])
+    churn_py = nullable(seg["churn_propensity"])
+    signup = parse_utc_dates(seg["signup_date"])
+
+    # Sessions per user depends on engagement
+    session_count = np.maximum(2, np.trunc(rng.normal(engagement / 6, 2)).astype(int))
+    s_uidx = np.repeat(np.arange(n), session_count)
+    n_sess = len(s_uidx)
+    session_ts = signup[s_uidx] + rng.integers(0, 301, size=n_sess).astype("timedelta64[D]")
+    session_id = np.array(random_hex_ids("SES-", n_sess, 10, rng), dtype=object)
+    session_no = np.arange(n_sess) - np.repeat(np.cumsum(session_count) - session_count, session_count)
+
+    # feature_used events inside each session
+    max_uses = np.maximum(1, np.trunc(engagement / 20).astype(int))
+    feature_uses = rng.integers(1, max_uses[s_uidx] + 1)
+    f_sidx = np.repeat(np.arange(n_sess), feature_uses)
+    f_uidx = s_uidx[f_sidx]
+    n_feat = len(f_sidx)
+    feature_no = np.arange(n_feat) - np.repeat(np.cumsum(feature_uses) - feature_uses, feature_uses)
+    feature_ts = session_ts[f_sidx] + rng.integers(1, 46, size=n_feat).astype("timedelta64[m]")
+    feature_name = np.array(FEATURES, dtype=object)[rng.integers(0, len(FEATURES), size=n_feat)]
+
+    # Cancel intent (only if churn propensity high)
+    cancel_uidx = np.flatnonzero((churn_p > 0.55) & (rng.random(n) < churn_p))
+    n_cancel = len(cancel_uidx)
+    cancel_ts = signup[cancel_uidx] + rng.integers(60, 331, size=n_cancel).astype("timedelta64[D]")
+
+    sessions = _product_rows(s_uidx, u, c, {
+        "event_ts": session_ts,
+        "natural_key": natural_keys(u["user_id"][s_uidx], ["session_started"] * n_sess, session_no),
+        "event_name": ["session_started"] * n_sess,
+        "session_id": session_id.tolist(),
+        "feature_name": [None] * n_sess,
+        "feature_action": [None] * n_sess,
+        "raw_payload": [{"engagement_score": engagement_py[i]} for i in s_uidx],
+    })
+    features = _product_rows(f_uidx, u, c, {
+        "event_ts": feature_ts,
+        "natural_key": natural_keys(u["user_id"][f_uidx], ["feature_used"] * n_feat, session_no[f_sidx], feature_no),
+        "event_name": ["feature_used"] * n_feat,
+        "session_id": session_id[f_sidx].tolist(),
+        "feature_name": feature_name.tolist(),
+        "feature_action": ["click"] * n_feat,
+        "raw_payload": [{"engagement_score": engagement_py[i]} for i in f_uidx],
+    })
+    cancels = _product_rows(cancel_uidx, u, c, {
+        "event_ts": cancel_ts,
+        "natural_key": natural_keys(u["user_id"][cancel_uidx], ["cancel_intent"] * n_cancel),
+        "event_name": ["cancel_intent"] * n_cancel,
+        "session_id": [None] * n_cancel,
+        "feature_name": ["billing"] * n_cancel,
+        "feature_action": ["view_cancel"] * n_cancel,
+        "raw_payload": [{"churn_propensity": churn_py[i]} for i in cancel_uidx],
+    })
+
+    # Per user: each session followed by its feature events, then cancel intent
+    last_session = np.cumsum(session_count) - 1
+    keys = np.concatenate([
+        2.0 * np.arange(n_sess),
+        2.0 * f_sidx + 1,
+        2.0 * last_session[cancel_uidx] + 1.5,
+    ])
+    order = np.argsort(keys, kind="stable")
+    events = sessions + features + cancels
+    return [events[i] for i in order]
+
+def iter_product_events(users: pd.DataFrame, customers: pd.DataFrame, rng: np.random.Generator = None):
+    """
+    Yields session_started / feature_used / cancel_intent events for each user row.
+    """
+    yield from build_product_events(users, customers, rng if rng is not None else np.random.default_rng())
+
+def load_customers() -> pd.DataFrame:
+    return read_base_table("base_customers", columns=["customer_id"] + CUSTOMER_COLUMNS)
+
+def iter_user_chunks(chunk_size: int = READ_CHUNK_SIZE, offset: int = 0):
+    return iter_base_table("base_users", columns=["customer_id", "user_id"], chunk_size=chunk_size, offset=offset)
 
 def main():
+    parser = argparse.ArgumentParser(description="Generate product events from base_users into bronze.")
+    parser.add_argument("--resume", action="store_true",
+                        help="continue after the last checkpointed user chunk of an interrupted run")
+    args = parser.parse_args()
+
+    ckpt = Checkpoint("product_events", {
+        "source": source_fingerprint("base_users"),
+        "customers": source_fingerprint("base_customers"),
+        "chunk_size": READ_CHUNK_SIZE,
+        "seed": RNG_SEED,
+    })
+    if args.resume and ckpt.load():
+        if ckpt.complete:
+            print(f"✅ Checkpoint {ckpt.path} says this run already finished ({ckpt.events:,} events); nothing to do.")
+            return
+        print(f"Resuming after {ckpt.offset:,} users ({ckpt.chunks} chunks, {ckpt.events:,} events committed)")
+    else:
+        ckpt.reset()
+
     print("Loading base tables...")
-    customers = pd.read_csv(CUSTOMERS_CSV)
-    users = pd.read_csv(USERS_CSV)
-
-    cust_map = customers.set_index("customer_id").to_dict(orient="index")
-
-    events = []
-
-    print(f"Generating product events for users: {len(users):,}")
-
-    for i, u in users.iterrows():
-        cid = u["customer_id"]
-        user_id = u["user_id"]
-        cust = cust_map[cid]
-
-        engagement = cust["engagement_score"]
-        churn_p = cust["churn_propensity"]
-
-        signup_ts = to_ts(cust["signup_date"])
-
-        # Sessions per user depends on engagement
-        session_count = max(2, int(random.gauss(engagement / 6, 2)))
-
-        for s in range(session_count):
-            session_id = f"SES-{uuid.uuid4().hex[:10]}"
-            session_ts = signup_ts + timedelta(days=random.randint(0, 300))
-
-            # session_started
-            events.append({
-                "event_id": make_event_id(),
-                "event_ts": session_ts,
-                "event_name": "session_started",
-                "event_version": EVENT_VERSION,
-                "source_system": SOURCE_SYSTEM,
-                "environment": ENVIRONMENT,
-
-                "customer_id": cid,
-                "user_id": user_id,
-                "session_id": session_id,
-
-                "feature_name": None,
-                "feature_action": None,
-
-                "channel": cust["channel"],
-                "device": cust["device_preference"],
-                "country": cust["country"],
-
-                "raw_payload": {
-                    "engagement_score": engagement
-                }
-            })
-
-            # feature_used events inside session
-            feature_uses = random.randint(1, max(1, int(engagement / 20)))
-            for _ in range(feature_uses):
-                events.append({
-                    "event_id": make_event_id(),
-                    "event_ts": session_ts + timedelta(minutes=random.randint(1, 45)),
-                    "event_name": "feature_used",
-                    "event_version": EVENT_VERSION,
-                    "source_system": SOURCE_SYSTEM,
-                    "environment": ENVIRONMENT,
-
-                    "customer_id": cid,
-                    "user_id": user_id,
-                    "session_id": session_id,
-
-                    "feature_name": random.choice(FEATURES),
-                    "feature_action": "click",
-
-                    "channel": cust["channel"],
-                    "device": cust["device_preference"],
-                    "country": cust["country"],
-
-                    "raw_payload": {
-                        "engagement_score": engagement
-                    }
-                })
-
-        # Cancel intent (only if churn propensity high)
-        if churn_p > 0.55 and random.random() < churn_p:
-            events.append({
-                "event_id": make_event_id(),
-                "event_ts": signup_ts + timedelta(days=random.randint(60, 330)),
-                "event_name": "cancel_intent",
-                "event_version": EVENT_VERSION,
-                "source_system": SOURCE_SYSTEM,
-                "environment": ENVIRONMENT,
-
-                "customer_id": cid,
-                "user_id": user_id,
-                "session_id": None,
-
-                "feature_name": "billing",
-                "feature_action": "view_cancel",
-
-                "channel": cust["channel"],
-                "device": cust["device_preference"],
-                "country": cust["country"],
-
-                "raw_payload": {
-                    "churn_propensity": churn_p
-                }
-            })
-
-        if (i + 1) % 25000 == 0:
-            print(f"...processed {i+1:,}/{len(users):,} users")
-
-    print(f"Inserting product events (batch): {len(events):,}")
-    insert_product_events_batch(events, page_size=BATCH_SIZE)
-    print("✅ product events batch done")
+    customers = load_customers()
+
+    print(f"Streaming base_users in chunks of {READ_CHUNK_SIZE:,} users...")
+    t0 = time.perf_counter()
+    n_events = 0
+    for users in iter_user_chunks(READ_CHUNK_SIZE, offset=ckpt.offset):
+        # one load per chunk: the checkpoint only moves once all of its events are committed
+        n = insert_product_events_batch(
+            iter_product_events(users, customers, chunk_rng(RNG_SEED, ckpt.chunks)),
+            page_size=BATCH_SIZE, method=LOAD_METHOD,
+        )
+        ckpt.commit(len(users), n)
+        n_events += n
+        print(f"...committed {ckpt.offset:,} users ({ckpt.events:,} events)")
+    ckpt.finish()
+    elapsed = time.perf_counter() - t0
+    print(f"✅ product events batch done: {n_events:,} rows in {elapsed:.1f}s ({n_events / max(elapsed, 1e-9):,.0f} rows/sec via {LOAD_METHOD})")
+    print_ingest_metrics()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,70 @@
+import itertools
+import pandas as pd
+
+from scripts.ingest.parallel_loader import load_tables_parallel, print_report
+
+from .generate_billing_events import (
+    load_base_tables, generate_subscription_created_events, generate_invoice_created_events,
+)
+from .checkpoint import chunk_rng
+from .generate_payment_events import (
+    READ_CHUNK_SIZE as PAYMENT_CHUNK_SIZE, RNG_SEED as PAYMENT_RNG_SEED, iter_invoice_chunks, iter_payment_events,
+)
+from .generate_product_events import (
+    READ_CHUNK_SIZE as PRODUCT_CHUNK_SIZE, RNG_SEED as PRODUCT_RNG_SEED, iter_user_chunks, iter_product_events,
+    load_customers,
+)
+
+# Worker processes per table (so 3 * N_WORKERS connections in total)
+N_WORKERS = 4
+# customer_id keeps each customer's events on one connection; event_id spreads evenly
+SHARD_KEY = "customer_id"
+LOAD_METHOD = "copy"
+
+
+def billing_events():
+    customers, subs, invpay = load_base_tables()
+    return itertools.chain(
+        generate_subscription_created_events(subs, customers),
+        generate_invoice_created_events(invpay),
+    )
+
+
+# Same chunking and per-chunk RNG as the generators' main(), so a rerun (or a
+# mix of entry points) regenerates identical events and natural ids
+def payment_events():
+    for k, inv in enumerate(iter_invoice_chunks(PAYMENT_CHUNK_SIZE)):
+        yield from iter_payment_events(inv, chunk_rng(PAYMENT_RNG_SEED, k))
+
+
+def product_events(customers: pd.DataFrame):
+    for k, users in enumerate(iter_user_chunks(PRODUCT_CHUNK_SIZE)):
+        yield from iter_product_events(users, customers, chunk_rng(PRODUCT_RNG_SEED, k))
+
+
+def main():
+    print("Loading base tables...")
+    customers = load_customers()
+
+    print(f"Loading billing, payment and product events in parallel ({N_WORKERS} workers per table, shard by {SHARD_KEY})...")
+    report = load_tables_parallel(
+        {
+            "billing_events": billing_events(),
+            "payment_events": payment_events(),
+            "product_events": product_events(customers),
+        },
+        n_workers=N_WORKERS,
+        shard_key=SHARD_KEY,
+        method=LOAD_METHOD,
+    )
+    print_report(report)
+
+    failed = [r for shards in report.values() for r in shards if r["error"]]
+    if failed:
+        print(f"⚠️ {len(failed)} shard(s) failed; the other shards were committed.")
+    else:
+        print("✅ Parallel load finished. Verify counts in Postgres.")
+
+
+if __name__ == "__main__":
+    main()
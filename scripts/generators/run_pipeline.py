@@ -0,0 +1,200 @@
+"""
+In-memory pipeline: SDV base tables -> event generators -> bronze, without the
+base-table files in between.
+
+Generation and loading run as producer/consumer threads joined by bounded queues:
+while a loader thread streams one chunk into Postgres (psycopg2 releases the GIL
+during network I/O), the producers build the next one.
+
+    invoices chunk ─┬─> invoice_created ──> [billing queue] ──> insert_billing_events_batch
+                    └─> payment events  ──> [payment queue] ──> insert_payment_events_batch
+    users chunk   ───> product events  ──> [product queue] ──> insert_product_events_batch
+
+    python -m scripts.generators.run_pipeline [--write-base-tables]
+"""
+import argparse
+import queue
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from scripts.ingest.insert_billing_events_batch import LOAD_METHODS, insert_billing_events_batch
+from scripts.ingest.insert_payment_events_batch import insert_payment_events_batch
+from scripts.ingest.insert_product_events_batch import insert_product_events_batch
+from scripts.ingest.metrics import print_report as print_ingest_metrics
+from scripts.sdv.base_tables import BaseTableWriter, rechunk, write_base_table
+from scripts.sdv.train_and_generate import (
+    RNG_SEED as SDV_RNG_SEED, build_entity_tables, ensure_out_dir, iter_base_invoices_payments, train_models,
+)
+
+from .checkpoint import chunk_rng
+from .generate_billing_events import generate_invoice_created_events, generate_subscription_created_events
+from .generate_payment_events import (
+    READ_CHUNK_SIZE as PAYMENT_CHUNK_SIZE, RNG_SEED as PAYMENT_RNG_SEED, iter_payment_events,
+)
+from .generate_product_events import (
+    READ_CHUNK_SIZE as PRODUCT_CHUNK_SIZE, RNG_SEED as PRODUCT_RNG_SEED, iter_product_events,
+)
+
+INSERTERS = {
+    "billing_events": insert_billing_events_batch,
+    "payment_events": insert_payment_events_batch,
+    "product_events": insert_product_events_batch,
+}
+
+QUEUE_DEPTH = 4  # event chunks buffered per table between generation and loading
+LOAD_METHOD = "copy"
+PAGE_SIZE = 5000
+
+_DONE = None
+
+
+class _Pipe:
+    """
+    Bounded queue of event lists between producers and one loader thread.
+    If the loader fails, put() stops blocking and drops events so producers finish.
+    """
+
+    def __init__(self, table: str, depth: int):
+        self.table = table
+        self.q: "queue.Queue[Optional[List[Dict[str, Any]]]]" = queue.Queue(maxsize=depth)
+        self.failed = threading.Event()
+
+    def put(self, events: Optional[List[Dict[str, Any]]]):
+        while not self.failed.is_set():
+            try:
+                self.q.put(events, timeout=1.0)
+                return
+            except queue.Full:
+                continue
+
+    def drain(self) -> Iterable[Dict[str, Any]]:
+        while True:
+            events = self.q.get()
+            if events is _DONE:
+                return
+            yield from events
+
+
+def _describe(exc: BaseException) -> str:
+    # one line per error (psycopg2 messages span several)
+    first = str(exc).strip().splitlines()
+    return f"{type(exc).__name__}: {first[0]}" if first else type(exc).__name__
+
+
+def _loader(pipe: _Pipe, method: str, report: Dict[str, Dict[str, Any]]):
+    t0 = time.perf_counter()
+    r = report[pipe.table]
+    try:
+        r["rows"] = INSERTERS[pipe.table](pipe.drain(), page_size=PAGE_SIZE, method=method)
+    except Exception as exc:
+        r["error"] = _describe(exc)
+        pipe.failed.set()
+    r["seconds"] = time.perf_counter() - t0
+
+
+def _produce(pipes: List[_Pipe], work, report: Dict[str, Dict[str, Any]]):
+    try:
+        work()
+    except Exception as exc:
+        for p in pipes:
+            report[p.table]["error"] = report[p.table]["error"] or f"producer failed: {_describe(exc)}"
+        raise
+    finally:
+        for p in pipes:
+            p.put(_DONE)
+
+
+def run_pipeline(
+    write_base_tables: bool = False,
+    method: str = LOAD_METHOD,
+    queue_depth: int = QUEUE_DEPTH,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Build base tables in memory and load all three bronze tables concurrently.
+    Returns {table: {"rows", "seconds", "error"}}.
+    """
+    ensure_out_dir()
+    customer_synth, invoice_synth, seed_users = train_models()
+    customers, subs, users = build_entity_tables(customer_synth, seed_users, np.random.default_rng(SDV_RNG_SEED))
+
+    if write_base_tables:
+        for name, df in (("base_customers", customers), ("base_subscriptions", subs), ("base_users", users)):
+            print(f"- {write_base_table(df, name)} ({len(df):,} rows)")
+
+    report = {t: {"rows": 0, "seconds": 0.0, "error": None} for t in INSERTERS}
+    pipes = {t: _Pipe(t, queue_depth) for t in INSERTERS}
+
+    def invoices():
+        pipes["billing_events"].put(generate_subscription_created_events(subs, customers))
+        writer = BaseTableWriter("base_invoices_payments") if write_base_tables else None
+
+        def generated():
+            for chunk in iter_base_invoices_payments(customers, subs, invoice_synth):
+                if writer:
+                    writer.write(chunk)
+                yield chunk
+
+        try:
+            # the payment generator's chunks and per-chunk RNG, so its events and
+            # natural ids match generate_payment_events run over the written table
+            for k, chunk in enumerate(rechunk(generated(), PAYMENT_CHUNK_SIZE)):
+                pipes["billing_events"].put(generate_invoice_created_events(chunk))
+                pipes["payment_events"].put(list(iter_payment_events(chunk, chunk_rng(PAYMENT_RNG_SEED, k))))
+        finally:
+            if writer:
+                print(f"- {writer.close()} ({writer.rows:,} rows)")
+
+    def product():
+        for k, lo in enumerate(range(0, len(users), PRODUCT_CHUNK_SIZE)):
+            chunk = users.iloc[lo:lo + PRODUCT_CHUNK_SIZE].reset_index(drop=True)
+            pipes["product_events"].put(list(iter_product_events(chunk, customers, chunk_rng(PRODUCT_RNG_SEED, k))))
+
+    threads = [
+        threading.Thread(target=_loader, args=(p, method, report), name=f"load-{t}")
+        for t, p in pipes.items()
+    ] + [
+        threading.Thread(
+            target=_produce, args=([pipes["billing_events"], pipes["payment_events"]], invoices, report),
+            name="gen-invoices",
+        ),
+        threading.Thread(target=_produce, args=([pipes["product_events"]], product, report), name="gen-product"),
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate base tables and load bronze events in one process.")
+    parser.add_argument("--write-base-tables", action="store_true",
+                        help="also write base tables to scripts/sdv/outputs (BASE_TABLE_FORMAT)")
+    parser.add_argument("--method", default=LOAD_METHOD, choices=LOAD_METHODS)
+    parser.add_argument("--queue-depth", type=int, default=QUEUE_DEPTH)
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    report = run_pipeline(args.write_base_tables, args.method, args.queue_depth)
+    elapsed = time.perf_counter() - t0
+
+    print(f"{'table':<16} {'rows':>12} {'seconds':>9} {'rows/sec':>12}  error")
+    for table, r in report.items():
+        rate = r["rows"] / r["seconds"] if r["seconds"] else 0.0
+        print(f"{table:<16} {r['rows']:>12,} {r['seconds']:>9.1f} {rate:>12,.0f}  {r['error'] or ''}")
+
+    print()
+    print_ingest_metrics()
+
+    total = sum(r["rows"] for r in report.values())
+    if any(r["error"] for r in report.values()):
+        print(f"⚠️ Pipeline finished with errors after {elapsed:.1f}s; committed chunks stay in bronze.")
+    else:
+        print(f"✅ Pipeline finished: {total:,} events in {elapsed:.1f}s ({total / max(elapsed, 1e-9):,.0f} rows/sec overall)")
+
+
+if __name__ == "__main__":
+    main()
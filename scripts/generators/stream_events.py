@@ -0,0 +1,358 @@
+"""
+Continuous, rate-controlled event emitter for load-testing bronze, its indexes
+and the incremental dbt models under steady live traffic.
+
+Events are built by the billing/payment/product generators from a sample of the
+base tables, then replayed with event_ts = now and fresh time-ordered ids. The
+emit rate follows a time-of-day curve (HOURLY_PROFILE) around --rate, with short
+random bursts on top:
+
+    python -m scripts.generators.stream_events --rate 500 --duration 600
+    python -m scripts.generators.stream_events --rate 200 --day-seconds 600 --mode single --workers 8
+
+--mode buffered (default) writes through the per-table BufferedEventWriter;
+latency is measured per micro-batch flush (statement + commit).
+--mode single calls insert_*_event for every event from --workers threads;
+latency is measured per insert.
+
+The report counts events sent (handed to a writer or insert) and events
+committed; the achieved rate is committed events per second, so it drops when
+the database falls behind. Rows a buffered writer gave up on are reported as
+dropped.
+
+Rows are tagged environment = --environment ("stream") so they can be told apart
+from backfilled rows and deleted after a test. Needs the base tables from
+scripts/sdv/train_and_generate.py and a bootstrapped Postgres (docker-compose.yml).
+"""
+import argparse
+import json
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from scripts.ingest.event_ids import make_event_id
+from scripts.ingest.event_writer import close_all, get_writer
+from scripts.ingest.insert_billing_event import insert_billing_event
+from scripts.ingest.insert_payment_event import insert_payment_event
+from scripts.ingest.insert_product_event import insert_product_event
+from scripts.ingest.metrics import add_hook, remove_hook
+from scripts.sdv.base_tables import iter_base_table
+
+from .generate_billing_events import generate_invoice_created_events
+from .generate_payment_events import build_payment_events
+from .generate_product_events import build_product_events, load_customers
+
+INSERT_ONE: Dict[str, Callable[..., int]] = {
+    "billing_events": insert_billing_event,
+    "payment_events": insert_payment_event,
+    "product_events": insert_product_event,
+}
+
+# Share of emitted events per table (product traffic dominates, as in the backfill)
+TABLE_MIX = {"product_events": 0.80, "payment_events": 0.15, "billing_events": 0.05}
+
+# Relative traffic per UTC hour; scaled so the mean over a day is 1.0
+HOURLY_PROFILE = np.array([
+    0.25, 0.20, 0.18, 0.18, 0.22, 0.35, 0.60, 0.95, 1.30, 1.55, 1.70, 1.65,
+    1.50, 1.55, 1.65, 1.60, 1.45, 1.25, 1.05, 0.90, 0.75, 0.60, 0.45, 0.32,
+])
+HOURLY_PROFILE = HOURLY_PROFILE / HOURLY_PROFILE.mean()
+
+BURST_RATE_PER_S = 1 / 120  # expected bursts per second
+BURST_SECONDS = 5.0
+BURST_MULTIPLIER = 4.0
+
+SAMPLE_ROWS = 5_000  # base-table rows used as event templates
+TICK_S = 0.05
+REPORT_EVERY_S = 10.0
+ENVIRONMENT = "stream"
+RNG_SEED = 7
+
+
+def profile_factor(hour: float) -> float:
+    """
+    HOURLY_PROFILE at a fractional hour of day, linearly interpolated.
+    """
+    h = hour % 24
+    lo = int(h)
+    frac = h - lo
+    return float(HOURLY_PROFILE[lo] * (1 - frac) + HOURLY_PROFILE[(lo + 1) % 24] * frac)
+
+
+def _utc_hour() -> float:
+    now = datetime.now(timezone.utc)
+    return now.hour + now.minute / 60
+
+
+class Bursts:
+    """
+    Random traffic bursts: each starts with probability BURST_RATE_PER_S * dt and
+    multiplies the rate by BURST_MULTIPLIER for BURST_SECONDS.
+    """
+
+    def __init__(self, rng: np.random.Generator):
+        self.rng = rng
+        self.until = 0.0
+        self.count = 0
+
+    def factor(self, now: float, dt: float) -> float:
+        if now >= self.until and self.rng.random() < BURST_RATE_PER_S * dt:
+            self.until = now + BURST_SECONDS
+            self.count += 1
+        return BURST_MULTIPLIER if now < self.until else 1.0
+
+
+class EventPool:
+    """
+    Generator-built event templates per table, handed out round-robin with a new
+    event_id and event_ts.
+    """
+
+    def __init__(self, rng: np.random.Generator, environment: str):
+        customers = load_customers()
+        users = next(iter_base_table("base_users", columns=["customer_id", "user_id"], chunk_size=SAMPLE_ROWS))
+        invoices = next(iter_base_table("base_invoices_payments", chunk_size=SAMPLE_ROWS))
+        self.templates = {
+            "billing_events": generate_invoice_created_events(invoices),
+            "payment_events": build_payment_events(invoices, rng),
+            "product_events": build_product_events(users, customers, rng),
+        }
+        self.environment = environment
+        self._pos = {t: 0 for t in self.templates}
+
+    def next(self, table: str) -> Dict[str, Any]:
+        templates = self.templates[table]
+        i = self._pos[table]
+        self._pos[table] = (i + 1) % len(templates)
+        now = datetime.now(timezone.utc)
+        return dict(
+            templates[i], event_id=make_event_id(now, scheme="uuid7"), event_ts=now, environment=self.environment,
+        )
+
+
+class LatencyRecorder:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples: Dict[str, List[float]] = {t: [] for t in INSERT_ONE}
+        self.errors: Dict[str, int] = {t: 0 for t in INSERT_ONE}
+        self.first_error: Optional[str] = None
+
+    def add(self, table: str, seconds: float):
+        with self._lock:
+            self.samples[table].append(seconds)
+
+    def error(self, table: str, exc: BaseException):
+        with self._lock:
+            self.errors[table] += 1
+            if self.first_error is None:
+                lines = str(exc).strip().splitlines()
+                self.first_error = f"{table}: {type(exc).__name__}: {lines[0] if lines else ''}"
+
+    def percentiles(self, table: Optional[str] = None) -> Dict[str, float]:
+        with self._lock:
+            s = self.samples[table] if table else [x for v in self.samples.values() for x in v]
+            if not s:
+                return {"p50_ms": 0.0, "p99_ms": 0.0, "samples": 0}
+            p50, p99 = np.percentile(s, [50, 99])
+            return {"p50_ms": round(p50 * 1000, 2), "p99_ms": round(p99 * 1000, 2), "samples": len(s)}
+
+
+def stream(
+    rate: float,
+    duration: float,
+    mode: str = "buffered",
+    workers: int = 4,
+    day_seconds: Optional[float] = None,
+    environment: str = ENVIRONMENT,
+    tables: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """
+    Emit events for `duration` seconds around `rate` events/sec and return the report.
+
+    day_seconds compresses a full day of HOURLY_PROFILE into that many seconds
+    (starting at midnight); by default the current UTC hour drives the profile.
+    """
+    rng = np.random.default_rng(RNG_SEED)
+    tables = tables or list(TABLE_MIX)
+    weights = np.array([TABLE_MIX[t] for t in tables])
+    weights = weights / weights.sum()
+
+    print("Building event templates from base tables...")
+    pool = EventPool(rng, environment)
+    latency = LatencyRecorder()
+    bursts = Bursts(rng)
+    sent = {t: 0 for t in tables}
+    committed = {t: 0 for t in tables}
+    committed_lock = threading.Lock()
+    # the process-wide writers the buffered insert_*_event calls go through
+    writers = {t: get_writer(t) for t in tables} if mode == "buffered" else {}
+
+    def count_committed(table, n):
+        with committed_lock:
+            committed[table] += n
+
+    def on_batch(batch):
+        # buffered mode: one latency sample per micro-batch flush
+        if batch["method"] == "buffered" and batch["table"] in sent:
+            latency.add(batch["table"], batch["server_s"])
+            count_committed(batch["table"], batch["rows_sent"])
+
+    def insert_one(table, event):
+        t0 = time.perf_counter()
+        try:
+            INSERT_ONE[table](event)
+        except Exception as exc:
+            latency.error(table, exc)
+            return
+        latency.add(table, time.perf_counter() - t0)
+        count_committed(table, 1)
+
+    executor = ThreadPoolExecutor(max_workers=workers) if mode == "single" else None
+    # bounded in-flight inserts: when the database falls behind, the emitter waits
+    slots = threading.BoundedSemaphore(workers * 4)
+
+    def release(_):
+        slots.release()
+
+    hook = add_hook(on_batch)
+    start = last = last_report = time.monotonic()
+    target_total = 0.0
+    owed = 0.0
+    try:
+        while True:
+            now = time.monotonic()
+            elapsed = now - start
+            if elapsed >= duration:
+                break
+            dt, last = now - last, now
+
+            hour = elapsed / day_seconds * 24 if day_seconds else _utc_hour()
+            current = rate * profile_factor(hour) * bursts.factor(now, dt)
+            target_total += current * dt
+            owed += current * dt
+            n = int(owed)
+            owed -= n
+
+            for table in rng.choice(tables, size=n, p=weights) if n else ():
+                event = pool.next(table)
+                if executor is None:
+                    try:
+                        INSERT_ONE[table](event, buffered=True)
+                    except Exception as exc:
+                        latency.error(table, exc)
+                        continue
+                else:
+                    slots.acquire()
+                    executor.submit(insert_one, table, event).add_done_callback(release)
+                sent[table] += 1
+
+            if now - last_report >= REPORT_EVERY_S:
+                last_report = now
+                total = sum(sent.values())
+                p = latency.percentiles()
+                print(
+                    f"[{elapsed:7.1f}s] rate now {current:,.0f}/s | sent {total:,} "
+                    f"({total / max(elapsed, 1e-9):,.0f}/s avg) | p50 {p['p50_ms']:.1f} ms p99 {p['p99_ms']:.1f} ms"
+                )
+
+            time.sleep(max(0.0, TICK_S - (time.monotonic() - now)))
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=True)
+        try:
+            # flush what the buffered writers still hold; a flush error that the
+            # age thread hit after the last write surfaces here
+            for table, writer in writers.items():
+                try:
+                    writer.close()
+                except Exception as exc:
+                    latency.error(table, exc)
+            close_all()
+        finally:
+            remove_hook(hook)
+
+    wall = time.monotonic() - start
+    dropped = {t: writers[t].dropped if t in writers else 0 for t in tables}
+    total_committed = sum(committed.values())
+    report = {
+        "mode": mode,
+        "environment": environment,
+        "seconds": round(wall, 2),
+        "target_rate": rate,
+        "target_events": int(target_total),
+        "sent_events": sum(sent.values()),
+        "committed_events": total_committed,
+        "dropped_events": sum(dropped.values()),
+        "achieved_rate": round(total_committed / wall, 1) if wall else 0.0,
+        "bursts": bursts.count,
+        "latency": latency.percentiles(),
+        "tables": {
+            t: {
+                "events": sent[t],
+                "committed": committed[t],
+                "dropped": dropped[t],
+                "events_per_sec": round(committed[t] / wall, 1) if wall else 0.0,
+                "errors": latency.errors[t],
+                **latency.percentiles(t),
+            }
+            for t in tables
+        },
+        "first_error": latency.first_error,
+    }
+    return report
+
+
+def print_report(report: Dict[str, Any]):
+    print(
+        f"Committed {report['committed_events']:,} of {report['sent_events']:,} events sent in {report['seconds']:.1f}s: "
+        f"{report['achieved_rate']:,.0f}/s achieved vs {report['target_events'] / max(report['seconds'], 1e-9):,.0f}/s target "
+        f"({report['bursts']} bursts, mode={report['mode']})"
+    )
+    print(
+        f"{'table':<16} {'sent':>10} {'committed':>10} {'dropped':>8} {'events/sec':>11} "
+        f"{'p50 ms':>8} {'p99 ms':>8} {'samples':>8} {'errors':>7}"
+    )
+    for table, r in report["tables"].items():
+        print(
+            f"{table:<16} {r['events']:>10,} {r['committed']:>10,} {r['dropped']:>8,} {r['events_per_sec']:>11,.1f} "
+            f"{r['p50_ms']:>8.1f} {r['p99_ms']:>8.1f} {r['samples']:>8,} {r['errors']:>7,}"
+        )
+    if report["dropped_events"]:
+        print(f"⚠️ {report['dropped_events']:,} rows dropped by the buffered writers after repeated flush failures")
+    if report["first_error"]:
+        print(f"⚠️ insert errors, first: {report['first_error']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream events into bronze at a target rate with time-of-day bursts.")
+    parser.add_argument("--rate", type=float, default=100.0, help="mean target events/sec over a day")
+    parser.add_argument("--duration", type=float, default=300.0, help="seconds to run")
+    parser.add_argument("--mode", choices=["buffered", "single"], default="buffered")
+    parser.add_argument("--workers", type=int, default=4,
+                        help="insert threads in --mode single; beyond PGPOOL_MAX (default 8) they wait for "
+                             "a pooled connection, and that wait counts toward insert latency")
+    parser.add_argument("--day-seconds", type=float, default=None,
+                        help="compress the daily traffic curve into this many seconds")
+    parser.add_argument("--tables", nargs="+", choices=list(TABLE_MIX), default=list(TABLE_MIX))
+    parser.add_argument("--environment", default=ENVIRONMENT, help="environment tag on emitted rows")
+    parser.add_argument("--json", default=None, help="also write the report to this JSON file")
+    args = parser.parse_args()
+
+    if args.rate <= 0 or not math.isfinite(args.rate):
+        parser.error("--rate must be a positive number")
+
+    report = stream(args.rate, args.duration, args.mode, args.workers, args.day_seconds, args.environment, args.tables)
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Report written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
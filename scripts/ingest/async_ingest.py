@@ -0,0 +1,272 @@
+"""
+Async bronze ingest over psycopg 3 pipeline mode.
+
+Same call shape as the insert_*_events_batch functions, but awaitable:
+
+    n = await insert_payment_events_batch(events, page_size=5000)
+    n = asyncio.run(insert_payment_events_batch(events))   # from sync code
+
+Each chunk is one transaction on a pipelined connection: every page's INSERTs are
+sent without waiting for the previous page's results, and the client waits once
+per chunk, on the commit. `connections` loaders drain a bounded queue of chunks,
+so several chunks are in flight at once, and producers awaiting put() are held
+back while `queue_depth` chunks are already waiting (backpressure). When
+EVENT_ID_CACHE_DIR is set, events already loaded are skipped as in the sync
+inserters (see id_cache.py).
+
+psycopg 3 is optional (pip install "psycopg[binary]"); the psycopg2 paths do not need it.
+"""
+import asyncio
+import json
+import time
+from functools import partial
+from typing import Any, AsyncIterable, Dict, Iterable, List, Optional, Tuple, Union
+
+try:
+    import psycopg
+    from psycopg.types.json import Jsonb
+except ImportError:  # psycopg2-only installs
+    psycopg = None
+    Jsonb = None
+
+from .batching import DEFAULT_CHUNK_SIZE
+from .copy_loader import COLUMNS, _is_nan, _json_default
+from .db import conn_params
+from .id_cache import open_cache
+from .metrics import record_batch
+from .payload import apply_payload_mode, resolve_payload_mode
+
+DEFAULT_CONNECTIONS = 2
+DEFAULT_QUEUE_DEPTH = 4  # full chunks waiting per loader before put() blocks
+METHOD = "async_pipeline"
+
+Events = Union[Iterable[Dict[str, Any]], AsyncIterable[Dict[str, Any]]]
+
+_dumps = partial(json.dumps, default=_json_default)
+
+
+def _require_psycopg():
+    if psycopg is None:
+        raise RuntimeError('async ingest needs psycopg 3: pip install "psycopg[binary]"')
+
+
+def _insert_sql(table: str) -> str:
+    columns = COLUMNS[table]
+    return (
+        f"INSERT INTO bronze.{table} ({', '.join(columns)}) "
+        f"VALUES ({', '.join(['%s'] * len(columns))}) "
+        f"ON CONFLICT (event_id, event_ts) DO NOTHING"
+    )
+
+
+def _row(e: Dict[str, Any], table: str, payload_mode: str) -> Tuple:
+    values = []
+    for c in COLUMNS[table]:
+        v = e.get(c)
+        if c == "raw_payload":
+            rp = apply_payload_mode(table, v, payload_mode)
+            v = Jsonb({k: (None if _is_nan(x) else x) for k, x in rp.items()}, dumps=_dumps) if rp is not None else None
+        elif _is_nan(v):
+            v = None
+        values.append(v)
+    return tuple(values)
+
+
+class AsyncEventLoader:
+    """
+    Loads events for one bronze table over `connections` pipelined connections.
+
+        async with AsyncEventLoader("payment_events") as loader:
+            async for e in stream:
+                await loader.put(e)
+        loader.rows  # rows sent
+
+    put() groups events into chunk_size chunks; a full chunk is queued for the
+    next free connection, and put() waits while the queue is full. A failed chunk
+    stops the loader: the error is raised from the next put() or from close().
+
+    Each connection has one chunk in flight. Its pages are already pipelined, so
+    a connection waits on the server once per chunk, for one round trip against
+    the seconds the server spends inserting chunk_size rows; more throughput
+    comes from more connections. Queuing a second chunk behind an uncommitted
+    one would let a failure abort both and delay their id-cache updates.
+
+    The id cache (SQLite) is used from the event loop thread only: cached ids
+    are filtered out before a chunk is written and its ids added after commit.
+    """
+
+    def __init__(
+        self,
+        table: str,
+        page_size: int = 5000,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        payload_mode: Optional[str] = None,
+        connections: int = DEFAULT_CONNECTIONS,
+        queue_depth: int = DEFAULT_QUEUE_DEPTH,
+    ):
+        _require_psycopg()
+        if table not in COLUMNS:
+            raise ValueError(f"unknown table: {table} (expected one of {list(COLUMNS)})")
+        self.table = table
+        self.page_size = page_size
+        self.chunk_size = chunk_size
+        self.payload_mode = resolve_payload_mode(payload_mode)
+        self.connections = connections
+        self.rows = 0
+
+        self._sql = _insert_sql(table)
+        self._queue: "asyncio.Queue[Optional[List[Dict[str, Any]]]]" = asyncio.Queue(maxsize=queue_depth)
+        self._chunk: List[Dict[str, Any]] = []
+        self._conns = []
+        self._tasks: List[asyncio.Task] = []
+        self._error: Optional[BaseException] = None
+        self._closed = False
+        self._id_cache = None
+
+    async def start(self) -> "AsyncEventLoader":
+        self._id_cache = open_cache(self.table)
+        for _ in range(self.connections):
+            self._conns.append(await psycopg.AsyncConnection.connect(**conn_params()))
+        self._tasks = [
+            asyncio.create_task(self._drain(conn), name=f"load-{self.table}-{i}")
+            for i, conn in enumerate(self._conns)
+        ]
+        return self
+
+    async def put(self, event: Dict[str, Any]) -> None:
+        self._raise_error()
+        if self._closed:
+            raise RuntimeError(f"loader for {self.table} is closed")
+        self._chunk.append(event)
+        if len(self._chunk) >= self.chunk_size:
+            chunk, self._chunk = self._chunk, []
+            await self._queue.put(chunk)
+
+    async def close(self) -> int:
+        """
+        Send the last partial chunk, wait for every loader and close the
+        connections. Returns the number of rows sent.
+        """
+        if self._closed:
+            return self.rows
+        self._closed = True
+        try:
+            if self._chunk and self._error is None:
+                await self._queue.put(self._chunk)
+            self._chunk = []
+            for _ in self._tasks:
+                await self._queue.put(None)
+            await asyncio.gather(*self._tasks)
+        finally:
+            await self._close_conns()
+        self._raise_error()
+        return self.rows
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            await self.close()
+            return
+        for t in self._tasks:
+            t.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        await self._close_conns()
+        self._closed = True
+
+    async def _close_conns(self):
+        for conn in self._conns:
+            await conn.close()
+        if self._id_cache is not None:
+            self._id_cache.close()
+            self._id_cache = None
+
+    async def _drain(self, conn):
+        while True:
+            chunk = await self._queue.get()
+            if chunk is None:
+                return
+            if self._error is not None:
+                # keep consuming so producers never block on a failed loader
+                continue
+            try:
+                await self._write(conn, chunk)
+            except Exception as exc:
+                self._error = exc
+
+    async def _write(self, conn, chunk: List[Dict[str, Any]]):
+        t0 = time.perf_counter()
+        n_events = len(chunk)
+        if self._id_cache is not None:
+            chunk = self._id_cache.filter_new(chunk)
+        if not chunk:
+            record_batch(self.table, METHOD, 0, 0, time.perf_counter() - t0, 0.0, 0, rows_skipped=n_events)
+            return
+        rows = [_row(e, self.table, self.payload_mode) for e in chunk]
+        t1 = time.perf_counter()
+
+        # one cursor per page: each executemany resets its cursor's rowcount
+        cursors = []
+        try:
+            async with conn.pipeline():
+                for lo in range(0, len(rows), self.page_size):
+                    cur = conn.cursor()
+                    cursors.append(cur)
+                    await cur.executemany(self._sql, rows[lo:lo + self.page_size])
+                await conn.commit()
+        except Exception:
+            await conn.rollback()
+            raise
+        inserted = sum(max(cur.rowcount, 0) for cur in cursors)
+        for cur in cursors:
+            await cur.close()
+        server_s = time.perf_counter() - t1
+        if self._id_cache is not None:
+            self._id_cache.add([e["event_id"] for e in chunk])
+
+        # pipelined pages and the commit share a single sync, hence one round trip
+        record_batch(self.table, METHOD, len(chunk), inserted, t1 - t0, server_s, 1, rows_skipped=n_events - len(chunk))
+        self.rows += len(chunk)
+
+    def _raise_error(self):
+        if self._error is not None:
+            raise self._error
+
+
+async def load_events(
+    table: str,
+    events: Events,
+    page_size: int = 5000,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    payload_mode: Optional[str] = None,
+    connections: int = DEFAULT_CONNECTIONS,
+    queue_depth: int = DEFAULT_QUEUE_DEPTH,
+) -> int:
+    """
+    Load a sync or async event iterable into bronze.<table>. Returns rows sent;
+    inserted rows and conflicts go to ingest metrics (see metrics.py).
+    """
+    async with AsyncEventLoader(table, page_size, chunk_size, payload_mode, connections, queue_depth) as loader:
+        if hasattr(events, "__aiter__"):
+            async for e in events:
+                await loader.put(e)
+        else:
+            for e in events:
+                await loader.put(e)
+    return loader.rows
+
+
+async def insert_billing_events_batch(events: Events, page_size: int = 5000, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                                      payload_mode: Optional[str] = None, connections: int = DEFAULT_CONNECTIONS) -> int:
+    return await load_events("billing_events", events, page_size, chunk_size, payload_mode, connections)
+
+
+async def insert_payment_events_batch(events: Events, page_size: int = 5000, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                                      payload_mode: Optional[str] = None, connections: int = DEFAULT_CONNECTIONS) -> int:
+    return await load_events("payment_events", events, page_size, chunk_size, payload_mode, connections)
+
+
+async def insert_product_events_batch(events: Events, page_size: int = 5000, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                                      payload_mode: Optional[str] = None, connections: int = DEFAULT_CONNECTIONS) -> int:
+    return await load_events("product_events", events, page_size, chunk_size, payload_mode, connections)
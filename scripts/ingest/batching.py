@@ -0,0 +1,76 @@
+import math
+import time
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from psycopg2.extras import execute_batch
+
+from .copy_loader import copy_events, insert_values
+from .id_cache import LoadedIdCache
+from .metrics import record_batch
+
+# Rows per transaction for the batch inserters; bounds client memory per commit
+DEFAULT_CHUNK_SIZE = 50_000
+
+def iter_chunks(events: Iterable[Dict[str, Any]], chunk_size: int) -> Iterator[List[Dict[str, Any]]]:
+    """Yield lists of at most chunk_size events without materializing the whole stream."""
+    it = iter(events)
+    while True:
+        chunk = list(islice(it, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+def load_chunk(
+    conn,
+    cur,
+    table: str,
+    chunk: List[Dict[str, Any]],
+    method: str,
+    sql: str,
+    prep: Callable[[Dict[str, Any], str], Dict[str, Any]],
+    page_size: int,
+    payload_mode: str,
+    id_cache: Optional[LoadedIdCache] = None,
+) -> int:
+    """
+    Write and commit one chunk with the given load method, recording its batch
+    metrics (see metrics.py). With an id_cache, events it already holds are
+    skipped and the chunk's ids are added after the commit.
+    Returns the number of rows sent.
+    """
+    stats = {"prep_s": 0.0, "server_s": 0.0, "round_trips": 0}
+    n_events = len(chunk)
+    if id_cache is not None:
+        t0 = time.perf_counter()
+        chunk = id_cache.filter_new(chunk)
+        stats["prep_s"] += time.perf_counter() - t0
+    if not chunk:
+        record_batch(table, method, 0, 0, stats["prep_s"], 0.0, 0, rows_skipped=n_events)
+        return 0
+
+    if method == "copy":
+        inserted = copy_events(cur, table, chunk, page_size=page_size, payload_mode=payload_mode, stats=stats)
+    else:
+        t0 = time.perf_counter()
+        rows = [prep(e, payload_mode) for e in chunk]
+        t1 = time.perf_counter()
+        if method == "execute_values":
+            inserted = insert_values(cur, table, rows, page_size=page_size)
+        else:
+            # execute_batch only exposes the rowcount of its last page
+            execute_batch(cur, sql, rows, page_size=page_size)
+            inserted = None
+        stats["prep_s"] += t1 - t0
+        stats["server_s"] = time.perf_counter() - t1
+        stats["round_trips"] = math.ceil(len(rows) / page_size)
+
+    t0 = time.perf_counter()
+    conn.commit()
+    stats["server_s"] += time.perf_counter() - t0
+    stats["round_trips"] += 1
+    if id_cache is not None:
+        id_cache.add([e["event_id"] for e in chunk])
+
+    record_batch(table, method, len(chunk), inserted, rows_skipped=n_events - len(chunk), **stats)
+    return len(chunk)
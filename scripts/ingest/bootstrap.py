@@ -0,0 +1,288 @@
+import argparse
+from datetime import date, datetime, timezone
+
+from scripts.sdv.config import MONTHS_HISTORY
+
+from .db import get_conn
+
+# Bronze tables range-partitioned by month on event_ts.
+# Postgres requires the partition key in every unique constraint, so the key is
+# (event_id, event_ts); the inserters use ON CONFLICT (event_id, event_ts).
+TABLE_DDL = {
+    "product_events": """
+create table if not exists bronze.product_events (
+  event_id         text not null,
+  event_ts         timestamptz not null,
+  ingested_ts      timestamptz not null default now(),
+  event_name       text not null,
+  event_version    int not null,
+  source_system    text not null,
+  environment      text not null,
+
+  customer_id      text not null,
+  user_id          text not null,
+  session_id       text null,
+
+  feature_name     text null,
+  feature_action   text null,
+
+  channel          text null,
+  device           text null,
+  country          text null,
+
+  raw_payload      jsonb null,
+  primary key (event_id, event_ts)
+) partition by range (event_ts);
+""",
+    "billing_events": """
+create table if not exists bronze.billing_events (
+  event_id         text not null,
+  event_ts         timestamptz not null,
+  ingested_ts      timestamptz not null default now(),
+  event_name       text not null,
+  event_version    int not null,
+  source_system    text not null,
+  environment      text not null,
+
+  customer_id      text not null,
+  user_id          text null,
+
+  subscription_id  text null,
+  invoice_id       text null,
+
+  plan_id          text null,
+  old_plan_id      text null,
+  new_plan_id      text null,
+
+  amount_usd       numeric(12,2) null,
+
+  raw_payload      jsonb null,
+  primary key (event_id, event_ts)
+) partition by range (event_ts);
+""",
+    "payment_events": """
+create table if not exists bronze.payment_events (
+  event_id         text not null,
+  event_ts         timestamptz not null,
+  ingested_ts      timestamptz not null default now(),
+  event_name       text not null,
+  event_version    int not null,
+  source_system    text not null,
+  environment      text not null,
+
+  customer_id      text not null,
+  user_id          text null,
+
+  invoice_id       text not null,
+  payment_id       text not null,
+  attempt_number   int not null,
+
+  amount_usd       numeric(12,2) not null,
+  status           text null,
+  failure_reason   text null,
+
+  raw_payload      jsonb null,
+  primary key (event_id, event_ts)
+) partition by range (event_ts);
+""",
+}
+
+# Access paths used by the stg_* models and marts: event_ts windows and the
+# ingested_ts high-water mark (BRIN, cheap on append-mostly data), invoice_id
+# joins, customer_id grouping.
+TABLE_INDEXES = {
+    "product_events": [
+        "create index if not exists idx_product_events_event_ts_brin on bronze.product_events using brin (event_ts)",
+        "create index if not exists idx_product_events_ingested_ts_brin on bronze.product_events using brin (ingested_ts)",
+        "create index if not exists idx_product_events_customer_id on bronze.product_events (customer_id)",
+    ],
+    "billing_events": [
+        "create index if not exists idx_billing_events_event_ts_brin on bronze.billing_events using brin (event_ts)",
+        "create index if not exists idx_billing_events_ingested_ts_brin on bronze.billing_events using brin (ingested_ts)",
+        "create index if not exists idx_billing_events_invoice_id on bronze.billing_events (invoice_id)",
+        "create index if not exists idx_billing_events_customer_id on bronze.billing_events (customer_id)",
+    ],
+    "payment_events": [
+        "create index if not exists idx_payment_events_event_ts_brin on bronze.payment_events using brin (event_ts)",
+        "create index if not exists idx_payment_events_ingested_ts_brin on bronze.payment_events using brin (ingested_ts)",
+        "create index if not exists idx_payment_events_invoice_id on bronze.payment_events (invoice_id)",
+        "create index if not exists idx_payment_events_customer_id on bronze.payment_events (customer_id)",
+    ],
+}
+
+MONTHS_AHEAD = 12  # product events run up to ~330 days past signup (generate_product_events.py)
+MONTHS_BACK = MONTHS_HISTORY + 1  # generated history plus the current month's lead-in
+
+
+def add_months(d: date, n: int) -> date:
+    m = d.year * 12 + (d.month - 1) + n
+    return date(m // 12, m % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_p{month:%Y%m}"
+
+
+def table_kind(cur, table: str):
+    # 'p' = partitioned, 'r' = plain table (scripts/bootstrap_bronze.sql), None = missing
+    cur.execute(
+        """
+        select c.relkind
+        from pg_class c
+        join pg_namespace n on n.oid = c.relnamespace
+        where n.nspname = 'bronze' and c.relname = %s
+        """,
+        (table,),
+    )
+    row = cur.fetchone()
+    return row["relkind"] if row else None
+
+
+def _exists(cur, name: str) -> bool:
+    cur.execute("select to_regclass(%s) as rel", (f"bronze.{name}",))
+    return cur.fetchone()["rel"] is not None
+
+
+def ensure_partitions(cur, table: str, first_month: date, last_month: date) -> int:
+    """
+    Create monthly partitions [first_month, last_month] plus a default partition.
+
+    Months with rows parked in the default partition get a partition too.
+    Postgres will not create a partition whose range has rows in the default,
+    so the default is detached, the partitions created, its rows moved through
+    the parent into them, and the default reattached, all in this transaction.
+    Returns the number of partitions created.
+    """
+    default = f"{table}_default"
+    parked = set()
+    if _exists(cur, default):
+        cur.execute(f"select distinct date_trunc('month', event_ts)::date as month from bronze.{default}")
+        parked = {row["month"] for row in cur.fetchall()}
+
+    months = set(parked)
+    month = first_month
+    while month <= last_month:
+        months.add(month)
+        month = add_months(month, 1)
+    missing = [m for m in sorted(months) if not _exists(cur, partition_name(table, m))]
+
+    if parked:
+        cur.execute(f"alter table bronze.{table} detach partition bronze.{default}")
+    for month in missing:
+        cur.execute(
+            f"create table bronze.{partition_name(table, month)} partition of bronze.{table} "
+            f"for values from ('{month.isoformat()}') to ('{add_months(month, 1).isoformat()}')"
+        )
+    if parked:
+        cur.execute(
+            f"with moved as (delete from bronze.{default} returning *) "
+            f"insert into bronze.{table} select * from moved"
+        )
+        print(f"bronze.{table}: moved {cur.rowcount:,} row(s) out of {default} into {len(parked)} monthly partition(s)")
+        cur.execute(f"alter table bronze.{table} attach partition bronze.{default} default")
+    else:
+        cur.execute(f"create table if not exists bronze.{default} partition of bronze.{table} default")
+    return len(missing)
+
+
+def convert_legacy_key(cur, table: str) -> None:
+    """
+    Give a legacy unpartitioned table the partitioned tables' key.
+
+    Tables from older versions of scripts/bootstrap_bronze.sql have an event_id
+    primary key. With it, a repeated event_id under a different event_ts raises
+    a unique violation instead of being skipped by ON CONFLICT (event_id,
+    event_ts), so the key is replaced with (event_id, event_ts).
+    """
+    cur.execute(
+        """
+        select con.conname, array_length(con.conkey, 1) as n_columns
+        from pg_constraint con
+        join pg_class c on c.oid = con.conrelid
+        join pg_namespace n on n.oid = c.relnamespace
+        where n.nspname = 'bronze' and c.relname = %s and con.contype = 'p'
+        """,
+        (table,),
+    )
+    row = cur.fetchone()
+    if row and row["n_columns"] == 2:
+        return
+    if row:
+        print(f"⚠️ bronze.{table}: replacing primary key {row['conname']} (event_id) with (event_id, event_ts)")
+        cur.execute(f"alter table bronze.{table} drop constraint {row['conname']}")
+    cur.execute(f"alter table bronze.{table} add primary key (event_id, event_ts)")
+    # the unique index earlier versions of this script added as the conflict target
+    cur.execute(f"drop index if exists bronze.uq_{table}_event_id_ts")
+
+
+def detach_partitions_before(cur, table: str, cutoff: date) -> list:
+    """
+    Detach (not drop) monthly partitions that end on or before cutoff.
+    The detached tables stay in the bronze schema for archiving or dropping.
+    """
+    cur.execute(
+        """
+        select c.relname
+        from pg_inherits i
+        join pg_class c on c.oid = i.inhrelid
+        join pg_class p on p.oid = i.inhparent
+        join pg_namespace n on n.oid = p.relnamespace
+        where n.nspname = 'bronze' and p.relname = %s
+        order by 1
+        """,
+        (table,),
+    )
+    detached = []
+    for row in cur.fetchall():
+        name = row["relname"]
+        suffix = name.rsplit("_p", 1)[-1]
+        if not (len(suffix) == 6 and suffix.isdigit()):
+            continue
+        month = date(int(suffix[:4]), int(suffix[4:]), 1)
+        if add_months(month, 1) <= cutoff:
+            cur.execute(f"alter table bronze.{table} detach partition bronze.{name}")
+            detached.append(name)
+    return detached
+
+
+def bootstrap(months_back: int = MONTHS_BACK, months_ahead: int = MONTHS_AHEAD, detach_before: date = None):
+    today = datetime.now(timezone.utc).date().replace(day=1)
+    first_month = add_months(today, -months_back)
+    last_month = add_months(today, months_ahead)
+
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute("create schema if not exists bronze")
+            for table, ddl in TABLE_DDL.items():
+                kind = table_kind(cur, table)
+                if kind == "r":
+                    # Legacy unpartitioned table: keep it, but key it like the
+                    # partitioned tables so ON CONFLICT behaves the same
+                    print(f"⚠️ bronze.{table} exists and is not partitioned; leaving it in place")
+                    convert_legacy_key(cur, table)
+                else:
+                    cur.execute(ddl)
+                    created = ensure_partitions(cur, table, first_month, last_month)
+                    print(f"bronze.{table}: {created} new monthly partition(s) {first_month:%Y-%m}..{last_month:%Y-%m}")
+                    if detach_before:
+                        for name in detach_partitions_before(cur, table, detach_before):
+                            print(f"bronze.{table}: detached {name}")
+
+                for stmt in TABLE_INDEXES[table]:
+                    cur.execute(stmt)
+
+    print("✅ Bronze schema ready.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Create month-partitioned bronze event tables and their indexes.")
+    parser.add_argument("--months-back", type=int, default=MONTHS_BACK, help="past months to pre-create")
+    parser.add_argument("--months-ahead", type=int, default=MONTHS_AHEAD, help="future months to pre-create")
+    parser.add_argument("--detach-before", type=date.fromisoformat, default=None,
+                        help="detach monthly partitions ending on or before this date (YYYY-MM-DD)")
+    args = parser.parse_args()
+    bootstrap(args.months_back, args.months_ahead, args.detach_before)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+import io
+import json
+import math
+import time
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from psycopg2.extras import execute_values
+
+from .payload import apply_payload_mode, resolve_payload_mode
+
+# Column order used for COPY; ingested_ts is left to the server default
+COLUMNS = {
+    "billing_events": (
+        "event_id", "event_ts", "event_name", "event_version", "source_system", "environment",
+        "customer_id", "user_id", "subscription_id", "invoice_id",
+        "plan_id", "old_plan_id", "new_plan_id", "amount_usd", "raw_payload",
+    ),
+    "payment_events": (
+        "event_id", "event_ts", "event_name", "event_version", "source_system", "environment",
+        "customer_id", "user_id", "invoice_id", "payment_id", "attempt_number",
+        "amount_usd", "status", "failure_reason", "raw_payload",
+    ),
+    "product_events": (
+        "event_id", "event_ts", "event_name", "event_version", "source_system", "environment",
+        "customer_id", "user_id", "session_id", "feature_name", "feature_action",
+        "channel", "device", "country", "raw_payload",
+    ),
+}
+
+def _is_nan(v) -> bool:
+    return isinstance(v, float) and math.isnan(v)
+
+def _json_default(o):
+    # numpy scalars sneak in from DataFrame rows
+    if hasattr(o, "item"):
+        return o.item()
+    return str(o)
+
+def _copy_value(v) -> str:
+    # Postgres COPY text format: \N is NULL, backslash/tab/newline must be escaped
+    if v is None or _is_nan(v):
+        return "\\N"
+    if isinstance(v, dict):
+        v = json.dumps({k: (None if _is_nan(x) else x) for k, x in v.items()}, default=_json_default)
+    elif isinstance(v, (datetime, date)):
+        v = v.isoformat()
+    else:
+        v = str(v)
+    return (
+        v.replace("\\", "\\\\")
+         .replace("\t", "\\t")
+         .replace("\n", "\\n")
+         .replace("\r", "\\r")
+    )
+
+def _to_copy_buffer(events: List[Dict[str, Any]], table: str, payload_mode: str) -> io.StringIO:
+    columns = COLUMNS[table]
+    buf = io.StringIO()
+    for e in events:
+        if payload_mode != "full":
+            e = dict(e, raw_payload=apply_payload_mode(table, e.get("raw_payload"), payload_mode))
+        buf.write("\t".join(_copy_value(e.get(c)) for c in columns))
+        buf.write("\n")
+    buf.seek(0)
+    return buf
+
+def copy_events(
+    cur,
+    table: str,
+    events: Iterable[Dict[str, Any]],
+    page_size: int = 5000,
+    payload_mode: Optional[str] = None,
+    stats: Optional[Dict[str, float]] = None,
+) -> int:
+    """
+    Bulk-load events into bronze.<table> with COPY FROM STDIN.
+    raw_payload is trimmed per payload_mode (see payload.py).
+
+    COPY cannot skip conflicts itself, so rows are streamed into a session temp
+    table first and merged with INSERT ... SELECT ... ON CONFLICT (event_id, event_ts) DO NOTHING.
+    Returns the number of rows actually inserted. If stats is given, prep_s,
+    server_s and round_trips for this call are added to it (see metrics.py).
+    """
+    columns = COLUMNS[table]
+    col_list = ", ".join(columns)
+    payload_mode = resolve_payload_mode(payload_mode)
+    staging = f"_stage_{table}"
+    prep_s = server_s = 0.0
+    trips = 0
+
+    def run(fn, *args):
+        nonlocal server_s, trips
+        t0 = time.perf_counter()
+        fn(*args)
+        server_s += time.perf_counter() - t0
+        trips += 1
+
+    def copy_page(page):
+        nonlocal prep_s
+        t0 = time.perf_counter()
+        buf = _to_copy_buffer(page, table, payload_mode)
+        prep_s += time.perf_counter() - t0
+        run(cur.copy_expert, f"COPY {staging} ({col_list}) FROM STDIN", buf)
+
+    run(
+        cur.execute,
+        f"CREATE TEMP TABLE IF NOT EXISTS {staging} "
+        f"(LIKE bronze.{table} INCLUDING DEFAULTS) ON COMMIT DELETE ROWS",
+    )
+    run(cur.execute, f"TRUNCATE {staging}")
+
+    page: List[Dict[str, Any]] = []
+    for e in events:
+        page.append(e)
+        if len(page) >= page_size:
+            copy_page(page)
+            page = []
+    if page:
+        copy_page(page)
+
+    run(
+        cur.execute,
+        f"INSERT INTO bronze.{table} ({col_list}) "
+        f"SELECT {col_list} FROM {staging} "
+        f"ON CONFLICT (event_id, event_ts) DO NOTHING",
+    )
+    inserted = cur.rowcount
+    run(cur.execute, f"TRUNCATE {staging}")
+
+    if stats is not None:
+        stats["prep_s"] = stats.get("prep_s", 0.0) + prep_s
+        stats["server_s"] = stats.get("server_s", 0.0) + server_s
+        stats["round_trips"] = stats.get("round_trips", 0) + trips
+    return inserted
+
+def insert_values(cur, table: str, rows: List[Dict[str, Any]], page_size: int = 5000) -> int:
+    """
+    Multi-row INSERT ... VALUES of already-prepped rows (one statement per page)
+    with RETURNING, so the result counts only rows that were not conflicts.
+    Returns the number of rows actually inserted.
+    """
+    columns = COLUMNS[table]
+    sql = (
+        f"INSERT INTO bronze.{table} ({', '.join(columns)}) VALUES %s "
+        f"ON CONFLICT (event_id, event_ts) DO NOTHING RETURNING 1"
+    )
+    template = "(" + ", ".join(f"%({c})s" for c in columns) + ")"
+    return len(execute_values(cur, sql, rows, template=template, page_size=page_size, fetch=True))
@@ -1,16 +1,80 @@
 import os
+import threading
+from contextlib import contextmanager
+
 import psycopg2
 from psycopg2.extras import RealDictCursor
+from psycopg2.pool import ThreadedConnectionPool
 from dotenv import load_dotenv
 
 load_dotenv()  # loads .env from repo root (current working dir)
 
-def get_conn():
-    return psycopg2.connect(
+POOL_MIN_CONN = int(os.getenv("PGPOOL_MIN", "1"))
+POOL_MAX_CONN = int(os.getenv("PGPOOL_MAX", "8"))
+
+_pool = None
+_pool_slots = None  # one slot per pooled connection; pooled_conn() waits for a free one
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+def conn_params() -> dict:
+    """
+    libpq connection parameters from PG* env vars (shared with async_ingest.py).
+    """
+    return dict(
         host=os.getenv("PGHOST", "localhost"),
         port=int(os.getenv("PGPORT", "5432")),
         dbname=os.getenv("PGDATABASE", "rg_warehouse"),
         user=os.getenv("PGUSER", "rg_user"),
         password=os.getenv("PGPASSWORD", "rg_pass"),
-        cursor_factory=RealDictCursor,
     )
+
+def _conn_kwargs() -> dict:
+    return dict(conn_params(), cursor_factory=RealDictCursor)
+
+def get_conn():
+    return psycopg2.connect(**_conn_kwargs())
+
+def _pool_and_slots():
+    global _pool, _pool_slots, _pool_pid
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            _pool = ThreadedConnectionPool(POOL_MIN_CONN, POOL_MAX_CONN, **_conn_kwargs())
+            _pool_slots = threading.BoundedSemaphore(POOL_MAX_CONN)
+            _pool_pid = os.getpid()
+        return _pool, _pool_slots
+
+def get_pool() -> ThreadedConnectionPool:
+    """
+    Process-wide connection pool, created on first use.
+    A forked child gets its own pool instead of sharing the parent's sockets.
+    """
+    return _pool_and_slots()[0]
+
+@contextmanager
+def pooled_conn():
+    """
+    Borrow a pooled connection; commits on success, rolls back on error.
+    Waits while all POOL_MAX_CONN connections are borrowed (getconn() would
+    raise PoolError instead).
+    """
+    pool, slots = _pool_and_slots()
+    slots.acquire()
+    try:
+        conn = pool.getconn()
+        try:
+            with conn:
+                yield conn
+        finally:
+            pool.putconn(conn, close=bool(conn.closed))
+    finally:
+        slots.release()
+
+def close_pool():
+    global _pool, _pool_slots, _pool_pid
+    with _pool_lock:
+        if _pool is not None and _pool_pid == os.getpid():
+            _pool.closeall()
+        _pool = None
+        _pool_slots = None
+        _pool_pid = None
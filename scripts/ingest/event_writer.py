@@ -0,0 +1,205 @@
+import atexit
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from . import insert_billing_events_batch as billing_batch
+from . import insert_payment_events_batch as payment_batch
+from . import insert_product_events_batch as product_batch
+from .copy_loader import insert_values
+from .db import pooled_conn
+from .metrics import record_batch
+from .payload import resolve_payload_mode
+
+# Per-table row prep, shared with the batch inserters
+_TABLES = {
+    "billing_events": billing_batch._prep,
+    "payment_events": payment_batch._prep,
+    "product_events": product_batch._prep,
+}
+
+DEFAULT_MAX_ROWS = 500
+DEFAULT_MAX_AGE_S = 1.0
+DEFAULT_MAX_BUFFER_ROWS = 50_000  # write() raises once this many rows are unsent
+DEFAULT_MAX_RETRIES = 5  # failed flushes in a row before the batch is dropped
+RETRY_BACKOFF_S = 0.5  # first wait after a failed flush; doubles per failure
+RETRY_BACKOFF_MAX_S = 30.0
+
+
+class BufferedEventWriter:
+    """
+    Collects single events into micro-batches for one bronze table.
+
+    A batch is written over a pooled connection when it reaches max_rows events
+    or when its oldest event is older than max_age_s (checked on write and by a
+    background thread). Call flush() to force a write and close() when done.
+
+    A failed batch goes back into the buffer. Automatic flushes then wait with
+    exponential backoff (RETRY_BACKOFF_S up to RETRY_BACKOFF_MAX_S); after
+    max_retries failures in a row the batch is dropped with a warning and the
+    error raised. While max_buffer_rows rows are unsent, write() raises
+    BufferError instead of growing the buffer.
+    """
+
+    def __init__(
+        self,
+        table: str,
+        max_rows: int = DEFAULT_MAX_ROWS,
+        max_age_s: float = DEFAULT_MAX_AGE_S,
+        payload_mode: Optional[str] = None,
+        max_buffer_rows: int = DEFAULT_MAX_BUFFER_ROWS,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+    ):
+        if table not in _TABLES:
+            raise ValueError(f"unknown table: {table} (expected one of {list(_TABLES)})")
+        self.table = table
+        self.max_rows = max_rows
+        self.max_age_s = max_age_s
+        self.payload_mode = resolve_payload_mode(payload_mode)
+        self.max_buffer_rows = max_buffer_rows
+        self.max_retries = max_retries
+        self.dropped = 0
+
+        self._prep = _TABLES[table]
+        self._buffer: List[Dict[str, Any]] = []
+        self._oldest: Optional[float] = None
+        self._in_flight = 0
+        self._failures = 0
+        self._retry_at = 0.0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._closed = False
+        self._error: Optional[BaseException] = None
+
+        self._stop = threading.Event()
+        self._timer = threading.Thread(target=self._age_loop, name=f"writer-{table}", daemon=True)
+        self._timer.start()
+
+    def write(self, event: Dict[str, Any]) -> None:
+        self._raise_pending_error()
+        if self._closed:
+            raise RuntimeError(f"writer for {self.table} is closed")
+
+        with self._lock:
+            unsent = len(self._buffer) + self._in_flight
+            if unsent >= self.max_buffer_rows:
+                raise BufferError(
+                    f"writer for {self.table} holds {unsent:,} unsent rows "
+                    f"(max_buffer_rows={self.max_buffer_rows:,}); the database is down or not keeping up"
+                )
+            self._buffer.append(self._prep(event, self.payload_mode))
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            due = (len(self._buffer) >= self.max_rows or self._is_stale()) and not self._backing_off()
+
+        if due:
+            self.flush()
+
+    def flush(self) -> int:
+        """
+        Write everything buffered so far. Returns the number of rows sent.
+        """
+        with self._flush_lock:
+            with self._lock:
+                rows, self._buffer = self._buffer, []
+                self._oldest = None
+                self._in_flight = len(rows)
+            if not rows:
+                return 0
+            t0 = time.perf_counter()
+            try:
+                with pooled_conn() as conn:
+                    with conn.cursor() as cur:
+                        inserted = insert_values(cur, self.table, rows, page_size=len(rows))
+            except Exception as exc:
+                with self._lock:
+                    self._in_flight = 0
+                    self._failures += 1
+                    if self._failures > self.max_retries:
+                        self._failures = 0
+                        self._retry_at = 0.0
+                        self.dropped += len(rows)
+                        print(
+                            f"⚠️ {self.table}: dropping {len(rows):,} rows after {self.max_retries + 1} failed flushes: "
+                            f"{type(exc).__name__}: {exc}"
+                        )
+                        raise
+                    # put rows back so a later flush can retry them, after a backoff
+                    self._buffer = rows + self._buffer
+                    self._oldest = self._oldest or time.monotonic()
+                    backoff = min(RETRY_BACKOFF_S * 2 ** (self._failures - 1), RETRY_BACKOFF_MAX_S)
+                    self._retry_at = time.monotonic() + backoff
+                raise
+            with self._lock:
+                self._in_flight = 0
+                self._failures = 0
+                self._retry_at = 0.0
+            # rows were prepped on write(), so all of the flush is server time (statement + commit)
+            record_batch(self.table, "buffered", len(rows), inserted, 0.0, time.perf_counter() - t0, 2)
+            return len(rows)
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._stop.set()
+        self._timer.join()
+        self._closed = True
+        self.flush()
+        self._raise_pending_error()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _is_stale(self) -> bool:
+        return self._oldest is not None and time.monotonic() - self._oldest >= self.max_age_s
+
+    def _backing_off(self) -> bool:
+        return time.monotonic() < self._retry_at
+
+    def _age_loop(self):
+        while not self._stop.wait(self.max_age_s / 2):
+            with self._lock:
+                due = self._is_stale() and not self._backing_off()
+            if due:
+                try:
+                    self.flush()
+                except Exception as exc:
+                    # surfaced to the producer on its next write/flush/close
+                    self._error = exc
+
+    def _raise_pending_error(self):
+        if self._error is not None:
+            exc, self._error = self._error, None
+            raise exc
+
+
+_writers: Dict[str, BufferedEventWriter] = {}
+_writers_lock = threading.Lock()
+
+def get_writer(table: str) -> BufferedEventWriter:
+    """
+    Process-wide writer per table, used by the single-event insert API.
+    """
+    with _writers_lock:
+        w = _writers.get(table)
+        if w is None or w._closed:
+            w = BufferedEventWriter(table)
+            _writers[table] = w
+        return w
+
+def flush_all() -> int:
+    with _writers_lock:
+        writers = list(_writers.values())
+    return sum(w.flush() for w in writers if not w._closed)
+
+def close_all() -> None:
+    with _writers_lock:
+        writers = list(_writers.values())
+        _writers.clear()
+    for w in writers:
+        w.close()
+
+atexit.register(close_all)
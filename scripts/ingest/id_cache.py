@@ -0,0 +1,96 @@
+"""
+Optional client-side cache of event ids already committed to bronze.
+
+With natural event ids (see event_ids.py) a rerun regenerates the same ids, so
+the batch inserters can drop events the cache has seen before sending them,
+instead of shipping every row to Postgres just to hit ON CONFLICT.
+
+One SQLite file per bronze table under EVENT_ID_CACHE_DIR; the cache is off when
+that env var is unset. Ids are added only after their chunk commits, so a
+crash can leave the cache behind bronze but never ahead of it. After truncating
+or deleting bronze rows, call clear() (or delete the directory), or the skipped
+events will never be reloaded.
+"""
+import os
+import sqlite3
+from typing import Any, Dict, List, Optional, Sequence
+
+EVENT_ID_CACHE_DIR = os.getenv("EVENT_ID_CACHE_DIR") or None
+
+_LOOKUP_BATCH = 500  # ids per IN (...) query; stays under SQLite's variable limit
+
+
+class LoadedIdCache:
+    """
+    Set of committed event ids for one bronze table. Not shared between threads:
+    open one per loader (the SQLite file handles concurrent processes).
+    """
+
+    def __init__(self, table: str, cache_dir: Optional[str] = None):
+        cache_dir = cache_dir or EVENT_ID_CACHE_DIR
+        if not cache_dir:
+            raise ValueError("no cache directory: pass cache_dir or set EVENT_ID_CACHE_DIR")
+        os.makedirs(cache_dir, exist_ok=True)
+        self.table = table
+        self.path = os.path.join(cache_dir, f"{table}.sqlite")
+        self._db = sqlite3.connect(self.path, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS loaded_ids (event_id TEXT PRIMARY KEY) WITHOUT ROWID")
+        self._db.commit()
+
+    def filter_new(self, events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Events whose event_id is not in the cache, in their original order.
+        """
+        ids = [e["event_id"] for e in events]
+        seen = set()
+        for lo in range(0, len(ids), _LOOKUP_BATCH):
+            batch = ids[lo:lo + _LOOKUP_BATCH]
+            rows = self._db.execute(
+                f"SELECT event_id FROM loaded_ids WHERE event_id IN ({', '.join('?' * len(batch))})", batch,
+            )
+            seen.update(r[0] for r in rows)
+        if not seen:
+            return events
+        return [e for e in events if e["event_id"] not in seen]
+
+    def add(self, event_ids: Sequence[str]) -> None:
+        self._db.executemany("INSERT OR IGNORE INTO loaded_ids (event_id) VALUES (?)", ((i,) for i in event_ids))
+        self._db.commit()
+
+    def __len__(self) -> int:
+        return self._db.execute("SELECT count(*) FROM loaded_ids").fetchone()[0]
+
+    def clear(self) -> None:
+        self._db.execute("DELETE FROM loaded_ids")
+        self._db.commit()
+
+    def close(self) -> None:
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def open_cache(table: str) -> Optional[LoadedIdCache]:
+    """
+    Cache for table when EVENT_ID_CACHE_DIR is set, else None.
+    """
+    return LoadedIdCache(table) if EVENT_ID_CACHE_DIR else None
+
+
+def clear(tables: Optional[Sequence[str]] = None, cache_dir: Optional[str] = None) -> None:
+    """
+    Forget cached ids (all tables by default); call after truncating bronze.
+    """
+    cache_dir = cache_dir or EVENT_ID_CACHE_DIR
+    if not cache_dir or not os.path.isdir(cache_dir):
+        return
+    if tables is None:
+        tables = [f[:-len(".sqlite")] for f in os.listdir(cache_dir) if f.endswith(".sqlite")]
+    for table in tables:
+        with LoadedIdCache(table, cache_dir) as cache:
+            cache.clear()
@@ -1,8 +1,11 @@
-from typing import Dict, Any, Iterable, List
+from typing import Dict, Any, Iterable, Optional
 import math
 
-from psycopg2.extras import Json, execute_batch
+from psycopg2.extras import Json
+from .batching import DEFAULT_CHUNK_SIZE, iter_chunks, load_chunk
 from .db import get_conn
+from .id_cache import open_cache
+from .payload import apply_payload_mode, resolve_payload_mode
 
 SQL = """
 INSERT INTO bronze.billing_events (
@@ -14,9 +17,11 @@ INSERT INTO bronze.billing_events (
   %(customer_id)s, %(user_id)s, %(subscription_id)s, %(invoice_id)s,
   %(plan_id)s, %(old_plan_id)s, %(new_plan_id)s, %(amount_usd)s, %(raw_payload)s
 )
-ON CONFLICT (event_id) DO NOTHING;
+ON CONFLICT (event_id, event_ts) DO NOTHING;
 """
 
+LOAD_METHODS = ("execute_batch", "execute_values", "copy")
+
 def _clean_value(v):
   # Convert NaN to None so JSON is valid (Postgres JSON does not allow NaN)
   if v is None:
@@ -28,16 +33,44 @@ def _clean_value(v):
 def _clean_dict(d: Dict[str, Any]) -> Dict[str, Any]:
   return {k: _clean_value(v) for k, v in d.items()}
 
-def _prep(e: Dict[str, Any]) -> Dict[str, Any]:
+def _prep(e: Dict[str, Any], payload_mode: str = "full") -> Dict[str, Any]:
   e = dict(e)
-  rp = e.get("raw_payload")
-  if rp is not None:
-    e["raw_payload"] = Json(_clean_dict(rp))
+  rp = apply_payload_mode("billing_events", e.get("raw_payload"), payload_mode)
+  e["raw_payload"] = Json(_clean_dict(rp)) if rp is not None else None
   return e
 
-def insert_billing_events_batch(events: Iterable[Dict[str, Any]], page_size: int = 5000) -> int:
-  events_list: List[Dict[str, Any]] = [_prep(e) for e in events]
-  with get_conn() as conn:
-    with conn.cursor() as cur:
-      execute_batch(cur, SQL, events_list, page_size=page_size)
-  return len(events_list)
+def insert_billing_events_batch(
+  events: Iterable[Dict[str, Any]],
+  page_size: int = 5000,
+  method: str = "execute_batch",
+  chunk_size: int = DEFAULT_CHUNK_SIZE,
+  payload_mode: Optional[str] = None,
+) -> int:
+  """
+  Consumes events lazily and commits every chunk_size rows, so any iterator
+  (e.g. a generator) can be loaded with bounded memory.
+
+  method="execute_batch": one parameterized INSERT per row (original path).
+  method="execute_values": multi-row INSERT ... RETURNING, so inserted rows are counted.
+  method="copy": COPY into a staging table, then merge with ON CONFLICT DO NOTHING.
+  payload_mode: raw_payload policy ("full", "extras-only", "none"); defaults to RAW_PAYLOAD_MODE.
+  When EVENT_ID_CACHE_DIR is set, events already loaded by an earlier run are
+  skipped before sending (see id_cache.py).
+  Returns rows sent; inserted rows, conflicts and timings per chunk go to
+  ingest metrics (see metrics.py).
+  """
+  if method not in LOAD_METHODS:
+    raise ValueError(f"unknown load method: {method} (expected one of {LOAD_METHODS})")
+  payload_mode = resolve_payload_mode(payload_mode)
+
+  total = 0
+  id_cache = open_cache("billing_events")
+  try:
+    with get_conn() as conn:
+      with conn.cursor() as cur:
+        for chunk in iter_chunks(events, chunk_size):
+          total += load_chunk(conn, cur, "billing_events", chunk, method, SQL, _prep, page_size, payload_mode, id_cache)
+  finally:
+    if id_cache is not None:
+      id_cache.close()
+  return total
@@ -1,6 +1,9 @@
 from typing import Dict, Any
 from psycopg2.extras import Json
-from .db import get_conn
+from .db import pooled_conn
+from .event_ids import make_event_id
+from .event_writer import get_writer
+from .payload import apply_payload_mode, resolve_payload_mode
 
 SQL = """
 INSERT INTO bronze.payment_events (
@@ -12,15 +15,29 @@ INSERT INTO bronze.payment_events (
   %(customer_id)s, %(user_id)s, %(invoice_id)s, %(payment_id)s, %(attempt_number)s,
   %(amount_usd)s, %(status)s, %(failure_reason)s, %(raw_payload)s
 )
-ON CONFLICT (event_id) DO NOTHING;
+ON CONFLICT (event_id, event_ts) DO NOTHING;
 """
 
-def insert_payment_event(event: Dict[str, Any]) -> int:
+def insert_payment_event(event: Dict[str, Any], buffered: bool = False) -> int:
+    """
+    buffered=False: insert now over a pooled connection, returns rows inserted (0 on conflict).
+    buffered=True: hand the event to the process-wide micro-batch writer and return 0;
+    it is written on the next size/age flush (see event_writer.flush_all / close_all).
+
+    A missing event_id is filled with a time-ordered id derived from event_ts.
+    """
+    if not event.get("event_id"):
+        event = dict(event, event_id=make_event_id(event.get("event_ts")))
+
+    if buffered:
+        get_writer("payment_events").write(event)
+        return 0
+
     event = dict(event)
-    if event.get("raw_payload") is not None:
-        event["raw_payload"] = Json(event["raw_payload"])
+    payload = apply_payload_mode("payment_events", event.get("raw_payload"), resolve_payload_mode())
+    event["raw_payload"] = Json(payload) if payload is not None else None
 
-    with get_conn() as conn:
+    with pooled_conn() as conn:
         with conn.cursor() as cur:
             cur.execute(SQL, event)
             return cur.rowcount
@@ -0,0 +1,147 @@
+"""
+Ingest metrics for the bronze loaders.
+
+Every committed chunk produces one batch record:
+
+    {"table", "method", "rows_sent", "rows_inserted", "conflicts",
+     "rows_skipped", "prep_s", "server_s", "round_trips"}
+
+prep_s is client-side row preparation (payload trimming, Json wrapping, COPY
+buffer encoding); server_s is time spent waiting on Postgres, including the
+commit. rows_inserted comes from RETURNING (execute_values) or the merge
+rowcount (copy); execute_batch cannot report it, so it is None there and the
+batch's conflicts are unknown. rows_skipped counts events dropped before
+sending because the loaded-id cache already held them (see id_cache.py).
+
+Records are aggregated per table in METRICS and passed to any hooks added with
+add_hook(), e.g. to log slow batches or feed a dashboard:
+
+    add_hook(lambda b: b["conflicts"] and print(b))
+    insert_payment_events_batch(events, method="copy")
+    print_report()
+"""
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+BatchHook = Callable[[Dict[str, Any]], None]
+
+_COUNTERS = ("batches", "rows_sent", "rows_inserted", "conflicts", "rows_skipped", "rows_uncounted", "round_trips")
+_TIMERS = ("prep_s", "server_s")
+
+
+class IngestMetrics:
+    """
+    Thread-safe per-table totals of batch records.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tables: Dict[str, Dict[str, Any]] = {}
+
+    def record(self, batch: Dict[str, Any]) -> None:
+        with self._lock:
+            t = self._tables.setdefault(batch["table"], {
+                **{k: 0 for k in _COUNTERS}, **{k: 0.0 for k in _TIMERS}, "methods": set(),
+            })
+            t["batches"] += 1
+            t["rows_sent"] += batch["rows_sent"]
+            t["rows_skipped"] += batch["rows_skipped"]
+            t["round_trips"] += batch["round_trips"]
+            t["prep_s"] += batch["prep_s"]
+            t["server_s"] += batch["server_s"]
+            t["methods"].add(batch["method"])
+            if batch["rows_inserted"] is None:
+                t["rows_uncounted"] += batch["rows_sent"]
+            else:
+                t["rows_inserted"] += batch["rows_inserted"]
+                t["conflicts"] += batch["conflicts"]
+
+    def report(self) -> Dict[str, Dict[str, Any]]:
+        """
+        {table: totals}, plus rows/sec over prep + server time and the share of
+        that time spent on the server.
+        """
+        with self._lock:
+            out = {}
+            for table, t in self._tables.items():
+                r = {k: v for k, v in t.items() if k != "methods"}
+                r["methods"] = sorted(t["methods"])
+                busy = t["prep_s"] + t["server_s"]
+                r["rows_per_sec"] = t["rows_sent"] / busy if busy else 0.0
+                r["server_share"] = t["server_s"] / busy if busy else 0.0
+                out[table] = r
+            return out
+
+    def reset(self) -> None:
+        with self._lock:
+            self._tables.clear()
+
+
+METRICS = IngestMetrics()
+
+_hooks: List[BatchHook] = []
+_hooks_lock = threading.Lock()
+
+
+def add_hook(fn: BatchHook) -> BatchHook:
+    """
+    Call fn(batch) after every committed batch. Returns fn so it can be removed later.
+    """
+    with _hooks_lock:
+        _hooks.append(fn)
+    return fn
+
+
+def remove_hook(fn: BatchHook) -> None:
+    with _hooks_lock:
+        if fn in _hooks:
+            _hooks.remove(fn)
+
+
+def record_batch(
+    table: str,
+    method: str,
+    rows_sent: int,
+    rows_inserted: Optional[int],
+    prep_s: float,
+    server_s: float,
+    round_trips: int,
+    rows_skipped: int = 0,
+) -> Dict[str, Any]:
+    batch = {
+        "table": table,
+        "method": method,
+        "rows_sent": rows_sent,
+        "rows_inserted": rows_inserted,
+        "conflicts": None if rows_inserted is None else rows_sent - rows_inserted,
+        "rows_skipped": rows_skipped,
+        "prep_s": prep_s,
+        "server_s": server_s,
+        "round_trips": round_trips,
+    }
+    METRICS.record(batch)
+    with _hooks_lock:
+        hooks = list(_hooks)
+    for fn in hooks:
+        try:
+            fn(batch)
+        except Exception as exc:
+            # a broken hook must not fail a load that has already committed
+            print(f"⚠️ ingest metrics hook {fn!r} failed: {type(exc).__name__}: {exc}")
+    return batch
+
+
+def print_report(report: Optional[Dict[str, Dict[str, Any]]] = None):
+    report = METRICS.report() if report is None else report
+    print(
+        f"{'table':<16} {'batches':>7} {'sent':>12} {'inserted':>12} {'conflicts':>10} {'skipped':>10} "
+        f"{'trips':>7} {'prep s':>8} {'server s':>9} {'rows/sec':>11}"
+    )
+    for table, r in report.items():
+        inserted = f"{r['rows_inserted']:,}" + ("+?" if r["rows_uncounted"] else "")
+        print(
+            f"{table:<16} {r['batches']:>7,} {r['rows_sent']:>12,} {inserted:>12} {r['conflicts']:>10,} {r['rows_skipped']:>10,} "
+            f"{r['round_trips']:>7,} {r['prep_s']:>8.1f} {r['server_s']:>9.1f} {r['rows_per_sec']:>11,.0f}"
+        )
+        if r["rows_uncounted"]:
+            print(f"  {r['rows_uncounted']:,} rows loaded via execute_batch have no inserted count")
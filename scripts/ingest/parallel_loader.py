@@ -0,0 +1,211 @@
+import multiprocessing as mp
+import queue
+import threading
+import time
+import zlib
+from typing import Any, Dict, Iterable, List
+
+from .batching import DEFAULT_CHUNK_SIZE
+from .insert_billing_events_batch import insert_billing_events_batch
+from .insert_payment_events_batch import insert_payment_events_batch
+from .insert_product_events_batch import insert_product_events_batch
+from .metrics import add_hook, remove_hook
+
+INSERTERS = {
+    "billing_events": insert_billing_events_batch,
+    "payment_events": insert_payment_events_batch,
+    "product_events": insert_product_events_batch,
+}
+
+SHARD_KEYS = ("event_id", "customer_id")
+
+DEFAULT_WORKERS = 4
+# Events handed to a worker per queue message, and messages buffered per worker
+SEND_BATCH = 2000
+QUEUE_DEPTH = 8
+
+# spawn, not fork: load_tables_parallel starts workers from several feeder threads
+_CTX = mp.get_context("spawn")
+
+
+def shard_of(event: Dict[str, Any], key: str, n_shards: int) -> int:
+    # crc32 is stable across processes/runs (unlike hash() with PYTHONHASHSEED)
+    return zlib.crc32(str(event[key]).encode()) % n_shards
+
+
+def _describe(exc: BaseException) -> str:
+    lines = str(exc).strip().splitlines()
+    return f"{type(exc).__name__}: {lines[0] if lines else ''}"
+
+
+def _drain(q, counts: Dict[str, int]) -> Iterable[Dict[str, Any]]:
+    while True:
+        batch = q.get()
+        if batch is None:
+            return
+        counts["received"] += len(batch)
+        yield from batch
+
+
+def _shard_worker(table: str, shard: int, q, results, method: str, page_size: int, chunk_size: int):
+    t0 = time.perf_counter()
+    result = {"table": table, "shard": shard, "rows": 0, "rows_lost": 0, "seconds": 0.0, "error": None}
+    counts = {"received": 0, "committed": 0, "skipped": 0}
+
+    def on_batch(batch):
+        # one record per committed chunk, so a failed shard still knows what landed
+        if batch["table"] == table:
+            counts["committed"] += batch["rows_sent"]
+            counts["skipped"] += batch["rows_skipped"]
+
+    hook = add_hook(on_batch)
+    try:
+        result["rows"] = INSERTERS[table](_drain(q, counts), page_size=page_size, method=method, chunk_size=chunk_size)
+    except Exception as exc:
+        result["error"] = _describe(exc)
+        result["rows"] = counts["committed"]
+        # keep consuming so the producer never blocks on a failed shard
+        for _ in _drain(q, counts):
+            pass
+        # the failed chunk plus everything queued after it
+        result["rows_lost"] = counts["received"] - counts["committed"] - counts["skipped"]
+    finally:
+        remove_hook(hook)
+    result["seconds"] = time.perf_counter() - t0
+    results.put(result)
+
+
+def _send(q, proc, item) -> bool:
+    while True:
+        try:
+            q.put(item, timeout=1.0)
+            return True
+        except queue.Full:
+            if not proc.is_alive():
+                return False
+
+
+def load_sharded(
+    table: str,
+    events: Iterable[Dict[str, Any]],
+    n_workers: int = DEFAULT_WORKERS,
+    shard_key: str = "event_id",
+    method: str = "copy",
+    page_size: int = 5000,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> List[Dict[str, Any]]:
+    """
+    Load one event stream into bronze.<table> with n_workers processes,
+    each on its own connection and committing its own chunks.
+
+    Events are routed by crc32(shard_key) so all events for a key land in the
+    same shard. A failing shard reports its error and the others keep loading.
+    Returns one result dict per shard: rows committed (before the error, for a
+    failed shard) and rows_lost, the events routed to it that were not loaded.
+    """
+    if table not in INSERTERS:
+        raise ValueError(f"unknown table: {table} (expected one of {list(INSERTERS)})")
+    if shard_key not in SHARD_KEYS:
+        raise ValueError(f"unknown shard key: {shard_key} (expected one of {SHARD_KEYS})")
+
+    results = _CTX.Queue()
+    queues = [_CTX.Queue(maxsize=QUEUE_DEPTH) for _ in range(n_workers)]
+    procs = [
+        _CTX.Process(
+            target=_shard_worker,
+            args=(table, i, queues[i], results, method, page_size, chunk_size),
+            name=f"{table}-shard-{i}",
+        )
+        for i in range(n_workers)
+    ]
+    for p in procs:
+        p.start()
+
+    alive = [True] * n_workers
+    unsent = [0] * n_workers  # events for shards whose worker died
+    buffers: List[List[Dict[str, Any]]] = [[] for _ in range(n_workers)]
+    for e in events:
+        i = shard_of(e, shard_key, n_workers)
+        if not alive[i]:
+            unsent[i] += 1
+            continue
+        buffers[i].append(e)
+        if len(buffers[i]) >= SEND_BATCH:
+            alive[i] = _send(queues[i], procs[i], buffers[i])
+            if not alive[i]:
+                unsent[i] += len(buffers[i])
+            buffers[i] = []
+
+    for i in range(n_workers):
+        if alive[i] and buffers[i]:
+            alive[i] = _send(queues[i], procs[i], buffers[i])
+            if not alive[i]:
+                unsent[i] += len(buffers[i])
+        if alive[i]:
+            _send(queues[i], procs[i], None)
+
+    by_shard = {}
+    while len(by_shard) < n_workers:
+        try:
+            r = results.get(timeout=1.0)
+        except queue.Empty:
+            if not any(p.is_alive() for p in procs):
+                break
+            continue
+        by_shard[r["shard"]] = r
+    for p in procs:
+        p.join()
+
+    out = []
+    for i, p in enumerate(procs):
+        r = by_shard.get(i) or {
+            "table": table, "shard": i, "rows": 0, "rows_lost": None, "seconds": 0.0,
+            "error": f"worker exited with code {p.exitcode}",
+        }
+        if r["rows_lost"] is not None:
+            r["rows_lost"] += unsent[i]
+        r["rows_per_sec"] = r["rows"] / r["seconds"] if r["seconds"] else 0.0
+        out.append(r)
+    return out
+
+
+def load_tables_parallel(
+    streams: Dict[str, Iterable[Dict[str, Any]]],
+    n_workers: int = DEFAULT_WORKERS,
+    shard_key: str = "event_id",
+    method: str = "copy",
+    page_size: int = 5000,
+) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Load several tables at the same time, e.g. {"billing_events": ..., "payment_events": ...}.
+    Each table gets its own feeder thread and its own n_workers processes.
+    """
+    report: Dict[str, List[Dict[str, Any]]] = {}
+
+    def run(table, events):
+        try:
+            report[table] = load_sharded(table, events, n_workers, shard_key, method, page_size)
+        except Exception as exc:
+            report[table] = [{"table": table, "shard": None, "rows": 0, "rows_lost": None, "seconds": 0.0,
+                              "rows_per_sec": 0.0, "error": _describe(exc)}]
+
+    threads = [threading.Thread(target=run, args=(t, ev), name=f"feed-{t}") for t, ev in streams.items()]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return report
+
+
+def print_report(report: Dict[str, List[Dict[str, Any]]]):
+    print(f"{'table':<16} {'shard':>5} {'rows':>12} {'seconds':>9} {'rows/sec':>12}  status")
+    for table, shards in report.items():
+        for r in shards:
+            status = "ok" if r["error"] is None else f"FAILED: {r['error']}"
+            if r["error"] is not None:
+                lost = "unknown" if r["rows_lost"] is None else f"{r['rows_lost']:,}"
+                status += f" ({lost} events not loaded)"
+            print(f"{table:<16} {str(r['shard']):>5} {r['rows']:>12,} {r['seconds']:>9.1f} {r['rows_per_sec']:>12,.0f}  {status}")
+        total_rows = sum(r["rows"] for r in shards)
+        wall = max((r["seconds"] for r in shards), default=0.0)
+        print(f"{table:<16} {'all':>5} {total_rows:>12,} {wall:>9.1f} {total_rows / wall if wall else 0.0:>12,.0f}")
@@ -0,0 +1,38 @@
+import os
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+# What ends up in bronze.<table>.raw_payload:
+# "full":        the payload as generated (previous behavior)
+# "extras-only": only keys that are not already typed columns of the table
+# "none":        always NULL
+PAYLOAD_MODES = ("full", "extras-only", "none")
+PAYLOAD_MODE = os.getenv("RAW_PAYLOAD_MODE", "full")
+
+
+@lru_cache(maxsize=None)
+def typed_columns(table: str) -> frozenset:
+    # imported here: copy_loader itself applies the payload mode
+    from .copy_loader import COLUMNS
+    return frozenset(c for c in COLUMNS[table] if c != "raw_payload")
+
+
+def resolve_payload_mode(mode: Optional[str] = None) -> str:
+    mode = mode or PAYLOAD_MODE
+    if mode not in PAYLOAD_MODES:
+        raise ValueError(f"unknown payload mode: {mode} (expected one of {PAYLOAD_MODES})")
+    return mode
+
+
+def apply_payload_mode(table: str, payload: Optional[Dict[str, Any]], mode: str) -> Optional[Dict[str, Any]]:
+    """
+    Trim one raw_payload for the given (already resolved) mode.
+    An extras-only payload with nothing left is stored as NULL.
+    """
+    if payload is None or mode == "full":
+        return payload
+    if mode == "none":
+        return None
+    typed = typed_columns(table)
+    extras = {k: v for k, v in payload.items() if k not in typed}
+    return extras or None
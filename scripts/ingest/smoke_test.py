@@ -1,10 +1,12 @@
-import uuid
 from datetime import datetime, timezone
+from scripts.ingest.event_ids import make_event_id
+from scripts.ingest.event_writer import flush_all
 from scripts.ingest.insert_product_event import insert_product_event
 
+event_ts = datetime.now(timezone.utc)
 event = {
-    "event_id": str(uuid.uuid4()),
-    "event_ts": datetime.now(timezone.utc),
+    "event_id": make_event_id(event_ts),
+    "event_ts": event_ts,
     "event_name": "user_signed_up",
     "event_version": 1,
     "source_system": "product_app",
@@ -26,3 +28,8 @@ event = {
 
 print("Inserted rows:", insert_product_event(event))
 print("Inserted rows again (should be 0):", insert_product_event(event))  # duplicate
+
+# Buffered path: queued in the process-wide writer, written on flush
+buffered_event = dict(event, event_id=make_event_id(event_ts))
+insert_product_event(buffered_event, buffered=True)
+print("Buffered rows flushed:", flush_all())
@@ -0,0 +1,277 @@
+import os
+from typing import Iterator, List, Optional
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # CSV-only installs
+    pa = None
+    pq = None
+
+from .config import BASE_TABLE_FORMAT, WRITE_CSV_EXPORT
+
+OUT_DIR = "scripts/sdv/outputs"
+
+# Explicit column types for the base tables written by train_and_generate.
+# "date" is stored as a Parquet date32, "category" as a dictionary-encoded string.
+SCHEMAS = {
+    "base_customers": {
+        "customer_id": "string",
+        "country": "category",
+        "channel": "category",
+        "signup_date": "date",
+        "plan_id": "category",
+        "team_size": "int32",
+        "industry": "category",
+        "device_preference": "category",
+        "engagement_score": "int16",
+        "churn_propensity": "float64",
+    },
+    "base_users": {
+        "user_id": "string",
+        "customer_id": "string",
+        "user_role": "category",
+        "created_date": "date",
+    },
+    "base_subscriptions": {
+        "subscription_id": "string",
+        "customer_id": "string",
+        "plan_id": "category",
+        "start_date": "date",
+        "status": "category",
+    },
+    "base_invoices_payments": {
+        "invoice_id": "string",
+        "subscription_id": "string",
+        "customer_id": "string",
+        "invoice_date": "date",
+        "plan_id": "category",
+        "country": "category",
+        "channel": "category",
+        "amount_usd": "float64",
+        "attempts": "int8",
+        "final_status": "category",
+        "failure_reason": "category",
+        "refund_flag": "int8",
+        "chargeback_flag": "int8",
+    },
+}
+
+def _arrow_type(kind: str):
+    return {
+        "string": pa.string(),
+        "category": pa.dictionary(pa.int32(), pa.string()),
+        "date": pa.date32(),
+        "int8": pa.int8(),
+        "int16": pa.int16(),
+        "int32": pa.int32(),
+        "float64": pa.float64(),
+    }[kind]
+
+def _csv_dtypes(name: str, columns: Optional[List[str]] = None):
+    schema = SCHEMAS[name]
+    cols = columns or list(schema)
+    dtypes = {c: schema[c] for c in cols if schema[c] in ("string", "category")}
+    dates = [c for c in cols if schema[c] == "date"]
+    return dtypes, dates
+
+def parquet_path(name: str) -> str:
+    return f"{OUT_DIR}/{name}.parquet"
+
+def csv_path(name: str) -> str:
+    return f"{OUT_DIR}/{name}.csv"
+
+def arrow_schema(name: str):
+    return pa.schema([pa.field(col, _arrow_type(kind)) for col, kind in SCHEMAS[name].items()])
+
+def to_arrow(df: pd.DataFrame, name: str):
+    """
+    Coerce a base table to its explicit Arrow schema (dates as date32, low-cardinality as dictionary).
+    """
+    schema = SCHEMAS[name]
+    arrays, fields = [], []
+    for col, kind in schema.items():
+        s = df[col]
+        if kind == "date":
+            arr = pa.array(pd.to_datetime(s), type=pa.timestamp("ns")).cast(pa.date32())
+        elif kind == "category":
+            arr = pa.array(s.astype(object).where(s.notna(), None), type=pa.string()).dictionary_encode()
+        elif kind == "string":
+            arr = pa.array(s.astype(object).where(s.notna(), None), type=pa.string())
+        else:
+            arr = pa.array(s, type=_arrow_type(kind))
+        arrays.append(arr)
+        fields.append(pa.field(col, _arrow_type(kind)))
+    return pa.Table.from_arrays(arrays, schema=pa.schema(fields))
+
+def _remove_stale(name: str, fmt: str) -> None:
+    # a file left by an earlier run in the other format must not be read instead
+    stale = [parquet_path(name)] if fmt == "csv" else ([] if WRITE_CSV_EXPORT else [csv_path(name)])
+    for path in stale:
+        if os.path.exists(path):
+            os.remove(path)
+
+def write_base_table(df: pd.DataFrame, name: str) -> str:
+    """
+    Write a base table in BASE_TABLE_FORMAT (plus a CSV copy when WRITE_CSV_EXPORT).
+    Returns the path of the primary file.
+    """
+    os.makedirs(OUT_DIR, exist_ok=True)
+    fmt = BASE_TABLE_FORMAT
+    if fmt == "parquet" and pq is None:
+        print("⚠️ pyarrow not installed; writing base tables as CSV")
+        fmt = "csv"
+    _remove_stale(name, fmt)
+
+    if fmt == "parquet":
+        pq.write_table(to_arrow(df, name), parquet_path(name))
+        if WRITE_CSV_EXPORT:
+            df.to_csv(csv_path(name), index=False)
+        return parquet_path(name)
+
+    df.to_csv(csv_path(name), index=False)
+    return csv_path(name)
+
+class BaseTableWriter:
+    """
+    Streams a base table to disk chunk by chunk (one Parquet row group, or one CSV
+    append, per write), so tables larger than memory can be written.
+
+        with BaseTableWriter("base_invoices_payments") as w:
+            for chunk in chunks:
+                w.write(chunk)
+    """
+
+    def __init__(self, name: str):
+        os.makedirs(OUT_DIR, exist_ok=True)
+        self.name = name
+        self.rows = 0
+        self.fmt = BASE_TABLE_FORMAT
+        if self.fmt == "parquet" and pq is None:
+            print("⚠️ pyarrow not installed; writing base tables as CSV")
+            self.fmt = "csv"
+        self.path = parquet_path(name) if self.fmt == "parquet" else csv_path(name)
+        _remove_stale(name, self.fmt)
+        self._write_csv = self.fmt == "csv" or WRITE_CSV_EXPORT
+        self._parquet = None
+        self._csv_started = False
+        self._closed = False
+
+    def write(self, df: pd.DataFrame) -> None:
+        if self.fmt == "parquet":
+            table = to_arrow(df, self.name)
+            if self._parquet is None:
+                self._parquet = pq.ParquetWriter(self.path, table.schema)
+            self._parquet.write_table(table)
+        if self._write_csv:
+            df.to_csv(csv_path(self.name), index=False, mode="a" if self._csv_started else "w", header=not self._csv_started)
+            self._csv_started = True
+        self.rows += len(df)
+
+    def close(self) -> str:
+        if self._closed:
+            return self.path
+        self._closed = True
+        if self.fmt == "parquet" and self._parquet is None:
+            # nothing written: still leave an empty, typed file behind
+            self._parquet = pq.ParquetWriter(self.path, arrow_schema(self.name))
+        if self._parquet is not None:
+            self._parquet.close()
+            self._parquet = None
+        return self.path
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+def _use_parquet(name: str) -> bool:
+    # BASE_TABLE_FORMAT decides; the other format is read only when that file is missing
+    if pq is None or not os.path.exists(parquet_path(name)):
+        return False
+    return BASE_TABLE_FORMAT == "parquet" or not os.path.exists(csv_path(name))
+
+def base_table_path(name: str) -> str:
+    """
+    The file read_base_table / iter_base_table read for this table.
+    """
+    return parquet_path(name) if _use_parquet(name) else csv_path(name)
+
+def read_base_table(name: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Read a base table, only the requested columns. Parquet files are memory-mapped;
+    falls back to the CSV export when no Parquet file exists.
+    """
+    if _use_parquet(name):
+        table = pq.read_table(parquet_path(name), columns=columns, memory_map=True)
+        return table.to_pandas(date_as_object=False)
+
+    dtypes, dates = _csv_dtypes(name, columns)
+    return pd.read_csv(csv_path(name), usecols=columns, dtype=dtypes, parse_dates=dates)
+
+def rechunk(frames: Iterator[pd.DataFrame], chunk_size: int, skip: int = 0) -> Iterator[pd.DataFrame]:
+    """
+    Drop the first `skip` rows, then re-cut the frames into chunks of exactly
+    chunk_size rows (the last may be shorter), each with a fresh RangeIndex.
+    """
+    pending: List[pd.DataFrame] = []
+    n = 0
+    for df in frames:
+        if skip:
+            drop = min(skip, len(df))
+            df, skip = df.iloc[drop:], skip - drop
+        if df.empty:
+            continue
+        pending.append(df)
+        n += len(df)
+        while n >= chunk_size:
+            buf = pd.concat(pending, ignore_index=True) if len(pending) > 1 else pending[0]
+            yield buf.iloc[:chunk_size].reset_index(drop=True)
+            rest = buf.iloc[chunk_size:]
+            pending, n = ([rest] if len(rest) else []), len(rest)
+    if n:
+        yield pd.concat(pending, ignore_index=True)
+
+def iter_base_table(
+    name: str,
+    columns: Optional[List[str]] = None,
+    chunk_size: int = 25_000,
+    offset: int = 0,
+) -> Iterator[pd.DataFrame]:
+    """
+    Stream a base table in DataFrame chunks of at most chunk_size rows, starting
+    at row `offset`. Chunks start at offset + k * chunk_size, so a read resumed
+    at a chunk boundary yields the same chunks as the rest of a full read.
+    """
+    if _use_parquet(name):
+        pf = pq.ParquetFile(parquet_path(name), memory_map=True)
+        if offset == 0:
+            for batch in pf.iter_batches(batch_size=chunk_size, columns=columns):
+                yield batch.to_pandas(date_as_object=False)
+            return
+
+        # start at the row group holding `offset` instead of decoding everything before it
+        first, start = pf.num_row_groups, 0
+        for g in range(pf.num_row_groups):
+            rows = pf.metadata.row_group(g).num_rows
+            if start + rows > offset:
+                first = g
+                break
+            start += rows
+        if first == pf.num_row_groups:
+            return
+        batches = pf.iter_batches(batch_size=chunk_size, columns=columns, row_groups=range(first, pf.num_row_groups))
+        yield from rechunk((b.to_pandas(date_as_object=False) for b in batches), chunk_size, offset - start)
+        return
+
+    dtypes, dates = _csv_dtypes(name, columns)
+    reader = pd.read_csv(
+        csv_path(name), usecols=columns, dtype=dtypes, parse_dates=dates, chunksize=chunk_size,
+        skiprows=range(1, offset + 1) if offset else None,
+    )
+    for df in reader:
+        if not df.empty:  # an offset past the end reads as one empty chunk
+            yield df
@@ -1,9 +1,11 @@
 # Central place to control SDV generation scale + time horizon
+import os
 
-TARGET_CUSTOMERS = 25_000
-TARGET_USERS = 130_000  # approx; derived from customers * avg_users_per_customer
+# Scale can be overridden per run (e.g. by scripts/benchmarks/pipeline.py)
+TARGET_CUSTOMERS = int(os.getenv("RG_TARGET_CUSTOMERS", "25000"))
+TARGET_USERS = int(os.getenv("RG_TARGET_USERS", "130000"))  # approx; derived from customers * avg_users_per_customer
 
-MONTHS_HISTORY = 12
+MONTHS_HISTORY = int(os.getenv("RG_MONTHS_HISTORY", "12"))
 
 # Distributions (tweak later if needed)
 PLAN_MIX = {"BASIC": 0.55, "PRO": 0.35, "TEAM": 0.10}
@@ -21,3 +23,15 @@ CHARGEBACK_RATE = 0.0025
 # Retry behavior
 MAX_ATTEMPTS = 4
 RETRY_SUCCESS_PROB = 0.55  # conditional probability of later success after a failure
+
+# Base table storage (see base_tables.py)
+BASE_TABLE_FORMAT = "parquet"  # "parquet" (typed, columnar) or "csv"
+WRITE_CSV_EXPORT = False  # also write base_*.csv next to the Parquet files
+
+# Trained synthesizer cache (see model_cache.py)
+USE_MODEL_CACHE = os.getenv("RG_USE_MODEL_CACHE", "1") != "0"  # benchmarks set RG_USE_MODEL_CACHE=0
+MODEL_CACHE_KEEP = 3  # artifacts kept per model
+
+# Invoice generation (see train_and_generate.iter_base_invoices_payments)
+INVOICE_CHUNK_SIZE = 500_000  # approx invoices per chunk held in memory
+SAMPLING_WORKERS = 1  # processes building/sampling chunks in parallel
@@ -1,45 +1,72 @@
+import argparse
+import os
 import random
-import uuid
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta, timezone
+
+import numpy as np
 import pandas as pd
 
 from .config import PLAN_MIX, CHANNEL_MIX, COUNTRY_MIX, PLAN_PRICE
 
-def weighted_choice(d: dict):
+N_CUSTOMERS_SEED = 3000  # small seed, enough for SDV to learn patterns
+MASTER_SEED = 42
+SHARD_SIZE = 500  # customers per shard; fixed so output does not depend on worker count
+SEED_DIR = "scripts/sdv/outputs"
+
+def weighted_choice(rng: random.Random, d: dict):
     keys = list(d.keys())
     weights = list(d.values())
-    return random.choices(keys, weights=weights, k=1)[0]
+    return rng.choices(keys, weights=weights, k=1)[0]
 
 def month_start(dt: datetime) -> datetime:
     return datetime(dt.year, dt.month, 1, tzinfo=timezone.utc)
 
-def main():
-    random.seed(42)
-    now = datetime.now(timezone.utc)
+def shard_rng(seed: int, shard: int) -> random.Random:
+    """
+    Independent RNG stream for one shard, derived from the master seed.
+    """
+    state = np.random.SeedSequence([seed, shard]).generate_state(4)
+    return random.Random(int.from_bytes(state.tobytes(), "little"))
+
+def shard_ranges(n_customers: int, shard_size: int = SHARD_SIZE):
+    """
+    (shard, first_customer_index, end_customer_index) for fixed customer-ID ranges.
+    """
+    return [
+        (s, lo, min(lo + shard_size, n_customers))
+        for s, lo in enumerate(range(0, n_customers, shard_size))
+    ]
+
+def build_shard(shard: int, lo: int, hi: int, seed: int, now: datetime):
+    """
+    Seed rows for customers lo..hi-1, drawn only from this shard's RNG.
+    Returns (customers, users, subscriptions, invoices_payments) row lists.
+    """
+    rng = shard_rng(seed, shard)
     start = month_start(now - timedelta(days=365))
 
-    n_customers_seed = 3000  # small seed, enough for SDV to learn patterns
     rows_customers = []
     rows_users = []
     rows_subs = []
     rows_invpay = []
 
-    for i in range(n_customers_seed):
+    for i in range(lo, hi):
         customer_id = f"CUST-{i+1:06d}"
-        country = weighted_choice(COUNTRY_MIX)
-        channel = weighted_choice(CHANNEL_MIX)
-        plan_id = weighted_choice(PLAN_MIX)
+        country = weighted_choice(rng, COUNTRY_MIX)
+        channel = weighted_choice(rng, CHANNEL_MIX)
+        plan_id = weighted_choice(rng, PLAN_MIX)
 
         # Correlated attributes
         team_size = (
-            random.randint(1, 5) if plan_id == "BASIC"
-            else random.randint(3, 20) if plan_id == "PRO"
-            else random.randint(10, 80)
+            rng.randint(1, 5) if plan_id == "BASIC"
+            else rng.randint(3, 20) if plan_id == "PRO"
+            else rng.randint(10, 80)
         )
 
-        signup_date = start + timedelta(days=random.randint(0, 330))
+        signup_date = start + timedelta(days=rng.randint(0, 330))
         engagement_score = max(0, min(100,
-            int(random.gauss(55, 18) + (10 if plan_id != "BASIC" else 0) + (5 if channel == "organic" else -3))
+            int(rng.gauss(55, 18) + (10 if plan_id != "BASIC" else 0) + (5 if channel == "organic" else -3))
         ))
 
         # Churn propensity proxy (lower engagement => higher churn)
@@ -54,14 +81,14 @@ def main():
             "signup_date": signup_date.date().isoformat(),
             "plan_id": plan_id,
             "team_size": team_size,
-            "industry": random.choice(["fintech", "ecommerce", "health", "education", "media", "b2b_saas"]),
-            "device_preference": random.choice(["web", "ios", "android"]),
+            "industry": rng.choice(["fintech", "ecommerce", "health", "education", "media", "b2b_saas"]),
+            "device_preference": rng.choice(["web", "ios", "android"]),
             "engagement_score": engagement_score,
             "churn_propensity": round(churn_propensity, 4)
         })
 
         # Users per customer correlated with team_size
-        users_count = max(1, int(random.gauss(team_size * 0.7, 2)))
+        users_count = max(1, int(rng.gauss(team_size * 0.7, 2)))
         users_count = min(users_count, team_size + 5)
 
         for u in range(users_count):
@@ -69,12 +96,13 @@ def main():
             rows_users.append({
                 "user_id": user_id,
                 "customer_id": customer_id,
-                "user_role": random.choice(["admin", "analyst", "member"]),
-                "created_date": (signup_date + timedelta(days=random.randint(0, 15))).date().isoformat()
+                "user_role": rng.choice(["admin", "analyst", "member"]),
+                "created_date": (signup_date + timedelta(days=rng.randint(0, 15))).date().isoformat()
             })
 
-        subscription_id = f"SUB-{uuid.uuid4().hex[:12]}"
-        sub_start = signup_date + timedelta(days=random.randint(0, 7))
+        # 48 random bits from the shard RNG (same shape as uuid4().hex[:12])
+        subscription_id = f"SUB-{rng.getrandbits(48):012x}"
+        sub_start = signup_date + timedelta(days=rng.randint(0, 7))
 
         rows_subs.append({
             "subscription_id": subscription_id,
@@ -106,17 +134,17 @@ def main():
             final_status = "succeeded"
             failure_reason = None
 
-            if random.random() < base_fail:
+            if rng.random() < base_fail:
                 # first attempt fails
-                attempts = random.randint(1, 4)
-                final_status = "failed" if random.random() < 0.35 else "succeeded"
-                failure_reason = random.choice(["insufficient_funds", "card_declined", "expired_card", "network_error", "unknown"])
+                attempts = rng.randint(1, 4)
+                final_status = "failed" if rng.random() < 0.35 else "succeeded"
+                failure_reason = rng.choice(["insufficient_funds", "card_declined", "expired_card", "network_error", "unknown"])
 
-            refund_flag = 1 if (final_status == "succeeded" and random.random() < 0.012) else 0
-            chargeback_flag = 1 if (final_status == "succeeded" and random.random() < 0.0025) else 0
+            refund_flag = 1 if (final_status == "succeeded" and rng.random() < 0.012) else 0
+            chargeback_flag = 1 if (final_status == "succeeded" and rng.random() < 0.0025) else 0
 
             rows_invpay.append({
-                "invoice_id": f"INV-{uuid.uuid4().hex[:12]}",
+                "invoice_id": f"INV-{rng.getrandbits(48):012x}",
                 "subscription_id": subscription_id,
                 "customer_id": customer_id,
                 "invoice_date": inv_date.date().isoformat(),
@@ -128,13 +156,56 @@ def main():
                 "chargeback_flag": int(chargeback_flag),
             })
 
-    seed_dir = "scripts/sdv/outputs"
-    pd.DataFrame(rows_customers).to_csv(f"{seed_dir}/seed_customers.csv", index=False)
-    pd.DataFrame(rows_users).to_csv(f"{seed_dir}/seed_users.csv", index=False)
-    pd.DataFrame(rows_subs).to_csv(f"{seed_dir}/seed_subscriptions.csv", index=False)
-    pd.DataFrame(rows_invpay).to_csv(f"{seed_dir}/seed_invoices_payments.csv", index=False)
+    return rows_customers, rows_users, rows_subs, rows_invpay
+
+def parse_as_of(value: str) -> datetime:
+    """ISO date or timestamp; naive values are taken as UTC."""
+    dt = datetime.fromisoformat(value)
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+def _build_shard(args):
+    return build_shard(*args)
+
+def generate(n_customers: int = N_CUSTOMERS_SEED, workers: int = 1, seed: int = MASTER_SEED, now: datetime = None):
+    """
+    Build all seed tables over a process pool. Shards are fixed customer-ID ranges,
+    each with its own RNG, and are concatenated in shard order, so the result is
+    identical for any number of workers. Pass `now` to pin the history window;
+    otherwise it ends at the current time and differs between runs.
+    """
+    now = now or datetime.now(timezone.utc)
+    tasks = [(shard, lo, hi, seed, now) for shard, lo, hi in shard_ranges(n_customers)]
+
+    if workers <= 1:
+        results = [_build_shard(t) for t in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_build_shard, tasks))
+
+    return tuple(
+        pd.DataFrame([row for shard_rows in results for row in shard_rows[k]])
+        for k in range(4)
+    )
 
-    print("Seed data created in scripts/sdv/outputs/")
+def main():
+    parser = argparse.ArgumentParser(description="Create the SDV seed tables.")
+    parser.add_argument("--customers", type=int, default=N_CUSTOMERS_SEED, help="number of seed customers")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="generator processes")
+    parser.add_argument("--seed", type=int, default=MASTER_SEED, help="master seed for all shard RNGs")
+    parser.add_argument("--as-of", type=parse_as_of, default=os.getenv("RG_SEED_AS_OF"),
+                        help="end of the seed history, e.g. 2025-06-30 (default: $RG_SEED_AS_OF, else now); "
+                             "fix it for output that is identical across runs")
+    args = parser.parse_args()
+
+    customers, users, subs, invpay = generate(args.customers, args.workers, args.seed, now=args.as_of)
+
+    os.makedirs(SEED_DIR, exist_ok=True)
+    customers.to_csv(f"{SEED_DIR}/seed_customers.csv", index=False)
+    users.to_csv(f"{SEED_DIR}/seed_users.csv", index=False)
+    subs.to_csv(f"{SEED_DIR}/seed_subscriptions.csv", index=False)
+    invpay.to_csv(f"{SEED_DIR}/seed_invoices_payments.csv", index=False)
+
+    print(f"Seed data created in {SEED_DIR}/ ({len(customers):,} customers, {len(invpay):,} invoices, {args.workers} worker(s))")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,81 @@
+import hashlib
+import json
+import os
+from typing import Callable, Dict, List, Optional
+
+import sdv
+from sdv.single_table import GaussianCopulaSynthesizer
+
+from .config import MODEL_CACHE_KEEP, USE_MODEL_CACHE
+
+CACHE_DIR = "scripts/sdv/outputs/model_cache"
+CACHE_VERSION = 1  # bump when train_* changes in a way the inputs do not capture
+
+
+def _file_digest(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def cache_key(name: str, inputs: List[str], params: Optional[Dict] = None) -> str:
+    """
+    Hash of the seed files' bytes, the training params and the sdv version.
+    """
+    h = hashlib.sha256()
+    h.update(json.dumps({
+        "name": name,
+        "cache_version": CACHE_VERSION,
+        "sdv_version": sdv.__version__,
+        "params": params or {},
+        "inputs": [_file_digest(p) for p in inputs],
+    }, sort_keys=True, default=str).encode())
+    return h.hexdigest()[:16]
+
+
+def evict(keep: int = MODEL_CACHE_KEEP) -> List[str]:
+    """
+    Delete all but the `keep` most recently used artifacts per model name.
+    """
+    if not os.path.isdir(CACHE_DIR):
+        return []
+    by_name: Dict[str, List[str]] = {}
+    for fname in os.listdir(CACHE_DIR):
+        if fname.endswith(".pkl"):
+            by_name.setdefault(fname.rsplit("-", 1)[0], []).append(os.path.join(CACHE_DIR, fname))
+
+    removed = []
+    for paths in by_name.values():
+        paths.sort(key=os.path.getmtime, reverse=True)
+        for p in paths[keep:]:
+            os.remove(p)
+            removed.append(p)
+    return removed
+
+
+def load_or_train(
+    name: str,
+    inputs: List[str],
+    train: Callable[[], GaussianCopulaSynthesizer],
+    params: Optional[Dict] = None,
+) -> GaussianCopulaSynthesizer:
+    """
+    Reuse the saved synthesizer for these inputs/params, or train and save one.
+    """
+    if not USE_MODEL_CACHE:
+        return train()
+
+    path = os.path.join(CACHE_DIR, f"{name}-{cache_key(name, inputs, params)}.pkl")
+    if os.path.exists(path):
+        print(f"Using cached {name}: {path}")
+        os.utime(path)  # mark as recently used for eviction
+        return GaussianCopulaSynthesizer.load(path)
+
+    synth = train()
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    synth.save(path)
+    for p in evict():
+        print(f"Evicted cached model {p}")
+    return synth
@@ -1,16 +1,22 @@
 import os
-import uuid
-import random
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta, timezone
+from typing import Iterator
+
+import numpy as np
 import pandas as pd
 
+import sdv
 from sdv.metadata import SingleTableMetadata
 from sdv.single_table import GaussianCopulaSynthesizer
 
 from .config import (
     TARGET_CUSTOMERS, TARGET_USERS, MONTHS_HISTORY,
-    PLAN_PRICE
+    PLAN_PRICE, INVOICE_CHUNK_SIZE, SAMPLING_WORKERS
 )
+from .base_tables import BaseTableWriter, write_base_table
+from .model_cache import load_or_train
 
 OUT_DIR = "scripts/sdv/outputs"
 SEED_CUSTOMERS = f"{OUT_DIR}/seed_customers.csv"
@@ -18,19 +24,14 @@ SEED_USERS = f"{OUT_DIR}/seed_users.csv"
 SEED_SUBS = f"{OUT_DIR}/seed_subscriptions.csv"
 SEED_INVPAY = f"{OUT_DIR}/seed_invoices_payments.csv"
 
+RNG_SEED = 42
+
 def ensure_out_dir():
     os.makedirs(OUT_DIR, exist_ok=True)
 
 def month_start(dt: datetime) -> datetime:
     return datetime(dt.year, dt.month, 1, tzinfo=timezone.utc)
 
-def parse_date(s: str) -> datetime:
-    # seed files store ISO dates (YYYY-MM-DD)
-    return datetime.fromisoformat(s).replace(tzinfo=timezone.utc)
-
-def clamp(x, lo, hi):
-    return max(lo, min(hi, x))
-
 def train_customer_synth(seed_customers: pd.DataFrame) -> GaussianCopulaSynthesizer:
     # Train SDV to learn realistic correlations across customer attributes
     metadata = SingleTableMetadata()
@@ -49,9 +50,25 @@ def train_invoice_synth(seed_joined: pd.DataFrame) -> GaussianCopulaSynthesizer:
     synth.fit(seed_joined)
     return synth
 
-def build_base_customers(customer_synth: GaussianCopulaSynthesizer) -> pd.DataFrame:
+def _to_utc_days(values: pd.Series) -> np.ndarray:
+    # ISO strings / timestamps -> datetime64[D] (UTC calendar day); unparseable -> NaT
+    ts = pd.to_datetime(values.astype(str), errors="coerce", utc=True, format="ISO8601")
+    return ts.dt.tz_localize(None).to_numpy().astype("datetime64[D]")
+
+def _offset_days(days: np.ndarray, lo: int, hi: int, rng: np.random.Generator) -> np.ndarray:
+    # each day shifted by a uniform integer lo..hi (inclusive), like random.randint
+    return days + rng.integers(lo, hi + 1, size=len(days)).astype("timedelta64[D]")
+
+def build_base_customers(
+    customer_synth: GaussianCopulaSynthesizer,
+    rng: np.random.Generator = None,
+) -> pd.DataFrame:
+    rng = rng if rng is not None else np.random.default_rng(RNG_SEED)
     now = datetime.now(timezone.utc)
     start = month_start(now - timedelta(days=30 * MONTHS_HISTORY))
+    start_day = np.datetime64(start.date())
+    # datetime(now) - n days falls on (today - n) as a calendar day
+    today = np.datetime64(now.date())
 
     df = customer_synth.sample(TARGET_CUSTOMERS)
 
@@ -61,23 +78,19 @@ def build_base_customers(customer_synth: GaussianCopulaSynthesizer) -> pd.DataFr
 
     # signup_date: clamp into last MONTHS_HISTORY months
     # SDV may generate strings; normalize to date strings
-    signup_dates = []
-    for s in df["signup_date"].astype(str).tolist():
-        try:
-            d = datetime.fromisoformat(s).replace(tzinfo=timezone.utc)
-        except Exception:
-            d = start + timedelta(days=random.randint(0, 30 * MONTHS_HISTORY - 15))
-        if d < start:
-            d = start + timedelta(days=random.randint(0, 10))
-        if d > now:
-            d = now - timedelta(days=random.randint(0, 10))
-        signup_dates.append(d.date().isoformat())
-    df["signup_date"] = signup_dates
+    d = _to_utc_days(df["signup_date"])
+    bad = np.isnat(d)
+    d[bad] = _offset_days(np.full(bad.sum(), start_day), 0, 30 * MONTHS_HISTORY - 15, rng)
+    early = d < start_day
+    d[early] = _offset_days(np.full(early.sum(), start_day), 0, 10, rng)
+    late = d > today
+    d[late] = _offset_days(np.full(late.sum(), today), -10, 0, rng)
+    df["signup_date"] = np.datetime_as_string(d, unit="D")
 
     # Clean numeric fields
     df["team_size"] = df["team_size"].fillna(3).astype(float).round().astype(int).clip(1, 200)
     df["engagement_score"] = df["engagement_score"].fillna(50).astype(float).round().astype(int).clip(0, 100)
-    df["churn_propensity"] = df["churn_propensity"].fillna(0.25).astype(float).apply(lambda x: round(clamp(x, 0.02, 0.75), 4))
+    df["churn_propensity"] = df["churn_propensity"].fillna(0.25).astype(float).clip(0.02, 0.75).round(4)
 
     # Ensure plan_id is one of our known plans
     df["plan_id"] = df["plan_id"].astype(str).str.upper().replace({"BASIC ": "BASIC", "PRO ": "PRO", "TEAM ": "TEAM"})
@@ -91,112 +104,118 @@ def build_base_customers(customer_synth: GaussianCopulaSynthesizer) -> pd.DataFr
     df = df[keep].copy()
     return df
 
-def build_base_subscriptions(base_customers: pd.DataFrame) -> pd.DataFrame:
-    rows = []
-    for _, c in base_customers.iterrows():
-        signup_dt = parse_date(c["signup_date"])
-        start_dt = signup_dt + timedelta(days=random.randint(0, 7))
-        subscription_id = f"SUB-{uuid.uuid4().hex[:12]}"
-        rows.append({
-            "subscription_id": subscription_id,
-            "customer_id": c["customer_id"],
-            "plan_id": c["plan_id"],
-            "start_date": start_dt.date().isoformat(),
-            "status": "active"
-        })
-    return pd.DataFrame(rows)
-
-def build_base_users(base_customers: pd.DataFrame, seed_users: pd.DataFrame) -> pd.DataFrame:
-    # Learn user role proportions from seed (simple but realistic)
-    role_probs = seed_users["user_role"].value_counts(normalize=True).to_dict()
-    roles = list(role_probs.keys())
-    weights = list(role_probs.values())
+def build_base_subscriptions(
+    base_customers: pd.DataFrame,
+    rng: np.random.Generator = None,
+) -> pd.DataFrame:
+    rng = rng if rng is not None else np.random.default_rng(RNG_SEED)
+    start = _offset_days(_to_utc_days(base_customers["signup_date"]), 0, 7, rng)
+    return pd.DataFrame({
+        "subscription_id": _hex_ids("SUB-", len(base_customers), rng),
+        "customer_id": base_customers["customer_id"].to_numpy(dtype=object),
+        "plan_id": base_customers["plan_id"].to_numpy(dtype=object),
+        "start_date": np.datetime_as_string(start, unit="D"),
+        "status": "active",
+    })
+
+def build_base_users(
+    base_customers: pd.DataFrame,
+    seed_users: pd.DataFrame,
+    rng: np.random.Generator = None,
+) -> pd.DataFrame:
+    rng = rng if rng is not None else np.random.default_rng(RNG_SEED)
 
-    rows = []
-    total_users = 0
+    # Learn user role proportions from seed (simple but realistic)
+    role_probs = seed_users["user_role"].value_counts(normalize=True)
+    roles = role_probs.index.to_numpy(dtype=object)
+    weights = role_probs.to_numpy(dtype=float)
 
     # Users per customer correlated with team_size (and capped)
-    for _, c in base_customers.iterrows():
-        team_size = int(c["team_size"])
-        # realistic: not every seat is a user; plus some variability
-        users_count = max(1, int(random.gauss(team_size * 0.65, 2)))
-        users_count = min(users_count, team_size + 5)
-        # keep near target_users by scaling down later if we overshoot
-        for u in range(users_count):
-            user_id = f"{c['customer_id']}-U{u+1:03d}"
-            signup_dt = parse_date(c["signup_date"])
-            created_dt = signup_dt + timedelta(days=random.randint(0, 15))
-            rows.append({
-                "user_id": user_id,
-                "customer_id": c["customer_id"],
-                "user_role": random.choices(roles, weights=weights, k=1)[0],
-                "created_date": created_dt.date().isoformat()
-            })
-            total_users += 1
-
-    df = pd.DataFrame(rows)
+    # realistic: not every seat is a user; plus some variability
+    team_size = base_customers["team_size"].to_numpy(dtype=np.int64)
+    users_count = np.trunc(rng.normal(team_size * 0.65, 2)).astype(np.int64)
+    users_count = np.minimum(np.maximum(users_count, 1), team_size + 5)
+
+    # one row per user: repeat each customer users_count times, number them 1..count
+    cidx = np.repeat(np.arange(len(base_customers)), users_count)
+    first_row = np.repeat(np.cumsum(users_count) - users_count, users_count)
+    user_no = np.arange(len(cidx)) - first_row + 1
+
+    customer_id = base_customers["customer_id"].to_numpy(dtype=object)[cidx]
+    signup = _to_utc_days(base_customers["signup_date"])[cidx]
+
+    df = pd.DataFrame({
+        "user_id": pd.Series(customer_id, dtype=object) + "-U" + pd.Series(user_no).astype(str).str.zfill(3),
+        "customer_id": customer_id,
+        "user_role": rng.choice(roles, size=len(cidx), p=weights),
+        "created_date": np.datetime_as_string(_offset_days(signup, 0, 15, rng), unit="D"),
+    })
 
     # If we overshoot hard, sample down to target while keeping per-customer distribution roughly
-    if total_users > TARGET_USERS:
-        df = df.sample(n=TARGET_USERS, random_state=42).sort_values(["customer_id", "user_id"]).reset_index(drop=True)
-
+    if len(df) > TARGET_USERS:
+        df = df.sample(n=TARGET_USERS, random_state=rng).sort_values(["customer_id", "user_id"]).reset_index(drop=True)
     return df
 
-def build_base_invoices_payments(
-    base_customers: pd.DataFrame,
-    base_subscriptions: pd.DataFrame,
-    invoice_synth: GaussianCopulaSynthesizer
+def _hex_ids(prefix: str, n: int, rng: np.random.Generator) -> list:
+    # 48 random bits per id, same shape as f"{prefix}{uuid4().hex[:12]}"
+    return [f"{prefix}{x:012x}" for x in rng.integers(0, 1 << 48, size=n, dtype=np.int64).tolist()]
+
+def build_invoice_skeleton(
+    subs: pd.DataFrame,
+    now: datetime,
+    rng: np.random.Generator,
 ) -> pd.DataFrame:
     """
-    Fast path:
-    1) Build invoice skeleton for all subscriptions across MONTHS_HISTORY.
-    2) Sample SDV outcomes in one batch.
-    3) Merge outcomes + enforce constraints.
+    One row per subscription-month in the MONTHS_HISTORY window.
+    subs carries the customer segment columns (plan_id, country, channel).
     """
-    now = datetime.now(timezone.utc)
     start_window = month_start(now - timedelta(days=30 * MONTHS_HISTORY))
 
-    # Map customer segment fields
-    cust_map = base_customers.set_index("customer_id").to_dict(orient="index")
-
-    # 1) Build invoice skeleton
-    skeleton_rows = []
-    for _, s in base_subscriptions.iterrows():
-        cid = s["customer_id"]
-        seg = cust_map[cid]
-        sub_start = parse_date(s["start_date"])
-        first_month = month_start(sub_start)
-
-        for m in range(MONTHS_HISTORY):
-            inv_dt = month_start(first_month + timedelta(days=30 * m))
-            if inv_dt < start_window or inv_dt > now:
-                continue
-
-            plan = seg["plan_id"]
-            amount = float(PLAN_PRICE.get(plan, 29))
-
-            skeleton_rows.append({
-                "invoice_id": f"INV-{uuid.uuid4().hex[:12]}",
-                "subscription_id": s["subscription_id"],
-                "customer_id": cid,
-                "invoice_date": inv_dt.date().isoformat(),
-                "plan_id": plan,
-                "country": seg["country"],
-                "channel": seg["channel"],
-                "amount_usd": amount,
-            })
-
-    skeleton = pd.DataFrame(skeleton_rows)
-    n = len(skeleton)
-    print(f"Invoice skeleton rows: {n:,}")
-
-    # 2) Sample SDV outcomes in one batch
-    # We only need these columns from the SDV seed model:
-    outcomes = invoice_synth.sample(n)[["attempts", "final_status", "failure_reason", "refund_flag", "chargeback_flag"]].copy()
-
-    # 3) Merge and enforce constraints
-    df = pd.concat([skeleton.reset_index(drop=True), outcomes.reset_index(drop=True)], axis=1)
+    first_month = (
+        pd.to_datetime(subs["start_date"]).to_numpy().astype("datetime64[M]").astype("datetime64[D]")
+    )
+    offsets = (30 * np.arange(MONTHS_HISTORY)).astype("timedelta64[D]")
+    inv_dt = (first_month[:, None] + offsets[None, :]).astype("datetime64[M]").astype("datetime64[D]").ravel()
+    sub_idx = np.repeat(np.arange(len(subs)), MONTHS_HISTORY)
+
+    keep = (inv_dt >= np.datetime64(start_window.date())) & (inv_dt <= np.datetime64(now.date()))
+    inv_dt, sub_idx = inv_dt[keep], sub_idx[keep]
+
+    plan = subs["plan_id"].to_numpy(dtype=object)[sub_idx]
+    return pd.DataFrame({
+        "invoice_id": _hex_ids("INV-", len(sub_idx), rng),
+        "subscription_id": subs["subscription_id"].to_numpy(dtype=object)[sub_idx],
+        "customer_id": subs["customer_id"].to_numpy(dtype=object)[sub_idx],
+        "invoice_date": np.datetime_as_string(inv_dt, unit="D"),
+        "plan_id": plan,
+        "country": subs["country"].to_numpy(dtype=object)[sub_idx],
+        "channel": subs["channel"].to_numpy(dtype=object)[sub_idx],
+        "amount_usd": pd.Series(plan).map(PLAN_PRICE).fillna(29).astype(float).to_numpy(),
+    })
+
+def require_seedable(synth: GaussianCopulaSynthesizer) -> GaussianCopulaSynthesizer:
+    """
+    SDV has no public per-call seed: sample() seeds the copula model through the
+    synthesizer's _set_random_state (FIXED_RNG_SEED on first use), and that model
+    ignores numpy's global state. Fail at load time, not with silently
+    unreproducible chunks, if an SDV release drops that hook.
+    """
+    if not callable(getattr(synth, "_set_random_state", None)):
+        raise RuntimeError(
+            f"{type(synth).__name__} from sdv {sdv.__version__} has no _set_random_state, so invoice "
+            f"outcome sampling cannot be seeded per chunk; install an sdv release that has it"
+        )
+    return synth
+
+def sample_outcomes(invoice_synth: GaussianCopulaSynthesizer, n: int, seed: int) -> pd.DataFrame:
+    """
+    n SDV outcome rows from a sampler state fixed by seed, so a chunk samples the
+    same rows whichever process draws it (see require_seedable).
+    """
+    invoice_synth._set_random_state(seed)
+    return invoice_synth.sample(n)[["attempts", "final_status", "failure_reason", "refund_flag", "chargeback_flag"]]
 
+def clean_invoice_outcomes(df: pd.DataFrame, rng: np.random.Generator) -> pd.DataFrame:
     # Clean attempts
     df["attempts"] = df["attempts"].fillna(1).astype(float).round().astype(int).clip(1, 4)
 
@@ -207,7 +226,7 @@ def build_base_invoices_payments(
     # Clean failure_reason
     df["failure_reason"] = df["failure_reason"].where(df["final_status"].eq("failed"), None)
     df["failure_reason"] = df["failure_reason"].fillna(
-        random.choice(["insufficient_funds", "card_declined", "expired_card", "network_error", "unknown"])
+        rng.choice(["insufficient_funds", "card_declined", "expired_card", "network_error", "unknown"])
     )
 
     # Refund/chargeback only if succeeded
@@ -220,10 +239,95 @@ def build_base_invoices_payments(
 
     return df
 
-def main():
-    random.seed(42)
-    ensure_out_dir()
+def build_invoice_chunk(
+    chunk_idx: int,
+    subs: pd.DataFrame,
+    invoice_synth: GaussianCopulaSynthesizer,
+    now: datetime,
+    seed: int = RNG_SEED,
+) -> pd.DataFrame:
+    """
+    Skeleton -> SDV outcomes -> cleanup for one chunk of subscriptions.
+    All randomness comes from (seed, chunk_idx).
+    """
+    rng = np.random.default_rng([seed, chunk_idx])
+    skeleton = build_invoice_skeleton(subs, now, rng)
+    if skeleton.empty:
+        return skeleton
+    outcomes = sample_outcomes(invoice_synth, len(skeleton), int(rng.integers(0, 2**31 - 1)))
+    df = pd.concat([skeleton.reset_index(drop=True), outcomes.reset_index(drop=True)], axis=1)
+    return clean_invoice_outcomes(df, rng)
+
+_worker_synth = None
+
+def _init_sampling_worker(invoice_synth):
+    global _worker_synth
+    _worker_synth = invoice_synth
+
+def _build_invoice_chunk_in_worker(args):
+    chunk_idx, subs, now, seed = args
+    return build_invoice_chunk(chunk_idx, subs, _worker_synth, now, seed)
+
+def iter_base_invoices_payments(
+    base_customers: pd.DataFrame,
+    base_subscriptions: pd.DataFrame,
+    invoice_synth: GaussianCopulaSynthesizer,
+    chunk_size: int = INVOICE_CHUNK_SIZE,
+    workers: int = SAMPLING_WORKERS,
+    seed: int = RNG_SEED,
+    now: datetime = None,
+) -> Iterator[pd.DataFrame]:
+    """
+    Yield cleaned invoice/payment chunks of about chunk_size rows, in subscription order.
+
+    Each chunk is built from its own slice of subscriptions and its own RNG, so only
+    a few chunks are in memory at once and the output does not depend on `workers`.
+    With workers > 1, chunks are built in worker processes, at most 2 * workers ahead
+    of the one being consumed.
+    """
+    now = now or datetime.now(timezone.utc)
+    segments = base_customers[["customer_id", "country", "channel", "plan_id"]]
+    subs = base_subscriptions[["subscription_id", "customer_id", "start_date"]].merge(
+        segments, on="customer_id", how="left"
+    )
+    subs_per_chunk = max(1, chunk_size // MONTHS_HISTORY)
+    tasks = (
+        (i, subs.iloc[lo:lo + subs_per_chunk], now, seed)
+        for i, lo in enumerate(range(0, len(subs), subs_per_chunk))
+    )
+
+    if workers <= 1:
+        for chunk_idx, sub_chunk, now_, seed_ in tasks:
+            yield build_invoice_chunk(chunk_idx, sub_chunk, invoice_synth, now_, seed_)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_sampling_worker, initargs=(invoice_synth,)) as pool:
+        pending = deque()
+        for task in tasks:
+            pending.append(pool.submit(_build_invoice_chunk_in_worker, task))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+def build_base_invoices_payments(
+    base_customers: pd.DataFrame,
+    base_subscriptions: pd.DataFrame,
+    invoice_synth: GaussianCopulaSynthesizer
+) -> pd.DataFrame:
+    """
+    In-memory variant of iter_base_invoices_payments (all chunks concatenated).
+    """
+    chunks = list(iter_base_invoices_payments(base_customers, base_subscriptions, invoice_synth))
+    df = pd.concat(chunks, ignore_index=True)
+    print(f"Invoice skeleton rows: {len(df):,}")
+    return df
 
+def train_models():
+    """
+    Fit (or load cached) synthesizers from the seed CSVs.
+    Returns (customer_synth, invoice_synth, seed_users).
+    """
     seed_customers = pd.read_csv(SEED_CUSTOMERS)
     seed_users = pd.read_csv(SEED_USERS)
     seed_invpay = pd.read_csv(SEED_INVPAY)
@@ -234,34 +338,56 @@ def main():
     seed_joined = seed_invpay.merge(seed_customers_min, on="customer_id", how="left")
 
     print("Training SDV customer synthesizer...")
-    customer_synth = train_customer_synth(seed_customers)
+    customer_synth = load_or_train(
+        "customer_synth", [SEED_CUSTOMERS], lambda: train_customer_synth(seed_customers)
+    )
 
     print("Training SDV invoice/payment outcome synthesizer...")
-    invoice_synth = train_invoice_synth(seed_joined)
+    invoice_synth = require_seedable(load_or_train(
+        "invoice_synth", [SEED_INVPAY, SEED_CUSTOMERS], lambda: train_invoice_synth(seed_joined)
+    ))
+    return customer_synth, invoice_synth, seed_users
 
+def build_entity_tables(customer_synth: GaussianCopulaSynthesizer, seed_users: pd.DataFrame, rng: np.random.Generator):
+    """
+    In-memory base_customers, base_subscriptions and base_users.
+    """
     print("Generating base_customers...")
-    base_customers = build_base_customers(customer_synth)
+    base_customers = build_base_customers(customer_synth, rng)
 
     print("Generating base_subscriptions...")
-    base_subs = build_base_subscriptions(base_customers)
+    base_subs = build_base_subscriptions(base_customers, rng)
 
     print("Generating base_users...")
-    base_users = build_base_users(base_customers, seed_users)
+    base_users = build_base_users(base_customers, seed_users, rng)
+    return base_customers, base_subs, base_users
+
+def main():
+    rng = np.random.default_rng(RNG_SEED)
+    ensure_out_dir()
 
-    print("Generating base_invoices_payments (this may take a bit)...")
-    base_invpay = build_base_invoices_payments(base_customers, base_subs, invoice_synth)
+    customer_synth, invoice_synth, seed_users = train_models()
+    base_customers, base_subs, base_users = build_entity_tables(customer_synth, seed_users, rng)
 
     # Write outputs
-    base_customers.to_csv(f"{OUT_DIR}/base_customers.csv", index=False)
-    base_users.to_csv(f"{OUT_DIR}/base_users.csv", index=False)
-    base_subs.to_csv(f"{OUT_DIR}/base_subscriptions.csv", index=False)
-    base_invpay.to_csv(f"{OUT_DIR}/base_invoices_payments.csv", index=False)
+    paths = {
+        "base_customers": write_base_table(base_customers, "base_customers"),
+        "base_users": write_base_table(base_users, "base_users"),
+        "base_subscriptions": write_base_table(base_subs, "base_subscriptions"),
+    }
+
+    print(f"Generating base_invoices_payments in chunks of ~{INVOICE_CHUNK_SIZE:,} rows ({SAMPLING_WORKERS} worker(s))...")
+    with BaseTableWriter("base_invoices_payments") as writer:
+        for chunk in iter_base_invoices_payments(base_customers, base_subs, invoice_synth):
+            writer.write(chunk)
+    paths["base_invoices_payments"] = writer.path
+    n_invpay = writer.rows
 
     print("✅ Base tables generated:")
-    print(f"- {OUT_DIR}/base_customers.csv  ({len(base_customers):,} rows)")
-    print(f"- {OUT_DIR}/base_users.csv      ({len(base_users):,} rows)")
-    print(f"- {OUT_DIR}/base_subscriptions.csv ({len(base_subs):,} rows)")
-    print(f"- {OUT_DIR}/base_invoices_payments.csv ({len(base_invpay):,} rows)")
+    print(f"- {paths['base_customers']}  ({len(base_customers):,} rows)")
+    print(f"- {paths['base_users']}      ({len(base_users):,} rows)")
+    print(f"- {paths['base_subscriptions']} ({len(base_subs):,} rows)")
+    print(f"- {paths['base_invoices_payments']} ({n_invpay:,} rows)")
 
 if __name__ == "__main__":
     main()
@@ -1,12 +1,11 @@
-import pandas as pd
-
-OUT_DIR = "scripts/sdv/outputs"
+from .base_tables import read_base_table
 
 def main():
-    c = pd.read_csv(f"{OUT_DIR}/base_customers.csv")
-    u = pd.read_csv(f"{OUT_DIR}/base_users.csv")
-    s = pd.read_csv(f"{OUT_DIR}/base_subscriptions.csv")
-    p = pd.read_csv(f"{OUT_DIR}/base_invoices_payments.csv")
+    # Only the columns the checks below use
+    c = read_base_table("base_customers", columns=["customer_id", "plan_id", "channel"])
+    u = read_base_table("base_users", columns=["user_id"])
+    s = read_base_table("base_subscriptions", columns=["subscription_id"])
+    p = read_base_table("base_invoices_payments", columns=["plan_id", "amount_usd", "final_status", "failure_reason"])
 
     print("Rows:")
     print("customers:", len(c))
@@ -27,7 +26,7 @@ def main():
     print(p.loc[p["final_status"].eq("failed"), "failure_reason"].value_counts().head(10))
 
     print("\nAvg amount by plan:")
-    print(p.groupby("plan_id")["amount_usd"].mean().round(2))
+    print(p.groupby("plan_id", observed=True)["amount_usd"].mean().round(2))
 
 if __name__ == "__main__":
     main()